@@ -0,0 +1 @@
+"""Общий код серверов первой лабораторной"""
@@ -0,0 +1,114 @@
+import socket
+
+from common.http_parser import BadRequest, RequestParser
+
+
+KEEPALIVE_TIMEOUT = 5.0  # Сколько постоянное соединение ждет следующий запрос
+MAX_KEEPALIVE_REQUESTS = 100  # После стольких запросов сервер закрывает соединение сам
+RECV_SIZE = 64 * 1024
+CONTINUE_RESPONSE = b"HTTP/1.1 100 Continue\r\n\r\n"
+
+
+class RequestReader:
+    """Читает запросы один за другим из одного соединения.
+
+    Байты после конца запроса остаются в разборщике: так разбираются
+    запросы, которые клиент прислал подряд, не дожидаясь ответов.
+    """
+
+    def __init__(self, sock, parser=None):
+        self.sock = sock
+        self.parser = parser or RequestParser()
+        self.ready = None  # Следующий запрос, разобранный заранее
+        self.error = None  # Ошибка в следующем запросе: отдается после ответов на предыдущие
+
+    def has_pending(self):
+        """Пришли ли уже байты следующего запроса"""
+        return self.ready is not None or self.error is not None or self.parser.has_partial()
+
+    def has_request(self):
+        """Пришел ли следующий запрос целиком"""
+        if self.ready is None and self.error is None:
+            try:
+                self.ready = self.parser.next_request()
+            except BadRequest as e:
+                self.error = e
+        return self.ready is not None or self.error is not None
+
+    def fill(self):
+        if self.parser.continue_needed:
+            # Клиент прислал Expect: 100-continue и ждет разрешения отправить тело
+            self.parser.continue_needed = False
+            self.sock.sendall(CONTINUE_RESPONSE)
+        data = self.sock.recv(RECV_SIZE)
+        if not data:
+            return False
+        self.parser.feed(data)
+        return True
+
+    def read_request(self):
+        """Возвращает следующий запрос; None - клиент закрыл соединение между запросами"""
+        while not self.has_request():
+            if not self.fill():
+                if self.parser.has_partial():
+                    raise BadRequest("соединение закрыто посреди запроса")
+                return None
+
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+        request, self.ready = self.ready, None
+        return request
+
+
+class KeepAliveConnection:
+    """Постоянное HTTP/1.1 соединение: запросы по очереди, ответы в том же порядке.
+
+    Ответы на запросы, уже лежащие в буфере, копятся и уходят одним sendall.
+    Соединение закрывается, если клиент попросил Connection: close, молчал
+    дольше idle_timeout или сделал max_requests запросов.
+    """
+
+    def __init__(self, sock, idle_timeout=KEEPALIVE_TIMEOUT, max_requests=MAX_KEEPALIVE_REQUESTS):
+        self.sock = sock
+        self.idle_timeout = idle_timeout
+        self.max_requests = max_requests
+        self.reader = RequestReader(sock)
+        self.requests = 0
+        self.keep_alive = True
+        self.pending = []
+        sock.settimeout(idle_timeout)
+
+    def __iter__(self):
+        """Выдает запросы, пока соединение не пора закрыть"""
+        while self.keep_alive:
+            try:
+                request = self.reader.read_request()
+            except socket.timeout:
+                if self.reader.has_pending():
+                    raise
+                break  # Клиент молчал между запросами дольше idle_timeout
+            if request is None:
+                break
+            self.requests += 1
+            self.keep_alive = request.keep_alive and self.requests < self.max_requests
+            yield request
+        self.flush()
+
+    def connection_headers(self):
+        """Заголовки Connection и Keep-Alive для ответа на текущий запрос"""
+        if not self.keep_alive:
+            return "Connection: close\r\n"
+        return (f"Connection: keep-alive\r\n"
+                f"Keep-Alive: timeout={int(self.idle_timeout)}, max={self.max_requests - self.requests}\r\n")
+
+    def send(self, data):
+        """Отправляет ответ; если следующий запрос уже пришел, ответ уйдет вместе с ответом на него"""
+        self.pending.append(data)
+        if not self.keep_alive or not self.reader.has_request():
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            self.sock.sendall(b''.join(self.pending))
+            self.pending.clear()
@@ -0,0 +1,274 @@
+MAX_HEADER_SIZE = 64 * 1024
+MAX_BODY_SIZE = 1024 * 1024
+MAX_CHUNK_LINE = 1024  # Строка с размером куска и расширениями
+COMPACT_SIZE = 64 * 1024  # Разобранное начало буфера удаляется, когда его набирается столько
+
+HEX_DIGITS = b'0123456789abcdefABCDEF'
+
+# Состояния разбора
+HEAD = 'head'
+BODY = 'body'
+CHUNK_SIZE = 'chunk size'
+CHUNK_DATA = 'chunk data'
+CHUNK_END = 'chunk end'
+TRAILERS = 'trailers'
+
+
+class BadRequest(ValueError):
+    """Запрос нарушает формат HTTP; status - код ответа клиенту"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class HTTPRequest:
+    """Разобранный запрос: имена заголовков в нижнем регистре, тело - bytes"""
+
+    __slots__ = ('method', 'target', 'version', 'headers', 'body')
+
+    def __init__(self, method, target, version, headers, body):
+        self.method = method
+        self.target = target
+        self.version = version
+        self.headers = headers
+        self.body = body
+
+    @property
+    def keep_alive(self):
+        """Хочет ли клиент продолжить соединение после ответа"""
+        connection = self.headers.get('connection', '').lower()
+        if self.version == 'HTTP/1.1':
+            return 'close' not in connection
+        return 'keep-alive' in connection
+
+
+def parse_head(head):
+    """Строка запроса и заголовки; повторные заголовки склеиваются через запятую (RFC 9110, 5.3)"""
+    request_line, _, fields = head.partition('\r\n')
+    parts = request_line.split()
+    if len(parts) != 3 or parts[2][:5] != 'HTTP/':
+        raise BadRequest(f"неверная строка запроса: {request_line[:100]}")
+    if not fields:
+        return parts, {}
+
+    headers = {}
+    lines = fields.split('\r\n')
+    for line in lines:
+        name, separator, value = line.partition(':')
+        if not separator:
+            raise BadRequest(f"неверный заголовок: {line[:100]}")
+        headers[name.lower()] = value.strip()
+
+    # Пустые имена, пробелы перед двоеточием, переносы строк и повторы редки:
+    # их проверяет отдельный, медленный проход
+    if len(headers) != len(lines) or '' in headers or ' :' in fields or '\n ' in fields or '\t' in fields:
+        headers = parse_headers_strict(lines)
+    return parts, headers
+
+
+def parse_headers_strict(lines):
+    """Заголовки с проверкой имен: пробел перед двоеточием запрещен (RFC 9112, 5.1)"""
+    headers = {}
+    for line in lines:
+        name, _, value = line.partition(':')
+        name = name.lower()
+        if not name or name != name.strip():
+            raise BadRequest(f"неверный заголовок: {line[:100]}")
+        value = value.strip()
+        headers[name] = headers[name] + ', ' + value if name in headers else value
+    return headers
+
+
+class RequestParser:
+    """Инкрементальный разбор HTTP/1.1 запросов из потока байт.
+
+    Байты подаются через feed по мере прихода, next_request возвращает
+    очередной запрос, как только он пришел целиком. Конец заголовков ищется
+    только в новых байтах, тело по Content-Length или по кускам (chunked)
+    копируется один раз, а разобранное начало буфера удаляется пачками,
+    а не после каждого запроса.
+    """
+
+    def __init__(self, max_header_size=MAX_HEADER_SIZE, max_body_size=MAX_BODY_SIZE):
+        self.max_header_size = max_header_size
+        self.max_body_size = max_body_size
+        self.buffer = bytearray()
+        self.offset = 0  # Начало неразобранных байт
+        self.scanned = 0  # До этого места конец заголовков уже искали
+        self.state = HEAD
+        self.request = None  # Запрос, тело которого еще читается
+        self.remaining = 0  # Байт тела или текущего куска осталось прочитать
+        self.chunks = None  # Тело chunked запроса
+        self.continue_needed = False  # Клиент ждет 100 Continue, прежде чем слать тело
+
+    def feed(self, data):
+        self.buffer += data
+
+    def has_partial(self):
+        """Начат ли, но не дочитан следующий запрос"""
+        return self.state != HEAD or len(self.buffer) > self.offset
+
+    def next_request(self):
+        """Следующий полностью пришедший запрос или None, если нужно больше байт"""
+        if self.state == HEAD:
+            # Быстрый путь для самого частого случая: заголовки еще не пришли
+            # или пришли целиком у запроса без тела - без цикла по состояниям.
+            # Пустые строки перед запросом (буфер начинается с CR) и ошибки разбирает общий путь
+            buffer, offset = self.buffer, self.offset
+            start = self.scanned - 3
+            end = buffer.find(b'\r\n\r\n', start if start > offset else offset)
+            if end < 0:
+                size = len(buffer)
+                if size == offset:
+                    if offset:
+                        buffer.clear()
+                        self.offset = self.scanned = 0
+                    return None
+                if size - offset <= self.max_header_size and buffer[offset] != 13:
+                    self.scanned = size
+                    if offset >= COMPACT_SIZE:
+                        self.compact()
+                    return None
+            elif offset < end <= offset + self.max_header_size and buffer[offset] != 13:
+                parts, headers = parse_head(buffer[offset:end].decode('latin-1'))
+                self.offset = self.scanned = end + 4
+                request = HTTPRequest(parts[0], parts[1], parts[2], headers, b'')
+                if 'content-length' not in headers and 'transfer-encoding' not in headers:
+                    return request
+                self.start_body(request)
+        return self.parse_states()
+
+    def parse_states(self):
+        """Общий путь по состояниям разбора: пустые строки перед запросом, тело, ошибки размера"""
+        while True:
+            if self.state == HEAD:
+                request = self.read_head()
+                if request is not None:
+                    return request  # Запрос без тела
+                if self.state == HEAD:
+                    break
+            elif self.state == BODY:
+                if len(self.buffer) - self.offset < self.remaining:
+                    break
+                end = self.offset + self.remaining
+                self.request.body = bytes(self.buffer[self.offset:end])
+                self.offset = end
+                return self.finish()
+            elif self.state == CHUNK_SIZE:
+                if not self.read_chunk_size():
+                    break
+            elif self.state == CHUNK_DATA:
+                # Кусок забирается по мере прихода, чтобы не держать его в буфере дважды
+                available = min(len(self.buffer) - self.offset, self.remaining)
+                if not available:
+                    break
+                with memoryview(self.buffer)[self.offset:self.offset + available] as piece:
+                    self.chunks += piece
+                self.offset += available
+                self.remaining -= available
+                if not self.remaining:
+                    self.state = CHUNK_END
+            elif self.state == CHUNK_END:
+                if len(self.buffer) - self.offset < 2:
+                    break
+                if not self.buffer.startswith(b'\r\n', self.offset):
+                    raise BadRequest("после куска тела нет CRLF")
+                self.offset += 2
+                self.state = CHUNK_SIZE
+            elif self.state == TRAILERS:
+                end = self.buffer.find(b'\r\n', self.offset)
+                if end < 0:
+                    if len(self.buffer) - self.offset > self.max_header_size:
+                        raise BadRequest("слишком большие трейлеры", 431)
+                    break
+                empty = end == self.offset
+                self.offset = end + 2  # Поля трейлера серверу не нужны и пропускаются
+                if empty:
+                    self.request.body = bytes(self.chunks)
+                    self.chunks = None
+                    return self.finish()
+
+        if self.offset == len(self.buffer) or self.offset >= COMPACT_SIZE:
+            self.compact()
+        return None
+
+    def read_head(self):
+        """Разбирает заголовки, если они пришли, и выбирает, как читать тело.
+
+        Запрос без тела возвращается сразу, иначе возвращается None.
+        """
+        buffer, offset = self.buffer, self.offset
+        # Пустые строки между запросами допускаются (RFC 9112, 2.2)
+        while buffer.startswith(b'\r\n', offset):
+            offset += 2
+        self.offset = offset
+        # Конец заголовков мог начаться в последних трех уже просмотренных байтах
+        end = buffer.find(b'\r\n\r\n', self.scanned - 3 if self.scanned - 3 > offset else offset)
+        if end < 0:
+            self.scanned = len(buffer)
+            if self.scanned - offset > self.max_header_size:
+                raise BadRequest("слишком большие заголовки", 431)
+            return None
+        if end - offset > self.max_header_size:
+            raise BadRequest("слишком большие заголовки", 431)
+
+        (method, target, version), headers = parse_head(buffer[offset:end].decode('latin-1'))
+        self.offset = self.scanned = end + 4
+        request = HTTPRequest(method, target, version, headers, b'')
+        if 'content-length' not in headers and 'transfer-encoding' not in headers:
+            return request
+        self.start_body(request)
+        return None
+
+    def start_body(self, request):
+        """Выбирает, как читать тело запроса: по Content-Length или по кускам"""
+        headers = request.headers
+        self.request = request
+        if 'transfer-encoding' in headers:
+            # Вместе с Content-Length это путь к подмене запросов (request smuggling)
+            if 'content-length' in headers or request.version == 'HTTP/1.0':
+                raise BadRequest("Transfer-Encoding вместе с Content-Length или в HTTP/1.0")
+            if headers['transfer-encoding'].lower() != 'chunked':
+                raise BadRequest("поддерживается только Transfer-Encoding: chunked", 501)
+            self.state = CHUNK_SIZE
+            self.chunks = bytearray()
+        else:
+            length = headers.get('content-length', '0')
+            if not (length.isascii() and length.isdigit()):
+                raise BadRequest("неверный Content-Length")
+            self.remaining = int(length)
+            if self.remaining > self.max_body_size:
+                raise BadRequest("слишком большое тело запроса", 413)
+            self.state = BODY
+        self.continue_needed = headers.get('expect', '').lower() == '100-continue'
+
+    def read_chunk_size(self):
+        """Разбирает строку с размером очередного куска"""
+        end = self.buffer.find(b'\r\n', self.offset, self.offset + MAX_CHUNK_LINE)
+        if end < 0:
+            if len(self.buffer) - self.offset >= MAX_CHUNK_LINE:
+                raise BadRequest("слишком длинная строка размера куска")
+            return False
+        size = self.buffer[self.offset:end].split(b';', 1)[0].strip()  # Расширения куска не нужны
+        if not size or size.strip(HEX_DIGITS):
+            raise BadRequest("неверный размер куска")
+        self.offset = end + 2
+        self.remaining = int(size, 16)
+        if len(self.chunks) + self.remaining > self.max_body_size:
+            raise BadRequest("слишком большое тело запроса", 413)
+        self.state = CHUNK_DATA if self.remaining else TRAILERS
+        return True
+
+    def finish(self):
+        request, self.request = self.request, None
+        self.state = HEAD
+        self.continue_needed = False
+        return request
+
+    def compact(self):
+        """Удаляет разобранное начало буфера"""
+        if self.offset:
+            del self.buffer[:self.offset]
+            self.scanned = max(self.scanned - self.offset, 0)
+            self.offset = 0
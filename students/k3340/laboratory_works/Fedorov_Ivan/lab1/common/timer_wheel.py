@@ -0,0 +1,69 @@
+import math
+import threading
+import time
+
+
+class TimerWheel:
+    """Колесо таймеров: постановка, перенос и отмена таймера за O(1).
+
+    Время разбито на тики по tick секунд, колесо - кольцо из slots ячеек.
+    Таймер кладется в ячейку, до которой осталось нужное число тиков;
+    каждый тик просматривает одну ячейку, а не все таймеры. Таймеры
+    длиннее оборота колеса хранят число оставшихся оборотов.
+    """
+
+    def __init__(self, tick=1.0, slots=64):
+        self.tick = tick
+        self.slots = [{} for _ in range(slots)]  # {key: оставшиеся обороты}
+        self.positions = {}  # {key: номер ячейки}
+        self.current = 0
+        self.last_tick = time.monotonic()
+        self.lock = threading.Lock()  # Ставят таймеры одни потоки, а срабатывают они в другом
+
+    def schedule(self, key, delay):
+        """Ставит или переносит таймер key на delay секунд вперед"""
+        ticks = max(1, math.ceil(delay / self.tick))
+        rounds, offset = divmod(ticks - 1, len(self.slots))
+        with self.lock:
+            slot = self.positions.pop(key, None)
+            if slot is not None:
+                del self.slots[slot][key]
+            slot = (self.current + offset + 1) % len(self.slots)
+            self.slots[slot][key] = rounds
+            self.positions[key] = slot
+
+    def cancel(self, key):
+        """Снимает таймер; ничего не делает, если его нет"""
+        with self.lock:
+            slot = self.positions.pop(key, None)
+            if slot is not None:
+                del self.slots[slot][key]
+
+    def advance(self, now=None):
+        """Проворачивает колесо до момента now и возвращает ключи сработавших таймеров"""
+        if now is None:
+            now = time.monotonic()
+        expired = []
+        with self.lock:
+            ticks = int((now - self.last_tick) / self.tick)
+            if ticks <= 0:
+                return expired
+            self.last_tick += ticks * self.tick
+
+            for _ in range(ticks):
+                self.current = (self.current + 1) % len(self.slots)
+                slot = self.slots[self.current]
+                for key, rounds in list(slot.items()):
+                    if rounds:
+                        slot[key] = rounds - 1
+                    else:
+                        del slot[key]
+                        del self.positions[key]
+                        expired.append(key)
+        return expired
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __contains__(self, key):
+        return key in self.positions
@@ -0,0 +1,78 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+WORKERS = 32  # Потоков обработки
+QUEUE_SIZE = 512  # Сколько соединений может ждать потока; с WORKERS укладывается в обычный лимит в 1024 дескриптора
+
+
+class BoundedExecutor:
+    """Пул потоков с ограниченной очередью.
+
+    Очередь самого ThreadPoolExecutor не ограничена: при всплеске подключений
+    задачи копятся без предела и ждут дольше, чем клиент готов ждать. Здесь
+    принятых, но не завершенных задач не больше workers + queue_size; submit
+    сверх этого возвращает False, и вызывающий отказывает сам - сервер оценок
+    отвечает 503.
+    """
+
+    def __init__(self, workers=WORKERS, queue_size=QUEUE_SIZE, name='worker'):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+
+        self.lock = threading.Lock()
+        self.in_flight = 0  # Принятые и еще не завершенные задачи
+        self.active = 0  # Из них выполняются прямо сейчас
+        self.max_queue_depth = 0
+        self.completed = 0
+        self.rejected = 0
+
+    @property
+    def queue_depth(self):
+        """Сколько задач ждут свободного потока"""
+        return self.in_flight - self.active
+
+    @property
+    def waiting(self):
+        """Сколько принятых задач не начнутся, пока какой-нибудь поток не освободится"""
+        return max(self.in_flight - self.workers, 0)
+
+    def submit(self, function, *args):
+        """Ставит function(*args) в очередь; False - очередь полна и задача не принята"""
+        with self.lock:
+            if self.in_flight >= self.workers + self.queue_size:
+                self.rejected += 1
+                return False
+            self.in_flight += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.in_flight - self.workers)
+        self.executor.submit(self.run, function, args)
+        return True
+
+    def run(self, function, args):
+        with self.lock:
+            self.active += 1
+        try:
+            function(*args)
+        finally:
+            with self.lock:
+                self.active -= 1
+                self.in_flight -= 1
+                self.completed += 1
+
+    def stats(self):
+        """Счетчики пула для /api/stats"""
+        with self.lock:
+            return {
+                'workers': self.workers,
+                'busy_workers': self.active,
+                'queue_depth': self.in_flight - self.active,
+                'queue_size': self.queue_size,
+                'max_queue_depth': self.max_queue_depth,
+                'completed_tasks': self.completed,
+                'rejected_connections': self.rejected,
+            }
+
+    def shutdown(self):
+        """Ждущие в очереди задачи отменяются, выполняющиеся дорабатывают сами"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,4 @@
+"""Генератор нагрузки для серверов первой лабораторной.
+
+Запуск из каталога lab1: python -m loadgen <сервер> [параметры]
+"""
@@ -0,0 +1,45 @@
+import argparse
+import asyncio
+import json
+from datetime import datetime
+
+from loadgen.runner import run_load
+from loadgen.targets import TARGETS
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m loadgen', description="Генератор нагрузки для серверов lab1")
+    parser.add_argument('target', choices=TARGETS, help="сервер под нагрузкой")
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, help="порт сервера (по умолчанию - порт этого сервера)")
+    parser.add_argument('-c', '--concurrency', type=int, default=50, help="число одновременных воркеров")
+    parser.add_argument('-d', '--duration', type=float, default=10, help="длительность прогона, с")
+    parser.add_argument('--mix', help="виды запросов с весами, например valid:8,invalid:2")
+    parser.add_argument('--timeout', type=float, default=5, help="таймаут одного запроса, с")
+    parser.add_argument('--think', type=float, default=0, help="пауза воркера между запросами, с")
+    parser.add_argument('--output', help="дописать отчет строкой JSON в этот файл")
+    parser.add_argument('--no-keepalive', action='store_true',
+                        help="HTTP: Connection: close, новое соединение на каждый запрос")
+    args = parser.parse_args()
+
+    target_class = TARGETS[args.target]
+    target = target_class(args.host, args.port or target_class.default_port)
+    if args.no_keepalive:
+        target.keep_alive = False
+    mix = args.mix or target_class.default_mix
+
+    try:
+        report = asyncio.run(run_load(target, args.concurrency, args.duration, mix, args.timeout, args.think))
+    except ValueError as e:
+        parser.error(str(e))
+    report['started_at'] = datetime.now().isoformat(timespec='seconds')
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.output:
+        # Отчеты разных прогонов копятся в одном файле, по строке на прогон
+        with open(args.output, 'a', encoding='utf-8') as file:
+            file.write(json.dumps(report, ensure_ascii=False) + '\n')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Всплеск подключений к серверу оценок: сколько клиентов обслужено, сколько отклонено и во что это обошлось серверу.
+
+Запуск из каталога lab1: python -m loadgen.burst_benchmark
+"""
+
+import argparse
+import asyncio
+import os
+import shlex
+import subprocess
+import sys
+import threading
+import time
+
+from loadgen.stats import latency_summary
+
+
+LAB_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def start_server(script, port, extra_args):
+    """Запускает сервер оценок отдельным процессом; вывод сервера отбрасывается"""
+    process = subprocess.Popen([sys.executable, script, '--port', str(port), *extra_args],
+                               cwd=os.path.join(LAB_DIR, 'task5'),
+                               stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    time.sleep(0.7)
+    return process
+
+
+def watch_process(pid, stop, peak):
+    """Пик числа потоков и памяти процесса по /proc (Linux)"""
+    while not stop.is_set():
+        try:
+            with open(f'/proc/{pid}/status') as file:
+                for line in file:
+                    if line.startswith('Threads:'):
+                        peak['threads'] = max(peak['threads'], int(line.split()[1]))
+                    elif line.startswith('VmRSS:'):
+                        peak['rss_kb'] = max(peak['rss_kb'], int(line.split()[1]))
+        except OSError:
+            return
+        stop.wait(0.01)
+
+
+async def one_request(host, port, timeout):
+    """Соединение на один GET /: статус ответа или вид ошибки и время до конца ответа"""
+    started = time.perf_counter()
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+        try:
+            writer.write(f"GET / HTTP/1.1\r\nHost: {host}:{port}\r\nConnection: close\r\n\r\n".encode('latin-1'))
+            await writer.drain()
+            status_line = await asyncio.wait_for(reader.readline(), timeout)
+            await asyncio.wait_for(reader.read(), timeout)
+        finally:
+            writer.close()
+        status = status_line.split()[1].decode('ascii') if status_line else 'closed'
+    except asyncio.TimeoutError:
+        status = 'timeout'
+    except OSError as e:
+        status = type(e).__name__
+    return status, time.perf_counter() - started
+
+
+async def burst(host, port, connections, timeout):
+    """connections клиентов подключаются одновременно, каждый делает один запрос"""
+    return await asyncio.gather(*(one_request(host, port, timeout) for _ in range(connections)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Всплеск подключений к серверу оценок")
+    parser.add_argument('--connections', default='500,2000,5000', help="размеры всплесков через запятую")
+    parser.add_argument('--script', default='grades_server.py', help="скрипт сервера в каталоге task5")
+    parser.add_argument('--server-args', default='', help="дополнительные аргументы сервера, например '--workers 64'")
+    parser.add_argument('--timeout', type=float, default=10, help="таймаут клиента, с")
+    parser.add_argument('--port', type=int, default=9490)
+    args = parser.parse_args()
+
+    print(f"Сервер: {args.script} {args.server_args}".rstrip())
+    print(f"{'клиентов':>8} {'2xx':>6} {'503':>6} {'сбоев':>6} {'p50, мс':>9} {'max, мс':>9} "
+          f"{'потоков':>8} {'RSS, МБ':>8}")
+    for connections in map(int, args.connections.split(',')):
+        server = start_server(args.script, args.port, shlex.split(args.server_args))
+        peak = {'threads': 0, 'rss_kb': 0}
+        stop = threading.Event()
+        watcher = threading.Thread(target=watch_process, args=(server.pid, stop, peak), daemon=True)
+        watcher.start()
+        try:
+            results = asyncio.run(burst('localhost', args.port, connections, args.timeout))
+        finally:
+            stop.set()
+            watcher.join()
+            server.terminate()
+            server.wait()
+
+        statuses = [status for status, _ in results]
+        served = sum(status.startswith('2') for status in statuses)
+        rejected = statuses.count('503')
+        latency = latency_summary([elapsed for _, elapsed in results])
+        print(f"{connections:>8} {served:>6} {rejected:>6} {connections - served - rejected:>6} "
+              f"{latency['p50']:>9.1f} {latency['max']:>9.1f} {peak['threads']:>8} {peak['rss_kb'] / 1024:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Задержки HTTP серверов lab1 с постоянными соединениями и без них.
+
+Запуск из каталога lab1: python -m loadgen.keepalive_benchmark
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+from loadgen.runner import run_load
+from loadgen.targets import GradesTarget, StaticHttpTarget
+
+
+LAB_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Каталог, скрипт сервера и класс цели нагрузки
+SERVERS = (
+    ('task3', 'server 3 task.py', StaticHttpTarget),
+    ('task5', 'grades_server.py', GradesTarget),
+)
+
+
+def start_server(directory, script, port):
+    """Запускает сервер отдельным процессом; вывод сервера отбрасывается"""
+    process = subprocess.Popen([sys.executable, script, '--port', str(port)], cwd=os.path.join(LAB_DIR, directory),
+                               stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    time.sleep(0.7)
+    return process
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP серверы lab1: keep-alive против соединения на запрос")
+    parser.add_argument('-c', '--concurrency', type=int, default=100, help="одновременных клиентов")
+    parser.add_argument('-d', '--duration', type=float, default=10, help="длительность прогона, с")
+    parser.add_argument('--port', type=int, default=9480)
+    args = parser.parse_args()
+
+    print(f"Клиентов: {args.concurrency}, прогон {args.duration} с, задержки в мс")
+    print(f"{'сервер':<8} {'соединения':<12} {'запросов/с':>10} {'p50':>8} {'p95':>8} {'p99':>8} {'ошибок':>7}")
+    for name, script, target_class in SERVERS:
+        for keep_alive in (False, True):
+            server = start_server(name, script, args.port)
+            try:
+                target = target_class('localhost', args.port)
+                target.keep_alive = keep_alive
+                report = asyncio.run(run_load(target, args.concurrency, args.duration, target.default_mix))
+            finally:
+                server.terminate()
+                server.wait()
+
+            latency = report['latency_ms']
+            mode = 'keep-alive' if keep_alive else 'close'
+            print(f"{name:<8} {mode:<12} {report['throughput_rps']:>10.0f} {latency['p50']:>8.2f} "
+                  f"{latency['p95']:>8.2f} {latency['p99']:>8.2f} {report['errors']:>7}")
+
+
+if __name__ == "__main__":
+    main()
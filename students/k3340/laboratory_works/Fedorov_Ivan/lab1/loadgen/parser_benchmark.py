@@ -0,0 +1,118 @@
+"""Скорость разбора HTTP запросов: инкрементальный RequestParser против прежнего буфера.
+
+Запуск: python loadgen/parser_benchmark.py или из каталога lab1: python -m loadgen.parser_benchmark
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.http_parser import HTTPRequest, RequestParser
+
+
+GET_REQUEST = (b"GET /api/grades HTTP/1.1\r\nHost: localhost:8080\r\nUser-Agent: loadgen\r\n"
+               b"Accept: */*\r\nAccept-Encoding: gzip\r\n\r\n")
+
+
+def post_request(body):
+    return b"POST /add HTTP/1.1\r\nHost: localhost\r\nContent-Length: %d\r\n\r\n" % len(body) + body
+
+
+def chunked_request(body, chunk_size):
+    chunks = b''.join(b'%x\r\n' % len(body[i:i + chunk_size]) + body[i:i + chunk_size] + b'\r\n'
+                      for i in range(0, len(body), chunk_size))
+    return b"POST /add HTTP/1.1\r\nHost: localhost\r\nTransfer-Encoding: chunked\r\n\r\n" + chunks + b"0\r\n\r\n"
+
+
+def split(stream, segment):
+    """Поток байт в том виде, в каком его отдает recv"""
+    return [stream[i:i + segment] for i in range(0, len(stream), segment)]
+
+
+def incremental_parse(segments):
+    parser = RequestParser()
+    count = 0
+    for segment in segments:
+        parser.feed(segment)
+        while parser.next_request() is not None:
+            count += 1
+    return count
+
+
+def rescan_parse(segments):
+    """Прежний RequestReader: поиск конца заголовков с начала буфера и удаление после каждого запроса"""
+    buffer = bytearray()
+    count = 0
+    for segment in segments:
+        buffer += segment
+        while True:
+            end = buffer.find(b'\r\n\r\n')
+            if end < 0:
+                break
+            lines = buffer[:end].decode('latin-1').split('\r\n')
+            parts = lines[0].split()
+            if len(parts) != 3 or not parts[2].startswith('HTTP/'):
+                raise ValueError(lines[0])
+            method, target, version = parts
+            headers = {}
+            for line in lines[1:]:
+                name, _, value = line.partition(':')
+                headers[name.strip().lower()] = value.strip()
+            length = int(headers.get('content-length', '0'))
+            if len(buffer) < end + 4 + length:
+                break
+            HTTPRequest(method, target, version, headers, bytes(buffer[end + 4:end + 4 + length]))
+            del buffer[:end + 4 + length]
+            count += 1
+    return count
+
+
+def best_rate(function, segments, expected, repeat):
+    """Лучшее время из repeat прогонов; None - разборщик не справился с потоком"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        count = function(segments)
+        elapsed = time.perf_counter() - started
+        if count != expected:
+            return None
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Скорость разбора HTTP запросов")
+    parser.add_argument('--requests', type=int, default=20_000, help="запросов GET в сценариях с GET")
+    parser.add_argument('--body', type=int, default=64 * 1024, help="размер тела POST, байт")
+    parser.add_argument('--repeat', type=int, default=3, help="прогонов, берется лучший")
+    args = parser.parse_args()
+
+    body = bytes(range(256)) * (args.body // 256)
+    posts = max(args.requests // 100, 1)
+    scenarios = (
+        ("GET по одному", [GET_REQUEST] * args.requests, args.requests, True),
+        ("GET конвейер 64", split(GET_REQUEST * args.requests, len(GET_REQUEST) * 64), args.requests, True),
+        ("GET по 16 байт", split(GET_REQUEST * (args.requests // 10), 16), args.requests // 10, True),
+        ("POST, сегменты 1460", split(post_request(body) * posts, 1460), posts, True),
+        ("POST chunked, 1460", split(chunked_request(body, 4096) * posts, 1460), posts, False),
+    )
+
+    print(f"{'сценарий':<22} {'разборщик':<14} {'запросов/с':>12} {'МБ/с':>9}")
+    for name, segments, expected, rescan_supported in scenarios:
+        size = sum(map(len, segments))
+        parsers = [("инкрементальный", incremental_parse)]
+        if rescan_supported:
+            parsers.append(("прежний", rescan_parse))
+        for parser_name, function in parsers:
+            elapsed = best_rate(function, segments, expected, args.repeat)
+            if elapsed is None:
+                print(f"{name:<22} {parser_name:<14} {'ошибка разбора':>22}")
+                continue
+            print(f"{name:<22} {parser_name:<14} {expected / elapsed:>12.0f} {size / elapsed / 1e6:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import asyncio
+import random
+import time
+
+from loadgen.stats import Recorder
+
+
+ERROR_BACKOFF = 0.05  # Пауза после ошибки, чтобы недоступный сервер не превращался в холостой цикл
+
+
+def parse_mix(mix, kinds):
+    """Разбирает строку "вид:вес,вид:вес" в списки видов и весов"""
+    names, weights = [], []
+    for item in mix.split(','):
+        name, _, weight = item.strip().partition(':')
+        if name not in kinds:
+            raise ValueError(f"неизвестный вид запроса {name!r}, доступны: {', '.join(kinds)}")
+        names.append(name)
+        weights.append(float(weight) if weight else 1.0)
+    return names, weights
+
+
+async def run_worker(target, worker_id, names, weights, deadline, timeout, think, recorder):
+    """Замкнутый цикл одного воркера: следующий запрос после ответа на предыдущий"""
+    session = None
+    connected = False
+    try:
+        while time.monotonic() < deadline:
+            kind = random.choices(names, weights)[0]
+            started = time.perf_counter()
+            try:
+                if not connected:
+                    session = await asyncio.wait_for(target.connect(worker_id), timeout)
+                    connected = True
+                    started = time.perf_counter()
+                status = await asyncio.wait_for(target.request(session, kind), timeout)
+            except (OSError, EOFError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError) as e:
+                recorder.error(kind, type(e).__name__)
+                if connected:
+                    await target.close(session)
+                    connected = False
+                await asyncio.sleep(ERROR_BACKOFF)
+                continue
+
+            if target.is_error(status):
+                recorder.error(kind, f"status {status}")
+            recorder.record(kind, status, time.perf_counter() - started)
+            if think:
+                await asyncio.sleep(think)
+    finally:
+        if connected:
+            await target.close(session)
+
+
+async def run_load(target, concurrency, duration, mix, timeout=5.0, think=0.0):
+    """Прогоняет нагрузку и возвращает словарь отчета"""
+    names, weights = parse_mix(mix, target.kinds)
+    recorder = Recorder()
+    started = time.monotonic()
+    deadline = started + duration
+
+    await asyncio.gather(*(
+        run_worker(target, worker_id, names, weights, deadline, timeout, think, recorder)
+        for worker_id in range(concurrency)
+    ))
+    elapsed = time.monotonic() - started
+
+    report = {
+        'target': target.name,
+        'host': target.host,
+        'port': target.port,
+        'concurrency': concurrency,
+        'duration_s': round(elapsed, 3),
+        'mix': dict(zip(names, weights)),
+    }
+    report.update(recorder.summary(elapsed))
+    report.update(target.extra_stats())
+    return report
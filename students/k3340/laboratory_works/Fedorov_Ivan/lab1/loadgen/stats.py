@@ -0,0 +1,81 @@
+from array import array
+
+
+def percentile(values, percent):
+    """Перцентиль по отсортированному списку"""
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+def latency_summary(latencies):
+    """Сводка задержек в миллисекундах"""
+    values = sorted(latencies)
+    if not values:
+        return {'p50': None, 'p95': None, 'p99': None, 'mean': None, 'max': None}
+    return {
+        'p50': round(percentile(values, 50) * 1000, 3),
+        'p95': round(percentile(values, 95) * 1000, 3),
+        'p99': round(percentile(values, 99) * 1000, 3),
+        'mean': round(sum(values) / len(values) * 1000, 3),
+        'max': round(values[-1] * 1000, 3),
+    }
+
+
+class KindStats:
+    """Результаты одного вида запросов"""
+
+    __slots__ = ('latencies', 'errors')
+
+    def __init__(self):
+        self.latencies = array('d')  # Секунды, по одной на успешный запрос
+        self.errors = 0
+
+
+class Recorder:
+    """Собирает задержки, статусы и ошибки всех воркеров одного прогона"""
+
+    def __init__(self):
+        self.kinds = {}  # {вид запроса: KindStats}
+        self.statuses = {}  # {статус ответа: количество}
+        self.error_types = {}  # {тип ошибки: количество}
+
+    def kind(self, name):
+        stats = self.kinds.get(name)
+        if stats is None:
+            stats = self.kinds[name] = KindStats()
+        return stats
+
+    def record(self, kind, status, latency):
+        self.kind(kind).latencies.append(latency)
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    def error(self, kind, error_type):
+        self.kind(kind).errors += 1
+        self.error_types[error_type] = self.error_types.get(error_type, 0) + 1
+
+    def summary(self, elapsed):
+        """Сводка прогона для JSON отчета"""
+        latencies = array('d')
+        errors = 0
+        by_kind = {}
+        for name, stats in sorted(self.kinds.items()):
+            latencies.extend(stats.latencies)
+            errors += stats.errors
+            by_kind[name] = {
+                'requests': len(stats.latencies),
+                'errors': stats.errors,
+                'latency_ms': latency_summary(stats.latencies),
+            }
+
+        total = len(latencies) + errors
+        return {
+            'requests': len(latencies),
+            'errors': errors,
+            'error_rate': round(errors / total, 6) if total else 0.0,
+            'throughput_rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+            'latency_ms': latency_summary(latencies),
+            'by_kind': by_kind,
+            'statuses': dict(sorted(self.statuses.items())),
+            'error_types': dict(sorted(self.error_types.items())),
+        }
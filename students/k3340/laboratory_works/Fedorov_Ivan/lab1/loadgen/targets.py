@@ -0,0 +1,300 @@
+import asyncio
+import os
+import random
+import re
+import sys
+import time
+from array import array
+from urllib.parse import urlencode
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'task4'))
+
+from chat_protocol import HELLO, PONG_FRAME, FramedCodec
+from loadgen.stats import latency_summary
+
+
+class Target:
+    """Сервер под нагрузкой.
+
+    Воркер открывает сессию через connect(), выполняет запросы
+    request(session, kind) и закрывает ее через close(). request
+    возвращает статус ответа; is_error решает, считать ли статус ошибкой.
+    """
+
+    name = None
+    default_port = 8080
+    default_mix = None  # Виды запросов и их веса: "вид:вес,вид:вес"
+    kinds = ()
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+
+    async def connect(self, worker_id):
+        return None
+
+    async def request(self, session, kind):
+        raise NotImplementedError
+
+    async def close(self, session):
+        pass
+
+    def is_error(self, status):
+        return False
+
+    def extra_stats(self):
+        """Дополнительные разделы отчета"""
+        return {}
+
+
+class UdpResponses(asyncio.DatagramProtocol):
+    """Принимает ответы UDP сервера для одного воркера"""
+
+    def __init__(self):
+        self.transport = None
+        self.waiter = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, address):
+        if self.waiter is not None and not self.waiter.done():
+            self.waiter.set_result(data)
+
+    def error_received(self, exc):
+        if self.waiter is not None and not self.waiter.done():
+            self.waiter.set_exception(exc)
+
+
+class UdpEchoTarget(Target):
+    """task1: UDP сервер, отвечающий на каждую датаграмму"""
+
+    name = 'udp'
+    default_mix = 'small:6,medium:3,large:1'
+    kinds = ('small', 'medium', 'large')
+    SIZES = {'small': 16, 'medium': 512, 'large': 1400}
+
+    async def connect(self, worker_id):
+        loop = asyncio.get_running_loop()
+        _, protocol = await loop.create_datagram_endpoint(UdpResponses, remote_addr=(self.host, self.port))
+        return protocol
+
+    async def request(self, session, kind):
+        session.waiter = asyncio.get_running_loop().create_future()
+        session.transport.sendto(os.urandom(self.SIZES[kind] // 2).hex().encode('ascii'))
+        await session.waiter
+        return 'ok'
+
+    async def close(self, session):
+        session.transport.close()
+
+
+class PythagorasTarget(Target):
+    """task2: TCP сервер гипотенузы, одно соединение на запрос"""
+
+    name = 'pythagoras'
+    default_mix = 'valid:8,invalid:1,negative:1'
+    kinds = ('valid', 'invalid', 'negative')
+
+    def payload(self, kind):
+        if kind == 'valid':
+            return f"{random.uniform(1, 1000):.3f},{random.uniform(1, 1000):.3f}"
+        if kind == 'negative':
+            return f"-{random.randint(1, 100)},{random.randint(1, 100)}"
+        return "три,четыре"
+
+    async def request(self, session, kind):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            writer.write(self.payload(kind).encode('utf-8'))
+            await writer.drain()
+            answer = (await reader.read()).decode('utf-8')
+        finally:
+            writer.close()
+        # Сервер отвечает текстом: результат или описание ошибки ввода
+        return 'ok' if answer.startswith('Гипотенуза') else 'rejected'
+
+
+class HttpConnection:
+    """Минимальный HTTP/1.1 клиент: переиспользует соединение, пока сервер его не закрывает"""
+
+    def __init__(self, host, port, keep_alive=True):
+        self.host = host
+        self.port = port
+        self.keep_alive = keep_alive  # False - Connection: close, новое соединение на каждый запрос
+        self.reader = None
+        self.writer = None
+
+    async def request(self, method, path, body=b'', content_type=None):
+        """Возвращает код ответа и тело"""
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+        head = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}",
+                "Connection: keep-alive" if self.keep_alive else "Connection: close"]
+        if body:
+            head.append(f"Content-Type: {content_type}")
+            head.append(f"Content-Length: {len(body)}")
+        self.writer.write(("\r\n".join(head) + "\r\n\r\n").encode('latin-1') + body)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("сервер закрыл соединение без ответа")
+        status = status_line.split()[1].decode('ascii')
+
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if 'content-length' in headers:
+            content = await self.reader.readexactly(int(headers['content-length']))
+        else:
+            content = await self.reader.read()
+            headers['connection'] = 'close'
+
+        if headers.get('connection', '').lower() == 'close':
+            self.close()
+        return status, content
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+
+class HttpTarget(Target):
+    """Общая часть HTTP серверов: сессия - соединение воркера"""
+
+    keep_alive = True
+
+    async def connect(self, worker_id):
+        return HttpConnection(self.host, self.port, self.keep_alive)
+
+    async def close(self, session):
+        session.close()
+
+    def is_error(self, status):
+        return status.startswith('5')
+
+
+class StaticHttpTarget(HttpTarget):
+    """task3: HTTP сервер статической страницы"""
+
+    name = 'http'
+    default_mix = 'index:9,missing:1'
+    kinds = ('index', 'missing')
+
+    async def request(self, session, kind):
+        path = '/' if kind == 'index' else f"/missing-{random.randint(1, 1000)}.html"
+        status, _ = await session.request('GET', path)
+        return status
+
+
+class GradesTarget(HttpTarget):
+    """task5: сервер учета оценок"""
+
+    name = 'grades'
+    default_mix = 'page:5,add:2,api:3'
+    kinds = ('page', 'add', 'api')
+    DISCIPLINES = ('Математика', 'Физика', 'Программирование', 'История', 'Английский язык')
+
+    async def request(self, session, kind):
+        if kind == 'add':
+            body = urlencode({'discipline': random.choice(self.DISCIPLINES), 'grade': random.randint(1, 5)})
+            status, _ = await session.request('POST', '/add', body.encode('utf-8'),
+                                              'application/x-www-form-urlencoded')
+        else:
+            status, _ = await session.request('GET', '/' if kind == 'page' else '/api/grades')
+        return status
+
+
+class ChatSession:
+    """Пользователь чата: соединение и задача чтения входящих сообщений"""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.codec = FramedCodec()
+        self.replies = asyncio.Queue()  # Ответы сервера на команды
+        self.reader_task = None
+
+
+class ChatTarget(Target):
+    """task4: чат; каждый воркер - отдельный пользователь.
+
+    message - сообщение в общую комнату, его задержка - время отправки,
+    а время доставки остальным участникам собирается в разделе deliveries.
+    command - команда /users, задержка - до ответа сервера.
+    """
+
+    name = 'chat'
+    default_port = 5050
+    default_mix = 'message:9,command:1'
+    kinds = ('message', 'command')
+    MARKER_RE = re.compile(r'#(\d+);')
+
+    def __init__(self, host, port):
+        super().__init__(host, port)
+        self.deliveries = array('d')
+        self.run_id = f"{os.getpid()}-{random.randint(0, 9999)}"
+
+    async def read_loop(self, session):
+        while True:
+            data = await session.reader.read(65536)
+            if not data:
+                session.replies.put_nowait(None)
+                return
+            now = time.time_ns()
+            for message in session.codec.feed(data):
+                if message.startswith('[Сервер]'):
+                    session.replies.put_nowait(message)
+                    continue
+                for sent_at in self.MARKER_RE.findall(message):
+                    self.deliveries.append((now - int(sent_at)) / 1e9)
+            if session.codec.pings:
+                session.writer.write(PONG_FRAME * session.codec.pings)
+                session.codec.pings = 0
+
+    async def connect(self, worker_id):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        session = ChatSession(reader, writer)
+        writer.write(HELLO + session.codec.frame(f"load{worker_id}-{self.run_id}".encode('utf-8')))
+        if await reader.readexactly(len(HELLO)) != HELLO:
+            writer.close()
+            raise ConnectionError("сервер не поддерживает протокол с кадрами")
+
+        session.reader_task = asyncio.create_task(self.read_loop(session))
+        welcome = await session.replies.get()
+        if welcome is None or 'Добро пожаловать' not in welcome:
+            await self.close(session)
+            raise ConnectionError(f"сервер не принял пользователя: {welcome}")
+        return session
+
+    async def request(self, session, kind):
+        if kind == 'message':
+            session.writer.write(session.codec.frame(f"load #{time.time_ns()};".encode('utf-8')))
+            await session.writer.drain()
+            return 'sent'
+
+        session.writer.write(session.codec.frame(b'/users'))
+        await session.writer.drain()
+        if await session.replies.get() is None:
+            raise ConnectionError("сервер закрыл соединение")
+        return 'ok'
+
+    async def close(self, session):
+        if session.reader_task is not None:
+            session.reader_task.cancel()
+        session.writer.close()
+
+    def extra_stats(self):
+        return {'deliveries': {'count': len(self.deliveries), 'latency_ms': latency_summary(self.deliveries)}}
+
+
+TARGETS = {target.name: target for target in (UdpEchoTarget, PythagorasTarget, StaticHttpTarget,
+                                               ChatTarget, GradesTarget)}
@@ -1,10 +1,20 @@
+import argparse
+import multiprocessing
+import os
+import signal
 import socket
+import struct
+import time
 
 
-def run_server():
+RESPONSE = 'Hello, client'.encode('utf-8')  # Ответ один для всех, кодируем его один раз
+STATS_INTERVAL = 5.0  # Как часто быстрый режим печатает сводку вместо строки на пакет
+
+
+def run_server(host='localhost', port=8080):
     try:
         sock_server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        sock_server.bind(('localhost', 8080))
+        sock_server.bind((host, port))
 
         print("Сервер запущен и ожидает сообщений...")
         print("Для остановки сервера нажмите Ctrl+C")
@@ -32,5 +42,173 @@ def run_server():
         sock_server.close()
 
 
+def receive_batch(sock_server, views, addresses):
+    """Ждет первую датаграмму и забирает все уже пришедшие, не больше len(views).
+
+    Данные пишутся в заранее выделенные буферы, возвращается число датаграмм.
+    """
+    count = 0
+    flags = 0  # Первый вызов ждет данных, следующие только забирают очередь сокета
+    while count < len(views):
+        try:
+            _, addresses[count] = sock_server.recvfrom_into(views[count], 0, flags)
+        except BlockingIOError:
+            break
+        except ConnectionRefusedError:
+            continue  # ICMP об отправленном ранее ответу закрытому порту клиента
+        count += 1
+        flags = socket.MSG_DONTWAIT
+    return count
+
+
+def reply_batch(sendto, addresses, count):
+    """Отвечает на всю пачку подряд"""
+    for i in range(count):
+        try:
+            sendto(RESPONSE, addresses[i])
+        except OSError:
+            pass  # Потерянный ответ UDP допускает, клиент повторит запрос
+
+
+def run_fast_server(host='localhost', port=8080, batch=64, buffer_size=2048, rcvbuf=4 * 1024 * 1024):
+    """Высокопроизводительный режим: пачки датаграмм за одно пробуждение, без журнала на каждый пакет"""
+    sock_server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    # Большой буфер приема переживает всплески, пока сервер отвечает на предыдущую пачку
+    sock_server.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, rcvbuf)
+
+    buffers = [bytearray(buffer_size) for _ in range(batch)]
+    views = [memoryview(buffer) for buffer in buffers]
+    addresses = [None] * batch
+
+    packets = 0
+    batches = 0
+    reported_packets = 0
+    last_report = time.monotonic()
+
+    try:
+        sock_server.bind((host, port))
+        print(f"Сервер запущен на {host}:{port} (быстрый режим, пачка до {batch} датаграмм)")
+        print("Для остановки сервера нажмите Ctrl+C")
+
+        sendto = sock_server.sendto  # Метод берем один раз, а не на каждый пакет
+        while True:
+            count = receive_batch(sock_server, views, addresses)
+            reply_batch(sendto, addresses, count)
+            packets += count
+            batches += 1
+
+            now = time.monotonic()
+            if now - last_report >= STATS_INTERVAL:
+                print(f"Принято {packets} датаграмм, {(packets - reported_packets) / (now - last_report):.0f} "
+                      f"пакетов/с, в среднем {packets / batches:.1f} за пробуждение")
+                reported_packets = packets
+                last_report = now
+
+    except KeyboardInterrupt:
+        print(f"\nСервер остановлен, обработано датаграмм: {packets}")
+    except Exception as e:
+        print(f"Ошибка сервера: {e}")
+    finally:
+        sock_server.close()
+
+
+def run_worker(worker_id, host, port, batch, buffer_size, counters, stop):
+    """Процесс пула: свой сокет на общем порту, счетчик пакетов в общей памяти"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Остановкой управляет супервизор
+
+    sock_server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock_server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock_server.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+    sock_server.bind((host, port))
+    # Ожидание первой датаграммы прерывается раз в полсекунды (BlockingIOError), чтобы заметить остановку.
+    # settimeout не подходит: с ним recv с MSG_DONTWAIT тоже ждал бы данных.
+    sock_server.setsockopt(socket.SOL_SOCKET, socket.SO_RCVTIMEO, struct.pack('ll', 0, 500_000))
+
+    views = [memoryview(bytearray(buffer_size)) for _ in range(batch)]
+    addresses = [None] * batch
+    sendto = sock_server.sendto
+    packets = 0
+
+    try:
+        while not stop.is_set():
+            count = receive_batch(sock_server, views, addresses)
+            reply_batch(sendto, addresses, count)
+            packets += count
+            counters[worker_id] = packets
+    finally:
+        sock_server.close()
+
+
+def run_worker_pool(host='localhost', port=8080, workers=os.cpu_count() or 1, batch=64, buffer_size=2048):
+    """N процессов на одном порту (SO_REUSEPORT): ядро раскладывает датаграммы по воркерам.
+
+    Супервизор раз в STATS_INTERVAL печатает сводку по счетчикам воркеров,
+    а по Ctrl+C или SIGTERM дает воркерам доработать текущую пачку.
+    """
+    counters = multiprocessing.Array('Q', workers, lock=False)  # Пишет только свой воркер
+    stop = multiprocessing.Event()
+    processes = [
+        multiprocessing.Process(target=run_worker, args=(i, host, port, batch, buffer_size, counters, stop),
+                                name=f"udp-worker-{i}")
+        for i in range(workers)
+    ]
+
+    for process in processes:
+        process.start()
+
+    def request_stop(signum, frame):
+        # Из обработчика сигнала Event трогать нельзя: сигнал может прийти,
+        # пока главный поток держит его внутреннюю блокировку
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, request_stop)  # Воркеры запущены раньше и обработчик не наследуют
+    print(f"Сервер запущен на {host}:{port}: воркеров {workers} (SO_REUSEPORT), пачка до {batch} датаграмм")
+    print("Для остановки сервера нажмите Ctrl+C")
+
+    reported = [0] * workers
+    last_report = time.monotonic()
+    try:
+        while any(process.is_alive() for process in processes):
+            time.sleep(STATS_INTERVAL)
+            now = time.monotonic()
+            current = list(counters)
+            rates = [(new - old) / (now - last_report) for new, old in zip(current, reported)]
+            per_worker = ', '.join(f"{rate:.0f}" for rate in rates)
+            print(f"Принято {sum(current)} датаграмм, {sum(rates):.0f} пакетов/с (по воркерам: {per_worker})")
+            reported, last_report = current, now
+    except KeyboardInterrupt:
+        print("\nОстановка воркеров...")
+
+    # Повторный сигнал (например, Ctrl+C всей группе процессов) не должен прервать ожидание воркеров
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    stop.set()
+    for process in processes:
+        process.join(timeout=5)
+        if process.is_alive():
+            process.terminate()
+    print(f"Сервер остановлен, обработано датаграмм: {sum(counters)} "
+          f"(по воркерам: {', '.join(str(count) for count in counters)})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="UDP сервер")
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--fast', action='store_true',
+                        help="пакетный прием в готовые буферы, без вывода на каждый пакет")
+    parser.add_argument('--batch', type=int, default=64, help="сколько датаграмм забирать за одно пробуждение")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="число процессов на одном порту (SO_REUSEPORT), больше 1 - пакетный режим в каждом")
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        run_worker_pool(args.host, args.port, args.workers, args.batch)
+    elif args.fast:
+        run_fast_server(args.host, args.port, args.batch)
+    else:
+        run_server(args.host, args.port)
+
+
 if __name__ == "__main__":
-    run_server()
\ No newline at end of file
+    main()
@@ -0,0 +1,101 @@
+import argparse
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import time
+
+
+def start_server(port, fast, batch, workers=1):
+    """Запускает сервер отдельным процессом; вывод сервера отбрасывается"""
+    command = [sys.executable, 'server.py', '--port', str(port)]
+    if workers > 1:
+        command += ['--workers', str(workers), '--batch', str(batch)]
+    elif fast:
+        command += ['--fast', '--batch', str(batch)]
+    process = subprocess.Popen(command, cwd=os.path.dirname(os.path.abspath(__file__)),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    time.sleep(0.5)
+    return process
+
+
+def blast(port, duration, window, payload):
+    """Держит window запросов в полете и считает ответы в секунду"""
+    client = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    client.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+    client.connect(('localhost', port))
+    client.settimeout(0.2)
+    buffer = bytearray(2048)
+
+    sent = received = 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        while sent - received < window:
+            client.send(payload)
+            sent += 1
+        try:
+            client.recv_into(buffer)
+            received += 1
+        except socket.timeout:
+            received = sent  # Потерянные датаграммы не ждем, окно открывается заново
+        except ConnectionRefusedError:
+            pass
+    client.close()
+    return received / duration
+
+
+def blast_parallel(port, duration, window, payload, clients):
+    """Нагрузка из нескольких процессов: у каждого свой сокет, а значит и свой исходный порт.
+
+    SO_REUSEPORT выбирает воркера по хешу адресов, поэтому один клиентский сокет
+    всегда попадал бы в один и тот же процесс сервера.
+    """
+    with multiprocessing.Pool(clients) as pool:
+        rates = pool.starmap(blast, [(port, duration, window, payload)] * clients)
+    return sum(rates)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пакетов в секунду: обычный цикл против быстрого режима")
+    parser.add_argument('--duration', type=float, default=5, help="длительность прогона, с")
+    parser.add_argument('--window', type=int, default=64, help="запросов в полете")
+    parser.add_argument('--size', type=int, default=64, help="размер датаграммы, байт")
+    parser.add_argument('--batch', type=int, default=64, help="размер пачки быстрого режима")
+    parser.add_argument('--port', type=int, default=9180)
+    parser.add_argument('--workers', default='',
+                        help="через запятую: числа воркеров SO_REUSEPORT для таблицы масштабирования, например 1,2,4")
+    parser.add_argument('--clients', type=int, default=os.cpu_count() or 1,
+                        help="процессов-клиентов в таблице масштабирования")
+    args = parser.parse_args()
+
+    payload = b'x' * args.size
+    print(f"Ядер: {os.cpu_count()}, датаграмма {args.size} байт, в полете {args.window}")
+    print(f"{'режим':<28} {'ответов/с':>12}")
+    for name, fast in (("recvfrom + печать", False), (f"пачки по {args.batch}", True)):
+        server = start_server(args.port, fast, args.batch)
+        try:
+            rate = blast(args.port, args.duration, args.window, payload)
+        finally:
+            server.terminate()
+            server.wait()
+        print(f"{name:<28} {rate:>12.0f}")
+
+    if not args.workers:
+        return
+    print(f"\nМасштабирование по воркерам, клиентских процессов: {args.clients}")
+    print(f"{'воркеров':<28} {'ответов/с':>12} {'ускорение':>10}")
+    baseline = None
+    for workers in (int(value) for value in args.workers.split(',')):
+        server = start_server(args.port, True, args.batch, workers)
+        try:
+            rate = blast_parallel(args.port, args.duration, args.window, payload, args.clients)
+        finally:
+            server.terminate()
+            server.wait()
+        baseline = baseline or rate
+        print(f"{workers:<28} {rate:>12.0f} {rate / baseline:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
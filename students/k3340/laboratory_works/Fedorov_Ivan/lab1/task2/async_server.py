@@ -0,0 +1,184 @@
+import argparse
+import asyncio
+import os
+import socket
+from concurrent.futures import ProcessPoolExecutor
+
+from operations import OPERATIONS, describe
+
+
+HELLO_LINE = 'PYTHAGORAS/2'  # Приветствие клиентов из client.py, здесь ответа не требует
+MAX_LINE = 64 * 1024
+MAX_IN_FLIGHT = 64  # Сколько запросов одного соединения может выполняться одновременно
+HEAVY_PER_WORKER = 2  # Сколько тяжелых операций всех клиентов ждет или выполняется на процесс пула
+
+
+class CalculationServer:
+    """Асинхронный сервер вычислений.
+
+    Запрос - строка 'операция x,y,...', ответ - одна строка в том же порядке.
+    Операции берутся из таблицы OPERATIONS; тяжелые выполняются в пуле
+    процессов, поэтому долгий расчет не задерживает других клиентов.
+    """
+
+    def __init__(self, host='localhost', port=8080, workers=os.cpu_count() or 1):
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.pool = None
+        self.server = None
+        self.heavy_slots = None  # Семафор на тяжелые операции всего сервера
+
+        self.requests = 0
+        self.offloaded = 0
+
+    def resolve(self, line):
+        """Находит операцию и аргументы; строка без имени операции 'a,b' считается гипотенузой"""
+        name, _, arguments = line.partition(' ')
+        if name not in OPERATIONS and ',' in name:
+            name, arguments = 'hypotenuse', line
+        op = OPERATIONS.get(name)
+        if op is None:
+            raise ValueError(f"Ошибка: неизвестная операция '{name}', список операций - help")
+        return op, op.parse(arguments)
+
+    async def execute(self, op, arguments):
+        """Выполняет тяжелую операцию в пуле процессов.
+
+        Очередь пула ограничена семафором: остальные операции ждут здесь и,
+        если клиент отключился, отменяются, не дойдя до пула.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            async with self.heavy_slots:
+                return await loop.run_in_executor(self.pool, op.function, *arguments)
+        except ValueError as e:
+            return str(e)
+        except Exception as e:
+            return f"Ошибка при вычислении: {e}"
+
+    def dispatch(self, line):
+        """Возвращает ответ строкой или future, если операция ушла в пул"""
+        if line == 'help':
+            return "Операции: " + "; ".join(describe())
+        try:
+            op, arguments = self.resolve(line)
+            if op.heavy:
+                self.offloaded += 1
+                return asyncio.ensure_future(self.execute(op, arguments))
+            return op.function(*arguments)
+        except ValueError as e:
+            return str(e)
+        except Exception as e:
+            return f"Ошибка при вычислении: {e}"
+
+    async def send_results(self, results, writer):
+        """Отправляет ответы строго в порядке запросов"""
+        while True:
+            result = await results.get()
+            if result is None:
+                break
+            if not isinstance(result, str):
+                result = await result
+            writer.write(result.encode('utf-8') + b'\n')
+            if writer.is_closing():
+                # Запись в отключившегося клиента не бросает исключение, а закрывает транспорт
+                raise ConnectionResetError("клиент отключился, не дождавшись ответов")
+            if results.empty():
+                await writer.drain()  # Пока в очереди есть готовые ответы, копим их в одну запись
+
+    async def put_result(self, results, result, sender):
+        """Кладет ответ в очередь; False - отправитель завершился и очередь больше никто не разберет"""
+        if not results.full():
+            results.put_nowait(result)
+            return True
+        # Очередь полна: ждем места, но не дольше, чем живет отправитель (он падает, если клиент отключился)
+        put = asyncio.ensure_future(results.put(result))
+        await asyncio.wait({put, sender}, return_when=asyncio.FIRST_COMPLETED)
+        if put.done():
+            return True
+        put.cancel()
+        if isinstance(result, asyncio.Future):
+            result.cancel()
+        return False
+
+    async def handle_client(self, reader, writer):
+        """Читает запросы клиента, не дожидаясь ответов на предыдущие"""
+        address = writer.get_extra_info('peername')
+        results = asyncio.Queue(MAX_IN_FLIGHT)  # Переполнение останавливает чтение новых запросов
+        sender = asyncio.create_task(self.send_results(results, writer))
+        try:
+            while not sender.done():
+                line = await reader.readline()
+                if not line:
+                    break
+                line = line.decode('utf-8', errors='replace').strip()
+                if not line or line == HELLO_LINE:
+                    continue
+                self.requests += 1
+                if not await self.put_result(results, self.dispatch(line), sender):
+                    break
+        except (ValueError, ConnectionError) as e:
+            # ValueError - строка длиннее MAX_LINE
+            print(f"Клиент {address}: {e}")
+        finally:
+            if not sender.done():
+                await self.put_result(results, None, sender)
+            try:
+                await sender
+            except ConnectionError:
+                pass
+            # Ответы, которые уже некому отправить, не должны занимать пул
+            while not results.empty():
+                result = results.get_nowait()
+                if isinstance(result, asyncio.Future):
+                    result.cancel()
+            writer.close()
+
+    async def serve(self):
+        """Открывает порт и обслуживает клиентов до остановки"""
+        self.heavy_slots = asyncio.Semaphore(self.workers * HEAVY_PER_WORKER)
+        self.server = await asyncio.start_server(
+            self.handle_client, self.host, self.port,
+            reuse_address=True, backlog=socket.SOMAXCONN, limit=MAX_LINE
+        )
+
+        print("=" * 50)
+        print("СЕРВЕР ВЫЧИСЛЕНИЙ (asyncio)")
+        print("=" * 50)
+        print(f"Сервер запущен на {self.host}:{self.port}, процессов для тяжелых операций: {self.workers}")
+        for description in describe():
+            print(f"  {description}")
+        print("Для остановки сервера нажмите Ctrl+C")
+        print("=" * 50)
+
+        async with self.server:
+            await self.server.serve_forever()
+
+    def start(self):
+        """Запускает сервер"""
+        self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        try:
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            print("\nОстановка сервера...")
+        except Exception as e:
+            print(f"Ошибка сервера: {e}")
+        finally:
+            self.pool.shutdown(cancel_futures=True)
+            print(f"Сервер остановлен, запросов: {self.requests}, из них в пуле процессов: {self.offloaded}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Асинхронный TCP сервер вычислений")
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="размер пула процессов для тяжелых операций")
+    args = parser.parse_args()
+
+    CalculationServer(args.host, args.port, args.workers).start()
+
+
+if __name__ == "__main__":
+    main()
@@ -27,37 +27,102 @@ def get_user_input():
         return user_input
 
 
-def connect_to_server(data):
-    """Подключается к серверу и отправляет данные"""
-    try:
-        # Создаем TCP сокет
-        client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        client_socket.settimeout(10)  # Таймаут 10 секунд
-
-        # Подключаемся к серверу
-        client_socket.connect(('localhost', 8080))
-
-        # Отправляем данные
-        client_socket.send(data.encode('utf-8'))
-
-        # Получаем ответ
-        response = client_socket.recv(1024).decode('utf-8')
-
-        return response
-
-    except socket.timeout:
-        return "Ошибка: превышено время ожидания ответа от сервера"
-    except ConnectionRefusedError:
-        return "Ошибка: не удалось подключиться к серверу. Убедитесь, что сервер запущен."
-    except Exception as e:
-        return f"Ошибка соединения: {e}"
-    finally:
-        client_socket.close()
+HELLO = b'PYTHAGORAS/2\n'  # Просит сервер не закрывать соединение после ответа
+
+
+class ServerConnection:
+    """Постоянное соединение с сервером: все запросы сеанса идут по одному сокету"""
+
+    def __init__(self, host='localhost', port=8080, timeout=10):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.socket = None
+        self.reader = None
+
+    def connect(self):
+        self.socket = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self.socket.sendall(HELLO)
+        self.reader = self.socket.makefile('rb')
+
+    def readline(self):
+        line = self.reader.readline()
+        if not line:
+            raise ConnectionError("сервер закрыл соединение")
+        return line.decode('utf-8').rstrip('\n')
+
+    def request(self, data):
+        """Отправляет один запрос 'a,b' и возвращает ответ сервера"""
+        if self.socket is None:
+            self.connect()
+        self.socket.sendall(data.encode('utf-8') + b'\n')
+        return self.readline()
+
+    def request_many(self, requests):
+        """Отправляет запросы подряд, не дожидаясь ответов, и возвращает ответы по порядку"""
+        if self.socket is None:
+            self.connect()
+        self.socket.sendall(''.join(f"{data}\n" for data in requests).encode('utf-8'))
+        return [self.readline() for _ in requests]
+
+    def bulk(self, pairs):
+        """Считает много пар одним пакетом; возвращает строки результатов"""
+        if self.socket is None:
+            self.connect()
+        body = ''.join(f"{a},{b}\n" for a, b in pairs)
+        self.socket.sendall(f"BULK {len(pairs)}\n{body}".encode('utf-8'))
+        header = self.readline()
+        if header != f"BULK {len(pairs)}":
+            raise ConnectionError(f"неожиданный ответ сервера: {header}")
+        return [self.readline() for _ in pairs]
+
+    def bulk_packed(self, command, size_field, payload):
+        """Отправляет двоичный или CSV пакет; возвращает упакованные гипотенузы и число неверных пар"""
+        if self.socket is None:
+            self.connect()
+        self.socket.sendall(f"{command} {size_field}\n".encode('ascii') + payload)
+        header = self.readline().split()
+        if len(header) != 3 or header[0] != 'RESULT':
+            raise ValueError(' '.join(header))
+        count, invalid = int(header[1]), int(header[2])
+        return self.reader.read(count * 8), invalid
+
+    def bulk_binary(self, legs):
+        """legs - упакованные float64 пары катетов (a0, b0, a1, b1, ...)"""
+        return self.bulk_packed('BULKBIN', len(legs) // 16, legs)
+
+    def bulk_csv(self, data):
+        """data - CSV в байтах, строки 'a,b'"""
+        return self.bulk_packed('BULKCSV', len(data), data)
+
+    def close(self):
+        if self.socket is not None:
+            self.reader.close()
+            self.socket.close()
+            self.socket = self.reader = None
+
+
+def connect_to_server(connection, data):
+    """Отправляет данные по постоянному соединению; при обрыве переподключается один раз"""
+    for attempt in range(2):
+        try:
+            return connection.request(data)
+
+        except socket.timeout:
+            connection.close()
+            return "Ошибка: превышено время ожидания ответа от сервера"
+        except ConnectionRefusedError:
+            return "Ошибка: не удалось подключиться к серверу. Убедитесь, что сервер запущен."
+        except OSError as e:
+            connection.close()  # Сервер мог закрыть простаивавшее соединение
+            if attempt:
+                return f"Ошибка соединения: {e}"
 
 
 def main():
     """Основная функция клиента"""
     print("Клиент теоремы Пифагора запущен")
+    connection = ServerConnection()
 
     while True:
         show_menu()
@@ -65,13 +130,14 @@ def main():
 
         if user_input is None:
             print("Завершение работы...")
+            connection.close()
             break
 
         if not user_input:
             continue
 
         print("Отправка данных на сервер...")
-        result = connect_to_server(user_input)
+        result = connect_to_server(connection, user_input)
 
         print("\n" + "=" * 50)
         print("РЕЗУЛЬТАТ:")
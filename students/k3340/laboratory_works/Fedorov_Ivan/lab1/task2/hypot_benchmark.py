@@ -0,0 +1,63 @@
+import argparse
+import random
+import time
+from array import array
+
+import hypot_engine
+from server import handle_bulk
+
+
+def best_time(function, repeat):
+    """Лучшее время из repeat запусков"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def make_input(pairs):
+    """Одни и те же катеты в трех видах: строки, CSV и упакованные float64"""
+    legs = array('d', (random.uniform(1, 1000) for _ in range(2 * pairs)))
+    lines = [f"{legs[i]!r},{legs[i + 1]!r}" for i in range(0, len(legs), 2)]
+    return lines, ('\n'.join(lines) + '\n').encode('ascii'), legs.tobytes()
+
+
+def scalar_rate(lines, scalar_max, repeat):
+    """Пар в секунду построчного пути; больше scalar_max строк меряется на выборке"""
+    sample = lines[:scalar_max]
+    return len(sample) / best_time(lambda: handle_bulk(sample), repeat)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пар в секунду: построчный расчет против векторного пакета")
+    parser.add_argument('--sizes', default='1000,10000,100000,1000000,10000000',
+                        help="через запятую: сколько пар считать")
+    parser.add_argument('--scalar-max', type=int, default=1_000_000,
+                        help="больше этого числа построчный путь меряется на выборке такого размера")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--no-numpy', action='store_true', help="мерить запасной путь на array и math.hypot")
+    args = parser.parse_args()
+
+    if args.no_numpy:
+        hypot_engine.numpy = None
+    backend = "NumPy" if hypot_engine.numpy is not None else "array + math.hypot"
+    print(f"Векторный путь: {backend}; * - построчный путь измерен на {args.scalar_max} парах")
+    print(f"{'пар':>10} {'построчно':>14} {'CSV':>14} {'float64':>14} {'ускорение':>10}")
+
+    for pairs in (int(value) for value in args.sizes.split(',')):
+        lines, csv, packed = make_input(pairs)
+        scalar = scalar_rate(lines, args.scalar_max, args.repeat)
+        del lines  # Строки больше не нужны, а на десятках миллионов пар занимают гигабайты
+        from_csv = pairs / best_time(lambda: hypot_engine.hypot_legs(hypot_engine.legs_from_csv(csv)), args.repeat)
+        binary = pairs / best_time(lambda: hypot_engine.hypot_legs(hypot_engine.legs_from_binary(packed)),
+                                   args.repeat)
+
+        mark = '*' if pairs > args.scalar_max else ' '
+        print(f"{pairs:>10} {scalar:>13.0f}{mark} {from_csv:>14.0f} {binary:>14.0f} {binary / scalar:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
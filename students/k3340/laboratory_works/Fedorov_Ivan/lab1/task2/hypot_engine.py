@@ -0,0 +1,83 @@
+import math
+import sys
+from array import array
+
+try:
+    import numpy
+except ImportError:  # Без NumPy работает тот же API на array и math.hypot, только медленнее
+    numpy = None
+
+
+# Двоичный формат: пары катетов подряд как float64 little-endian (a0, b0, a1, b1, ...),
+# результат - гипотенузы в том же формате; неверная пара дает NaN
+LEG_SIZE = 8
+PAIR_SIZE = 2 * LEG_SIZE
+
+
+class BulkInputError(ValueError):
+    """Пакет катетов не удалось разобрать"""
+
+
+def legs_from_binary(data):
+    """Катеты из упакованного буфера float64"""
+    if len(data) % PAIR_SIZE:
+        raise BulkInputError(f"Ошибка: размер пакета должен быть кратен {PAIR_SIZE} байтам")
+    if numpy is not None:
+        return numpy.frombuffer(data, dtype='<f8')
+    legs = array('d')
+    legs.frombytes(data)
+    if sys.byteorder == 'big':
+        legs.byteswap()
+    return legs
+
+
+def legs_from_csv(data):
+    """Катеты из CSV: строки 'a,b', числа идут парами в порядке строк"""
+    tokens = data.replace(b',', b' ').split()
+    if len(tokens) % 2:
+        raise BulkInputError("Ошибка: в CSV нечетное число катетов")
+    try:
+        if numpy is not None:
+            return numpy.array(tokens, dtype=numpy.float64)
+        return array('d', map(float, tokens))
+    except ValueError:
+        raise BulkInputError("Ошибка: в CSV есть значения, которые не являются числами") from None
+
+
+def _checked_hypot(a, b):
+    # Сравнение с NaN ложно, поэтому NaN тоже попадает в неверные пары
+    if 0 < a < math.inf and 0 < b < math.inf:
+        return math.hypot(a, b)
+    return math.nan
+
+
+def hypot_legs(legs):
+    """Гипотенузы для пар катетов.
+
+    Возвращает упакованный буфер float64 и число неверных пар
+    (катет не положительный или не конечный), для них в буфере NaN.
+    """
+    if numpy is not None:
+        a = legs[0::2]
+        b = legs[1::2]
+        valid = (a > 0) & (b > 0) & (a < numpy.inf) & (b < numpy.inf)
+        result = numpy.hypot(a, b)
+        invalid = len(result) - int(numpy.count_nonzero(valid))
+        if invalid:
+            result[~valid] = numpy.nan
+        return result.astype('<f8', copy=False).tobytes(), invalid
+
+    result = array('d', map(_checked_hypot, legs[0::2], legs[1::2]))
+    invalid = sum(1 for c in result if c != c)
+    if sys.byteorder == 'big':
+        result.byteswap()
+    return result.tobytes(), invalid
+
+
+def results_from_binary(data):
+    """Разбирает упакованный ответ обратно в array('d') (для клиентов и проверок)"""
+    result = array('d')
+    result.frombytes(data)
+    if sys.byteorder == 'big':
+        result.byteswap()
+    return result
@@ -0,0 +1,122 @@
+import math
+
+
+class Operation:
+    """Операция калькулятора: функция, число аргументов и описание для справки"""
+
+    __slots__ = ('name', 'function', 'arguments', 'heavy', 'description')
+
+    def __init__(self, name, function, arguments, heavy, description):
+        self.name = name
+        self.function = function
+        self.arguments = arguments  # Имена аргументов через запятую, как их вводит пользователь
+        self.heavy = heavy  # Тяжелые операции выполняются в пуле процессов, а не в цикле событий
+        self.description = description
+
+    def parse(self, text):
+        """Разбирает аргументы 'x,y,...' в числа; при ошибке бросает ValueError с текстом для клиента"""
+        expected = self.arguments.split(',')
+        parts = text.split(',') if text.strip() else []
+        if len(parts) != len(expected):
+            raise ValueError(f"Ошибка: {self.name} ожидает аргументы {self.arguments}")
+        try:
+            return [float(part) for part in parts]
+        except ValueError:
+            raise ValueError("Ошибка: введите числа в правильном формате") from None
+
+
+OPERATIONS = {}
+
+
+def operation(name, arguments, description, heavy=False):
+    """Регистрирует функцию в таблице операций.
+
+    Функция остается доступной по имени модуля, поэтому ее можно
+    передать в пул процессов.
+    """
+    def register(function):
+        OPERATIONS[name] = Operation(name, function, arguments, heavy, description)
+        return function
+    return register
+
+
+@operation('hypotenuse', 'a,b', "гипотенуза по двум катетам")
+def hypotenuse(a, b):
+    if a <= 0 or b <= 0:
+        raise ValueError("Ошибка: катеты должны быть положительными числами")
+    return f"Гипотенуза треугольника с катетами {a} и {b} = {math.hypot(a, b):.2f}"
+
+
+@operation('quadratic', 'a,b,c', "корни уравнения ax^2 + bx + c = 0")
+def quadratic(a, b, c):
+    if a == 0:
+        if b == 0:
+            raise ValueError("Ошибка: a и b не могут быть равны нулю одновременно")
+        return f"Уравнение линейное, корень x = {-c / b:.4g}"
+
+    discriminant = b * b - 4 * a * c
+    if discriminant < 0:
+        return f"Действительных корней нет (дискриминант {discriminant:.4g})"
+    if discriminant == 0:
+        return f"Один корень x = {-b / (2 * a):.4g}"
+    root = math.sqrt(discriminant)
+    return f"Корни x1 = {(-b + root) / (2 * a):.4g}, x2 = {(-b - root) / (2 * a):.4g}"
+
+
+@operation('trapezoid', 'a,b,h', "площадь трапеции по основаниям и высоте")
+def trapezoid(a, b, h):
+    if a <= 0 or b <= 0 or h <= 0:
+        raise ValueError("Ошибка: основания и высота должны быть положительными числами")
+    return f"Площадь трапеции = {(a + b) / 2 * h:.2f}"
+
+
+@operation('parallelogram', 'a,h', "площадь параллелограмма по стороне и высоте")
+def parallelogram(a, h):
+    if a <= 0 or h <= 0:
+        raise ValueError("Ошибка: сторона и высота должны быть положительными числами")
+    return f"Площадь параллелограмма = {a * h:.2f}"
+
+
+MAX_PRIMES_LIMIT = 20_000_000  # Решето - байт на число, 20 МБ на запрос
+
+
+@operation('primes', 'n', "сколько простых чисел не больше n (решето Эратосфена)", heavy=True)
+def count_primes(n):
+    n = int(n)
+    if not 0 <= n <= MAX_PRIMES_LIMIT:
+        raise ValueError(f"Ошибка: n должно быть от 0 до {MAX_PRIMES_LIMIT}")
+    if n < 2:
+        return f"Простых чисел не больше {n}: 0"
+
+    sieve = bytearray([1]) * (n + 1)
+    sieve[0] = sieve[1] = 0
+    for i in range(2, math.isqrt(n) + 1):
+        if sieve[i]:
+            sieve[i * i::i] = bytes(len(range(i * i, n + 1, i)))
+    return f"Простых чисел не больше {n}: {sieve.count(1)}"
+
+
+MAX_INTEGRAL_STEPS = 10_000_000  # Около секунды работы процесса пула
+
+
+@operation('integral', 'a,b,steps', "интеграл sin(x) на [a, b] методом трапеций", heavy=True)
+def integral(a, b, steps):
+    steps = int(steps)
+    if not 1 <= steps <= MAX_INTEGRAL_STEPS:
+        raise ValueError(f"Ошибка: число шагов должно быть от 1 до {MAX_INTEGRAL_STEPS}")
+
+    h = (b - a) / steps
+    total = (math.sin(a) + math.sin(b)) / 2
+    sin = math.sin
+    for i in range(1, steps):
+        total += sin(a + i * h)
+    return f"Интеграл sin(x) на [{a}, {b}] = {total * h:.6f}"
+
+
+def describe():
+    """Справка по всем операциям, по строке на операцию"""
+    lines = []
+    for op in OPERATIONS.values():
+        mark = " (в пуле процессов)" if op.heavy else ""
+        lines.append(f"{op.name} {op.arguments} - {op.description}{mark}")
+    return lines
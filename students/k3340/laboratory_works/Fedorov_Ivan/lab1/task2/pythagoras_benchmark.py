@@ -0,0 +1,121 @@
+import argparse
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+from client import ServerConnection
+
+
+def start_server(port):
+    """Запускает сервер отдельным процессом; вывод сервера отбрасывается"""
+    process = subprocess.Popen([sys.executable, 'server.py', '--port', str(port)],
+                               cwd=os.path.dirname(os.path.abspath(__file__)),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    time.sleep(0.5)
+    return process
+
+
+def random_pair():
+    return f"{random.uniform(1, 1000):.3f}", f"{random.uniform(1, 1000):.3f}"
+
+
+def run_legacy(port, duration, batch):
+    """Старый протокол: новое соединение на каждый запрос"""
+    done = 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        with socket.create_connection(('localhost', port)) as sock:
+            sock.sendall(','.join(random_pair()).encode('utf-8'))
+            while sock.recv(1024):
+                pass
+        done += 1
+    return done
+
+
+def run_keepalive(port, duration, batch):
+    """Постоянное соединение: запрос, ответ, следующий запрос"""
+    connection = ServerConnection(port=port)
+    done = 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        connection.request(','.join(random_pair()))
+        done += 1
+    connection.close()
+    return done
+
+
+def run_pipelined(port, duration, batch):
+    """Постоянное соединение: batch запросов отправляются подряд"""
+    connection = ServerConnection(port=port)
+    requests = [','.join(random_pair()) for _ in range(batch)]
+    done = 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        connection.request_many(requests)
+        done += batch
+    connection.close()
+    return done
+
+
+def run_bulk(port, duration, batch):
+    """Пакетный режим: batch пар одной командой BULK"""
+    connection = ServerConnection(port=port)
+    pairs = [random_pair() for _ in range(batch)]
+    done = 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        connection.bulk(pairs)
+        done += batch
+    connection.close()
+    return done
+
+
+def measure(mode, port, duration, batch, clients):
+    """Запускает clients клиентов одновременно и возвращает расчетов в секунду"""
+    results = [0] * clients
+
+    def client(index):
+        results[index] = mode(port, duration, batch)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(results) / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Расчетов в секунду: соединение на запрос, постоянное соединение, пакеты")
+    parser.add_argument('--duration', type=float, default=3, help="длительность прогона, с")
+    parser.add_argument('--clients', type=int, default=4, help="одновременных клиентов")
+    parser.add_argument('--batch', type=int, default=1000, help="запросов в конвейере и пар в пакете BULK")
+    parser.add_argument('--port', type=int, default=9280)
+    args = parser.parse_args()
+
+    modes = (
+        ("соединение на запрос", run_legacy),
+        ("постоянное соединение", run_keepalive),
+        (f"конвейер по {args.batch}", run_pipelined),
+        (f"BULK по {args.batch}", run_bulk),
+    )
+
+    print(f"Клиентов: {args.clients}, длительность {args.duration} с")
+    print(f"{'режим':<28} {'расчетов/с':>12}")
+    server = start_server(args.port)
+    try:
+        for name, mode in modes:
+            rate = measure(mode, args.port, args.duration, args.batch, args.clients)
+            print(f"{name:<28} {rate:>12.0f}")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,65 +1,270 @@
+import argparse
 import socket
 import math
+import threading
 
+from hypot_engine import LEG_SIZE, PAIR_SIZE, BulkInputError, hypot_legs, legs_from_binary, legs_from_csv
 
-def handle_pythagoras(data):
-    """Обработка теоремы Пифагора"""
-    try:
-        # Разбираем данные: катет1, катет2
-        parts = data.split(',')
-        if len(parts) != 2:
-            return "Ошибка: необходимо ввести два катета через запятую"
 
+# Приветствие постоянного соединения. Старые клиенты сразу присылают "a,b"
+# без перевода строки, получают один ответ и соединение закрывается.
+HELLO = b'PYTHAGORAS/2\n'
+
+BULK_COMMAND = 'BULK'  # "BULK n" и следом n строк "a,b"; ответ - "BULK n" и n результатов
+# "BULKBIN n" и следом n пар float64, "BULKCSV size" и следом size байт CSV;
+# ответ на оба - "RESULT n invalid" и n гипотенуз float64 (см. hypot_engine)
+BULKBIN_COMMAND = 'BULKBIN'
+BULKCSV_COMMAND = 'BULKCSV'
+MAX_BULK_PAIRS = 1_000_000
+MAX_CSV_SIZE = 64 * 1024 * 1024
+MAX_LINE = 64 * 1024
+RECV_SIZE = 64 * 1024
+IDLE_TIMEOUT = 60  # Сколько постоянное соединение может молчать, секунд
+
+
+def parse_legs(data):
+    """Разбирает строку 'a,b' в пару катетов.
+
+    При неверном вводе бросает ValueError с текстом ошибки для клиента.
+    """
+    parts = data.split(',')
+    if len(parts) != 2:
+        raise ValueError("Ошибка: необходимо ввести два катета через запятую")
+
+    try:
         a = float(parts[0])
         b = float(parts[1])
+    except ValueError:
+        raise ValueError("Ошибка: введите числа в правильном формате") from None
+
+    if a <= 0 or b <= 0:
+        raise ValueError("Ошибка: катеты должны быть положительными числами")
+    return a, b
 
-        if a <= 0 or b <= 0:
-            return "Ошибка: катеты должны быть положительными числами"
+
+def handle_pythagoras(data):
+    """Обработка теоремы Пифагора"""
+    try:
+        a, b = parse_legs(data)
 
         # Вычисляем гипотенузу
         c = math.sqrt(a ** 2 + b ** 2)
 
         return f"Гипотенуза треугольника с катетами {a} и {b} = {c:.2f}"
 
-    except ValueError:
-        return "Ошибка: введите числа в правильном формате"
+    except ValueError as e:
+        return str(e)
     except Exception as e:
         return f"Ошибка при вычислении: {e}"
 
 
-def start_server():
+def handle_bulk(lines):
+    """Пакетный расчет: на каждую строку 'a,b' - гипотенуза числом или текст ошибки"""
+    results = []
+    for line in lines:
+        try:
+            a, b = parse_legs(line)
+            results.append(repr(math.hypot(a, b)))
+        except ValueError as e:
+            results.append(str(e))
+    return results
+
+
+class LineReader:
+    """Буферизованное чтение строк из сокета.
+
+    Данные читаются крупными порциями, поэтому несколько присланных подряд
+    запросов разбираются из одного recv.
+    """
+
+    def __init__(self, sock, data=b''):
+        self.sock = sock
+        self.buffer = bytearray(data)
+        self.offset = 0
+
+    def has_line(self):
+        """Есть ли в буфере еще одна полная строка"""
+        return self.buffer.find(b'\n', self.offset) >= 0
+
+    def readline(self):
+        """Возвращает строку без перевода строки; None - клиент закрыл соединение"""
+        while True:
+            end = self.buffer.find(b'\n', self.offset)
+            if end >= 0:
+                line = self.buffer[self.offset:end].decode('utf-8', errors='replace').strip()
+                self.offset = end + 1
+                return line
+
+            if len(self.buffer) - self.offset > MAX_LINE:
+                raise ValueError("слишком длинная строка запроса")
+            del self.buffer[:self.offset]
+            self.offset = 0
+
+            data = self.sock.recv(RECV_SIZE)
+            if not data:
+                return None
+            self.buffer += data
+
+    def read_exact(self, size):
+        """Возвращает ровно size байт; None - клиент закрыл соединение раньше"""
+        while len(self.buffer) - self.offset < size:
+            del self.buffer[:self.offset]
+            self.offset = 0
+            data = self.sock.recv(max(RECV_SIZE, min(size - len(self.buffer), 1024 * 1024)))
+            if not data:
+                return None
+            self.buffer += data
+
+        data = bytes(self.buffer[self.offset:self.offset + size])
+        self.offset += size
+        return data
+
+
+def parse_bulk_header(header, command, limit):
+    """Число из строки вида 'КОМАНДА n'"""
+    try:
+        count = int(header[len(command):])
+    except ValueError:
+        count = -1
+    if not 0 <= count <= limit:
+        # Без верного размера неясно, где кончается пакет, поэтому соединение закрывается
+        raise ValueError(f"Ошибка: ожидалось '{command} n', где n от 0 до {limit}")
+    return count
+
+
+def read_bulk(reader, header):
+    """Читает пакет после строки 'BULK n' и возвращает ответ на него"""
+    count = parse_bulk_header(header, BULK_COMMAND, MAX_BULK_PAIRS)
+
+    lines = []
+    for _ in range(count):
+        line = reader.readline()
+        if line is None:
+            raise ConnectionError("клиент закрыл соединение посреди пакета")
+        lines.append(line)
+
+    results = handle_bulk(lines)
+    return (f"{BULK_COMMAND} {count}\n" + ''.join(result + '\n' for result in results)).encode('utf-8')
+
+
+def read_vector_bulk(reader, header, command):
+    """Читает двоичный или CSV пакет и считает его целиком векторно"""
+    if command == BULKBIN_COMMAND:
+        size = parse_bulk_header(header, command, MAX_BULK_PAIRS) * PAIR_SIZE
+    else:
+        size = parse_bulk_header(header, command, MAX_CSV_SIZE)
+
+    data = reader.read_exact(size)
+    if data is None:
+        raise ConnectionError("клиент закрыл соединение посреди пакета")
+
+    try:
+        legs = legs_from_binary(data) if command == BULKBIN_COMMAND else legs_from_csv(data)
+    except BulkInputError as e:
+        return f"{e}\n".encode('utf-8')  # Размер пакета известен, поэтому соединение остается открытым
+    result, invalid = hypot_legs(legs)
+    return f"RESULT {len(result) // LEG_SIZE} {invalid}\n".encode('ascii') + result
+
+
+def serve_keepalive(client_socket, data):
+    """Постоянное соединение: запросы по строкам, ответы в том же порядке.
+
+    Ответы на запросы, пришедшие одной порцией, отправляются одним sendall.
+    Возвращает число обработанных запросов.
+    """
+    reader = LineReader(client_socket, data)
+    pending = []
+    requests = 0
+
+    try:
+        while True:
+            line = reader.readline()
+            if line is None:
+                break
+            if not line:
+                continue  # Пустые строки пропускаются и ответа не получают
+
+            command = line.split(' ', 1)[0]
+            if command == BULK_COMMAND:
+                pending.append(read_bulk(reader, line))
+            elif command in (BULKBIN_COMMAND, BULKCSV_COMMAND):
+                pending.append(read_vector_bulk(reader, line, command))
+            else:
+                pending.append((handle_pythagoras(line) + '\n').encode('utf-8'))
+            requests += 1
+
+            if not reader.has_line():
+                client_socket.sendall(b''.join(pending))
+                pending.clear()
+    except ValueError as e:
+        pending.append(f"{e}\n".encode('utf-8'))
+        client_socket.sendall(b''.join(pending))
+    return requests
+
+
+def serve_legacy(client_socket, data):
+    """Старый протокол: один запрос без перевода строки, один ответ"""
+    data = data.decode('utf-8')
+    print(f"Получены данные: {data}")
+
+    # Обрабатываем запрос
+    result = handle_pythagoras(data)
+
+    # Отправляем результат клиенту
+    client_socket.sendall(result.encode('utf-8'))
+    print(f"Отправлен результат: {result}")
+
+
+def handle_client(client_socket, client_address):
+    """Обслуживает одно подключение в отдельном потоке"""
+    client_socket.settimeout(IDLE_TIMEOUT)
+    try:
+        data = client_socket.recv(1024)
+        # Приветствие могло прийти не целиком
+        while data and len(data) < len(HELLO) and HELLO.startswith(data):
+            more = client_socket.recv(1024)
+            if not more:
+                break
+            data += more
+
+        if data.startswith(HELLO):
+            requests = serve_keepalive(client_socket, data[len(HELLO):])
+            print(f"Клиент {client_address}: обработано запросов {requests}")
+        elif data:
+            serve_legacy(client_socket, data)
+
+    except socket.timeout:
+        print(f"Клиент {client_address} не отвечал {IDLE_TIMEOUT} с")
+    except OSError as e:
+        print(f"Соединение с {client_address} прервано: {e}")
+    except Exception as e:
+        error_msg = f"Ошибка обработки запроса: {e}"
+        try:
+            client_socket.sendall(error_msg.encode('utf-8'))
+        except OSError:
+            pass
+    finally:
+        client_socket.close()
+        print(f"Соединение с {client_address} закрыто\n")
+
+
+def start_server(host='localhost', port=8080):
     """Запуск TCP сервера"""
     server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
 
     try:
-        server_socket.bind(('localhost', 8080))
-        server_socket.listen(5)
-        print("Сервер запущен на localhost:8080")
+        server_socket.bind((host, port))
+        server_socket.listen(socket.SOMAXCONN)
+        print(f"Сервер запущен на {host}:{port}")
         print("Ожидание подключений...")
 
         while True:
             client_socket, client_address = server_socket.accept()
             print(f"Подключен клиент: {client_address}")
 
-            try:
-                # Получаем данные от клиента
-                data = client_socket.recv(1024).decode('utf-8')
-                print(f"Получены данные: {data}")
-
-                # Обрабатываем запрос
-                result = handle_pythagoras(data)
-
-                # Отправляем результат клиенту
-                client_socket.send(result.encode('utf-8'))
-                print(f"Отправлен результат: {result}")
-
-            except Exception as e:
-                error_msg = f"Ошибка обработки запроса: {e}"
-                client_socket.send(error_msg.encode('utf-8'))
-            finally:
-                client_socket.close()
-                print(f"Соединение с {client_address} закрыто\n")
+            # Каждый клиент в своем потоке: медленный клиент не задерживает accept
+            threading.Thread(target=handle_client, args=(client_socket, client_address), daemon=True).start()
 
     except KeyboardInterrupt:
         print("\nСервер остановлен")
@@ -69,5 +274,14 @@ def start_server():
         server_socket.close()
 
 
+def main():
+    parser = argparse.ArgumentParser(description="TCP сервер теоремы Пифагора")
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=8080)
+    args = parser.parse_args()
+
+    start_server(args.host, args.port)
+
+
 if __name__ == "__main__":
-    start_server()
\ No newline at end of file
+    main()
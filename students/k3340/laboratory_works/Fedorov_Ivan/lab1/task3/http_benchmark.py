@@ -0,0 +1,148 @@
+import argparse
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+
+SERVER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'server 3 task.py')
+
+
+def start_server(port, root, flags=()):
+    """Запускает сервер отдельным процессом в каталоге root; вывод сервера отбрасывается"""
+    process = subprocess.Popen([sys.executable, SERVER_SCRIPT, '--port', str(port), *flags], cwd=root,
+                               stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    time.sleep(0.5)
+    return process
+
+
+def fetch(port, path='/', headers=''):
+    """Один запрос на отдельном соединении; возвращает размер ответа"""
+    with socket.create_connection(('localhost', port)) as sock:
+        sock.sendall(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n{headers}Connection: close\r\n\r\n"
+                     .encode('ascii'))
+        received = 0
+        while True:
+            data = sock.recv(256 * 1024)
+            if not data:
+                return received
+            received += len(data)
+
+
+def fetch_etag(port):
+    """ETag несжатого index.html из ответа сервера"""
+    with socket.create_connection(('localhost', port)) as sock:
+        sock.sendall(b"GET / HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n")
+        head = sock.recv(64 * 1024).split(b'\r\n\r\n', 1)[0].decode('latin-1')
+    for line in head.split('\r\n'):
+        name, _, value = line.partition(':')
+        if name.lower() == 'etag':
+            return value.strip()
+    return None
+
+
+def measure(port, duration, clients, headers=''):
+    """Запросов в секунду от clients потоков за duration секунд"""
+    counts = [0] * clients
+    deadline = time.perf_counter() + duration
+
+    def client(index):
+        while time.perf_counter() < deadline:
+            fetch(port, headers=headers)
+            counts[index] += 1
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(counts) / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Запросов в секунду: чтение файла на каждый запрос против кэша")
+    parser.add_argument('--duration', type=float, default=3, help="длительность прогона, с")
+    parser.add_argument('--clients', type=int, default=8, help="одновременных клиентов")
+    parser.add_argument('--sizes', default='0,65536,4194304',
+                        help="через запятую: размеры index.html в байтах, 0 - настоящий index.html")
+    parser.add_argument('--port', type=int, default=9380)
+    parser.add_argument('--conditional', action='store_true',
+                        help="сравнить полный ответ, gzip и 304 Not Modified вместо кэша против диска")
+    args = parser.parse_args()
+
+    if args.conditional:
+        compare_conditional(args)
+        return
+
+    modes = (("чтение с диска", ('--no-cache',)), ("кэш", ()))
+    print(f"Клиентов: {args.clients}, соединение на запрос")
+    print(f"{'index.html':>12} " + ''.join(f"{name:>16}" for name, _ in modes) + f"{'ускорение':>11}")
+
+    for size in (int(value) for value in args.sizes.split(',')):
+        root = tempfile.mkdtemp(prefix='http-bench-')
+        try:
+            index = os.path.join(root, 'index.html')
+            if size:
+                with open(index, 'w', encoding='utf-8') as file:
+                    file.write('<p>' + 'x' * (size - 8) + '</p>\n')
+            else:
+                shutil.copy(os.path.join(os.path.dirname(SERVER_SCRIPT), 'index.html'), index)
+            file_size = os.path.getsize(index)
+
+            rates = []
+            for _, flags in modes:
+                server = start_server(args.port, root, flags)
+                try:
+                    rates.append(measure(args.port, args.duration, args.clients))
+                finally:
+                    server.terminate()
+                    server.wait()
+        finally:
+            shutil.rmtree(root)
+
+        print(f"{file_size:>12} "
+              + ''.join(f"{rate:>16.0f}" for rate in rates) + f"{rates[1] / rates[0]:>10.2f}x")
+
+
+def compare_conditional(args):
+    """Байт на ответ и запросов в секунду: без сжатия, gzip и повторный запрос с If-None-Match"""
+    print(f"Клиентов: {args.clients}, соединение на запрос, сервер с кэшем")
+    print(f"{'index.html':>12} {'ответ':<14} {'байт':>10} {'запросов/с':>12}")
+
+    for size in (int(value) for value in args.sizes.split(',')):
+        root = tempfile.mkdtemp(prefix='http-bench-')
+        server = None
+        try:
+            index = os.path.join(root, 'index.html')
+            if size:
+                with open(index, 'w', encoding='utf-8') as file:
+                    file.write('<p>' + 'x' * (size - 8) + '</p>\n')
+            else:
+                shutil.copy(os.path.join(os.path.dirname(SERVER_SCRIPT), 'index.html'), index)
+            file_size = os.path.getsize(index)
+
+            server = start_server(args.port, root)
+            etag = fetch_etag(args.port)
+            cases = (
+                ("без сжатия", ''),
+                ("gzip", 'Accept-Encoding: gzip\r\n'),
+                ("304", f'If-None-Match: {etag}\r\n'),
+            )
+            for name, headers in cases:
+                received = fetch(args.port, headers=headers)
+                rate = measure(args.port, args.duration, args.clients, headers)
+                print(f"{file_size:>12} {name:<14} {received:>10} {rate:>12.0f}")
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+            shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
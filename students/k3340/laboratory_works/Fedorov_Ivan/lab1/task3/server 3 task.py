@@ -1,98 +1,231 @@
+import argparse
+import posixpath
 import socket
 import os
+import sys
+import threading
 from datetime import datetime
+from html import escape
+from urllib.parse import unquote, urlsplit
+
+# static_cache лежит рядом, common - в каталоге lab1: сервер запускается из любого каталога
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from static_cache import RangeNotSatisfiable, StaticFileCache, open_file, parse_range, response_head, send_cached
+from common.http_connection import KEEPALIVE_TIMEOUT, MAX_KEEPALIVE_REQUESTS, BadRequest, KeepAliveConnection
+
+
+INDEX_FILE = 'index.html'  # Что отдавать по адресу каталога
+# Ошибки файла, которых не бывает у сокета: пойманные вокруг отправки, они значат, что ответ еще не начат
+MISSING_FILE_ERRORS = (FileNotFoundError, NotADirectoryError, IsADirectoryError)
+FILE_ERRORS = MISSING_FILE_ERRORS + (PermissionError,)
 
 
 class HTTPServer:
-    def __init__(self, host='localhost', port=8080):
+    def __init__(self, host='localhost', port=8080, use_cache=True, keepalive_timeout=KEEPALIVE_TIMEOUT,
+                 max_requests=MAX_KEEPALIVE_REQUESTS, root='.'):
         self.host = host
         self.port = port
         self.socket = None
+        self.root = os.path.abspath(root)  # Корень документов: файлы вне него не отдаются
+        # Кэш хранит готовые к отправке байты; без него файл читается на каждый запрос
+        self.cache = StaticFileCache() if use_cache else None
+        self.keepalive_timeout = keepalive_timeout
+        self.max_requests = max_requests
 
-    def load_html_file(self, filename):
-        """Загружает содержимое HTML файла"""
-        try:
-            with open(filename, 'r', encoding='utf-8') as file:
-                return file.read()
-        except FileNotFoundError:
-            return None
+    def resolve_path(self, target):
+        """Путь к файлу по цели запроса; для каталога без "/" в конце - адрес перенаправления.
+
+        Возвращает (путь, None) или (None, адрес). Путь нормализуется как URL от корня,
+        поэтому ".." не выводит за пределы корня документов.
+        """
+        path = unquote(urlsplit(target).path) or '/'
+        if '\0' in path or '\\' in path:
+            raise BadRequest(f"недопустимый путь: {target[:100]}")
+        relative = posixpath.normpath('/' + path).lstrip('/')
+        filename = os.path.join(self.root, *relative.split('/')) if relative else self.root
+
+        if os.path.isdir(filename):
+            if not path.endswith('/'):
+                return None, '/' + relative + '/'
+            filename = os.path.join(filename, INDEX_FILE)
+        return filename, None
 
-    def create_http_response(self, status_code, content, content_type='text/html; charset=utf-8'):
-        """Создает HTTP ответ с правильными заголовками"""
+    def create_http_response(self, status_code, content, content_type='text/html; charset=utf-8',
+                             connection_headers="Connection: close\r\n", extra_headers="", head_only=False):
+        """Создает HTTP ответ с правильными заголовками; head_only - ответ на HEAD, без тела"""
         status_messages = {
             200: 'OK',
+            301: 'Moved Permanently',
+            400: 'Bad Request',
+            403: 'Forbidden',
             404: 'Not Found',
-            500: 'Internal Server Error'
+            405: 'Method Not Allowed',
+            413: 'Content Too Large',
+            431: 'Request Header Fields Too Large',
+            500: 'Internal Server Error',
+            501: 'Not Implemented'
         }
 
+        body = content.encode('utf-8')  # Кодируем один раз: длина нужна в байтах
         response = [
             f"HTTP/1.1 {status_code} {status_messages.get(status_code, 'Unknown')}",
             f"Content-Type: {content_type}",
-            f"Content-Length: {len(content.encode('utf-8'))}",
-            "Connection: close",
+            f"Content-Length: {len(body)}",
+            *connection_headers.splitlines(),
+            *extra_headers.splitlines(),
             f"Date: {datetime.now().strftime('%a, %d %b %Y %H:%M:%S GMT')}",
             "Server: CustomPythonHTTPServer/1.0",
             "",  # Пустая строка разделяет заголовки и тело
-            content
+            ""
         ]
 
-        return "\r\n".join(response)
+        head = "\r\n".join(response).encode('utf-8')
+        return head if head_only else head + body
 
-    def handle_request(self, client_socket):
+    def handle_request(self, connection, request):
         """Обрабатывает HTTP запрос"""
+        print(f"Метод: {request.method}, Путь: {request.target}")
+        connection_headers = connection.connection_headers()
         try:
-            # Получаем данные от клиента
-            request_data = client_socket.recv(1024).decode('utf-8')
-            print(f"Получен запрос:\n{request_data}")
+            if request.method not in ('GET', 'HEAD'):
+                connection.send(self.create_http_response(405, "<h1>405 - Метод не поддерживается</h1>",
+                                                          connection_headers=connection_headers,
+                                                          extra_headers="Allow: GET, HEAD\r\n"))
+                return
+
+            filename, location = self.resolve_path(request.target)
+            if location is not None:
+                connection.send(self.create_http_response(301, f'<a href="{location}">{location}</a>',
+                                                          connection_headers=connection_headers,
+                                                          extra_headers=f"Location: {location}\r\n",
+                                                          head_only=request.method == 'HEAD'))
+                return
 
-            # Парсим первую строку запроса
-            request_lines = request_data.split('\r\n')
-            if not request_lines:
+            try:
+                # Кэш хранит готовые к отправке байты; без него файл открывается на каждый запрос
+                cached = self.cache.get(filename) if self.cache is not None else open_file(filename)
+            except OSError as e:
+                # Сокет здесь не трогается: любая OSError - ошибка файла
+                self.send_file_error(connection, request, e, connection_headers)
+                return
+            if cached is None:
+                self.send_not_found(connection, request, connection_headers)
                 return
 
-            first_line = request_lines[0]
-            method, path, version = first_line.split()
-
-            print(f"Метод: {method}, Путь: {path}")
-
-            # Загружаем HTML файл
-            html_content = self.load_html_file('index.html')
-
-            if html_content is None:
-                # Если файл не найден
-                error_html = """
-                <!DOCTYPE html>
-                <html>
-                <head><title>404 Not Found</title></head>
-                <body>
-                    <h1>404 - Страница не найдена</h1>
-                    <p>Файл index.html не найден на сервере</p>
-                </body>
-                </html>
-                """
-                response = self.create_http_response(404, error_html)
-            else:
-                # Успешный ответ с HTML содержимым
-                response = self.create_http_response(200, html_content)
-
-            # Отправляем ответ клиенту
-            client_socket.send(response.encode('utf-8'))
-            print("Ответ отправлен клиенту")
+            try:
+                self.send_file(connection, request, cached, connection_headers.encode('latin-1'))
+            except FILE_ERRORS as e:
+                # Большой файл удален или закрыт для чтения после stat: send_cached открывает его до ответа
+                self.send_file_error(connection, request, e, connection_headers)
+            finally:
+                if self.cache is None:
+                    cached.close()
 
+        except (OSError, BadRequest):
+            raise  # Соединение разорвано или запрос неверный: это решает handle_connection
         except Exception as e:
             print(f"Ошибка при обработке запроса: {e}")
+            self.send_internal_error(connection, request, connection_headers)
+
+    def send_not_found(self, connection, request, connection_headers):
+        error_html = f"""
+        <!DOCTYPE html>
+        <html>
+        <head><title>404 Not Found</title></head>
+        <body>
+            <h1>404 - Страница не найдена</h1>
+            <p>Файл {escape(unquote(urlsplit(request.target).path))} не найден на сервере</p>
+        </body>
+        </html>
+        """
+        connection.send(self.create_http_response(404, error_html, connection_headers=connection_headers,
+                                                  head_only=request.method == 'HEAD'))
+
+    def send_internal_error(self, connection, request, connection_headers):
+        error_html = """
+        <!DOCTYPE html>
+        <html>
+        <head><title>500 Internal Error</title></head>
+        <body>
+            <h1>500 - Внутренняя ошибка сервера</h1>
+            <p>Произошла ошибка при обработке запроса</p>
+        </body>
+        </html>
+        """
+        connection.send(self.create_http_response(500, error_html, connection_headers=connection_headers,
+                                                  head_only=request.method == 'HEAD'))
+
+    def send_file_error(self, connection, request, error, connection_headers):
+        """Ответ на ошибку чтения файла: 404 - файла нет, 403 - нет прав, 500 - остальное"""
+        if isinstance(error, MISSING_FILE_ERRORS):
+            self.send_not_found(connection, request, connection_headers)
+        elif isinstance(error, PermissionError):
             error_html = """
             <!DOCTYPE html>
             <html>
-            <head><title>500 Internal Error</title></head>
+            <head><title>403 Forbidden</title></head>
             <body>
-                <h1>500 - Внутренняя ошибка сервера</h1>
-                <p>Произошла ошибка при обработке запроса</p>
+                <h1>403 - Доступ запрещен</h1>
+                <p>Файл недоступен для чтения</p>
             </body>
             </html>
             """
-            response = self.create_http_response(500, error_html)
-            client_socket.send(response.encode('utf-8'))
+            connection.send(self.create_http_response(403, error_html, connection_headers=connection_headers,
+                                                      head_only=request.method == 'HEAD'))
+        else:
+            print(f"Ошибка чтения файла: {error}")
+            self.send_internal_error(connection, request, connection_headers)
+
+    def send_file(self, connection, request, cached, extra_headers):
+        """Отправляет файл с учетом If-None-Match, Range и Accept-Encoding"""
+        headers = request.headers
+        range_header = headers.get('range')
+        # Диапазон считается в байтах несжатого файла
+        variant = cached.select(None if range_header else headers.get('accept-encoding'))
+        if cached.is_not_modified(variant, headers):
+            # У клиента та же версия: только заголовки, без тела
+            connection.send(response_head(variant.not_modified, extra_headers))
+            return
+
+        byte_range = None
+        if range_header and cached.range_allowed(headers.get('if-range')):
+            try:
+                byte_range = parse_range(range_header, cached.size)
+            except RangeNotSatisfiable:
+                connection.send(response_head(cached.unsatisfiable_headers(), extra_headers))
+                return
+
+        head_only = request.method == 'HEAD'
+        if byte_range is None and isinstance(variant.body, bytes):
+            head = response_head(variant.headers, extra_headers)
+            connection.send(head if head_only else head + variant.body)
+        else:
+            # Диапазоны и большие файлы (sendfile, mmap) уходят напрямую, накопленные ответы - перед ними
+            connection.flush()
+            send_cached(connection.sock, cached, extra_headers, byte_range, head_only)
+
+    def handle_connection(self, client_socket, client_address):
+        """Обслуживает соединение: запросы идут по очереди, пока клиент или сервер его не закроют"""
+        connection = KeepAliveConnection(client_socket, self.keepalive_timeout, self.max_requests)
+        try:
+            for request in connection:
+                self.handle_request(connection, request)
+        except BadRequest as e:
+            print(f"Неверный запрос от {client_address}: {e}")
+            connection.keep_alive = False
+            try:
+                connection.send(self.create_http_response(e.status, f"<h1>{e.status}</h1><p>{e}</p>"))
+            except OSError:
+                pass
+        except socket.timeout:
+            print(f"Клиент {client_address} не дослал запрос за {self.keepalive_timeout} с")
+        except OSError as e:
+            print(f"Ошибка при работе с клиентом {client_address}: {e}")
+        finally:
+            client_socket.close()
+            print(f"Соединение с {client_address} закрыто, запросов: {connection.requests}\n")
 
     def start(self):
         """Запускает HTTP сервер"""
@@ -101,9 +234,11 @@ class HTTPServer:
 
         try:
             self.socket.bind((self.host, self.port))
-            self.socket.listen(5)
+            self.socket.listen(socket.SOMAXCONN)
 
             print(f"HTTP сервер запущен на http://{self.host}:{self.port}")
+            print(f"Постоянные соединения: простой до {self.keepalive_timeout} с, "
+                  f"до {self.max_requests} запросов на соединение")
             print("Для остановки сервера нажмите Ctrl+C")
             print("=" * 50)
 
@@ -111,16 +246,14 @@ class HTTPServer:
                 client_socket, client_address = self.socket.accept()
                 print(f"Подключен клиент: {client_address}")
 
-                try:
-                    self.handle_request(client_socket)
-                except Exception as e:
-                    print(f"Ошибка при работе с клиентом {client_address}: {e}")
-                finally:
-                    client_socket.close()
-                    print(f"Соединение с {client_address} закрыто\n")
+                # Постоянное соединение занимает поток надолго, поэтому каждому клиенту - свой
+                threading.Thread(target=self.handle_connection, args=(client_socket, client_address),
+                                 daemon=True).start()
 
         except KeyboardInterrupt:
             print("\nСервер остановлен")
+            if self.cache is not None:
+                print(f"Кэш: {self.cache.stats()}")
         except Exception as e:
             print(f"Ошибка сервера: {e}")
         finally:
@@ -129,13 +262,25 @@ class HTTPServer:
 
 
 def main():
+    parser = argparse.ArgumentParser(description="HTTP сервер статической страницы")
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--root', default='.', help="корень документов")
+    parser.add_argument('--no-cache', action='store_true', help="читать файл с диска на каждый запрос")
+    parser.add_argument('--keepalive-timeout', type=float, default=KEEPALIVE_TIMEOUT,
+                        help="сколько секунд ждать следующий запрос в постоянном соединении")
+    parser.add_argument('--max-requests', type=int, default=MAX_KEEPALIVE_REQUESTS,
+                        help="сколько запросов обслужить в одном соединении")
+    args = parser.parse_args()
+
     # Проверяем существование файла index.html
-    if not os.path.exists('index.html'):
+    index_path = os.path.join(args.root, INDEX_FILE)
+    if not os.path.exists(index_path):
         print("Внимание: файл index.html не найден!")
-        print("Создайте файл index.html в той же директории, что и server.py")
+        print("Создайте файл index.html в корне документов (--root)")
         create_example = input("Создать пример index.html? (y/n): ")
         if create_example.lower() == 'y':
-            with open('index.html', 'w', encoding='utf-8') as f:
+            with open(index_path, 'w', encoding='utf-8') as f:
                 f.write("""<!DOCTYPE html>
 <html>
 <head><title>Пример страницы</title></head>
@@ -149,7 +294,8 @@ def main():
             return
 
     # Запускаем сервер
-    server = HTTPServer()
+    server = HTTPServer(args.host, args.port, use_cache=not args.no_cache,
+                        keepalive_timeout=args.keepalive_timeout, max_requests=args.max_requests, root=args.root)
     server.start()
 
 
@@ -0,0 +1,384 @@
+import gzip
+import hashlib
+import mimetypes
+import mmap
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+
+
+MAX_CACHE_BYTES = 32 * 1024 * 1024  # Сколько байт файлов держать в памяти
+MAX_CACHED_FILE = 1024 * 1024  # Файлы больше отдаются через os.sendfile и в память не читаются
+MMAP_THRESHOLD = 1024 * 1024  # Без кэша файлы больше отображаются в память (mmap), а не читаются
+SERVER_NAME = "CustomPythonHTTPServer/1.0"
+CACHE_CONTROL = "public, max-age=60"  # Минуту браузер не спрашивает, потом проверяет по ETag
+
+# Сжатые варианты готовятся один раз на версию файла; порядок - предпочтение сервера
+ENCODINGS = ('gzip', 'deflate')
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+MIN_COMPRESS_SIZE = 256  # Меньшие файлы сжатие почти не уменьшает
+COMPRESS_LEVEL = 6
+
+# Типы, которые важно отдать с кодировкой; остальные определяет mimetypes
+CONTENT_TYPES = {
+    '.html': 'text/html; charset=utf-8',
+    '.css': 'text/css; charset=utf-8',
+    '.js': 'application/javascript; charset=utf-8',
+    '.json': 'application/json',
+    '.txt': 'text/plain; charset=utf-8',
+    '.svg': 'image/svg+xml',
+}
+
+_date_cache = (None, '')
+
+
+def format_http_date(seconds):
+    """Время в формате заголовков Date и Last-Modified (RFC 9110, 5.6.7)"""
+    return time.strftime('%a, %d %b %Y %H:%M:%S GMT', time.gmtime(seconds))
+
+
+def http_date():
+    """Текущая дата для заголовка Date, форматируется раз в секунду"""
+    global _date_cache
+    second = int(time.time())
+    cached_second, text = _date_cache
+    if cached_second != second:
+        text = format_http_date(second)
+        _date_cache = (second, text)
+    return text
+
+
+@lru_cache(maxsize=256)
+def content_type_for(extension):
+    """MIME тип по расширению файла (в нижнем регистре)"""
+    if extension in CONTENT_TYPES:
+        return CONTENT_TYPES[extension]
+    content_type = mimetypes.guess_type('file' + extension)[0] or 'application/octet-stream'
+    if content_type.startswith('text/'):
+        content_type += '; charset=utf-8'
+    return content_type
+
+
+class RangeNotSatisfiable(ValueError):
+    """Запрошенный диапазон целиком за концом файла: ответ 416"""
+
+
+def parse_range(header, size):
+    """(начало, конец) включительно из заголовка Range; None - заголовок игнорируется и отдается весь файл.
+
+    Поддерживается один диапазон: bytes=a-b, bytes=a- и bytes=-n.
+    Несколько диапазонов сразу сервер вправе не поддерживать (RFC 9110, 14.2).
+    """
+    unit, _, spec = header.partition('=')
+    if unit.strip().lower() != 'bytes' or ',' in spec:
+        return None
+    first, dash, last = spec.strip().partition('-')
+    if not dash or not (first or last) or (first and not first.isdigit()) or (last and not last.isdigit()):
+        return None
+
+    if not first:
+        suffix = int(last)  # Последние suffix байт
+        if suffix == 0:
+            raise RangeNotSatisfiable(header)
+        start, end = max(size - suffix, 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if last and int(last) < start:
+            return None
+    if start >= size:
+        raise RangeNotSatisfiable(header)
+    return start, end
+
+
+def file_version(stat):
+    """Версия файла: меняется при перезаписи (mtime, размер) и при замене файла (inode)"""
+    return stat.st_mtime_ns, stat.st_ino, stat.st_size
+
+
+@lru_cache(maxsize=64)
+def parse_accept_encoding(header):
+    """{кодировка: q} из Accept-Encoding; браузеры шлют одни и те же строки, поэтому разбор кэшируется"""
+    accepted = {}
+    for item in header.split(','):
+        coding, _, params = item.partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    return accepted
+
+
+class FileVariant:
+    """Одно представление файла: тело в своей кодировке и готовые заголовки ответов 200 и 304"""
+
+    __slots__ = ('encoding', 'body', 'etag', 'validators', 'headers', 'not_modified')
+
+    def __init__(self, cached, encoding, body, size, etag):
+        self.encoding = encoding
+        self.body = body
+        self.etag = etag
+        # Без Date и Connection: их значения меняются от ответа к ответу
+        self.validators = (f"ETag: {etag}\r\n"
+                           f"Last-Modified: {cached.last_modified}\r\n"
+                           f"Cache-Control: {CACHE_CONTROL}\r\n"
+                           + ("Vary: Accept-Encoding\r\n" if cached.compressible else "")
+                           + f"Server: {SERVER_NAME}\r\n").encode('latin-1')
+        # Диапазоны отдаются только из несжатого файла
+        self.headers = (f"HTTP/1.1 200 OK\r\n"
+                        f"Content-Type: {cached.content_type}\r\n"
+                        f"Content-Length: {size}\r\n"
+                        + ("Accept-Ranges: bytes\r\n" if encoding == 'identity'
+                           else f"Content-Encoding: {encoding}\r\n")).encode('latin-1') + self.validators
+        self.not_modified = b"HTTP/1.1 304 Not Modified\r\n" + self.validators
+
+
+class CachedFile:
+    """Файл, готовый к отправке: заголовки закодированы заранее, тело - уже bytes.
+
+    Для текстовых файлов заранее готовы сжатые gzip и deflate варианты.
+    У больших файлов body равно None: они отправляются из файла через sendfile.
+    Без кэша тело большого файла - mmap, его закрывает close().
+    """
+
+    __slots__ = ('path', 'version', 'size', 'content_type', 'mtime', 'last_modified', 'compressible', 'variants')
+
+    def __init__(self, path, version, size, content_type, body, compress=True):
+        self.path = path
+        self.version = version
+        self.size = size
+        self.content_type = content_type
+        self.mtime = version[0] // 1_000_000_000
+        self.last_modified = format_http_date(self.mtime)
+        self.compressible = (compress and isinstance(body, bytes) and size >= MIN_COMPRESS_SIZE
+                             and content_type.startswith(COMPRESSIBLE_TYPES))
+
+        # Сильный ETag: хеш содержимого, а для больших файлов, которые не читаются, - версия файла
+        if isinstance(body, bytes):
+            tag = hashlib.blake2b(body, digest_size=8).hexdigest()
+        else:
+            tag = f"{version[0]:x}-{size:x}"
+        self.variants = {'identity': FileVariant(self, 'identity', body, size, f'"{tag}"')}
+
+        if self.compressible:
+            for encoding in ENCODINGS:
+                if encoding == 'gzip':
+                    compressed = gzip.compress(body, COMPRESS_LEVEL, mtime=0)
+                else:
+                    compressed = zlib.compress(body, COMPRESS_LEVEL)
+                if len(compressed) < size:
+                    self.variants[encoding] = FileVariant(self, encoding, compressed, len(compressed),
+                                                          f'"{tag}-{encoding}"')
+
+    @property
+    def body(self):
+        return self.variants['identity'].body
+
+    @property
+    def headers(self):
+        return self.variants['identity'].headers
+
+    def partial_headers(self, start, end):
+        """Заголовки ответа 206 на диапазон start..end включительно"""
+        identity = self.variants['identity']
+        return (f"HTTP/1.1 206 Partial Content\r\n"
+                f"Content-Type: {self.content_type}\r\n"
+                f"Content-Length: {end - start + 1}\r\n"
+                f"Content-Range: bytes {start}-{end}/{self.size}\r\n").encode('latin-1') + identity.validators
+
+    def unsatisfiable_headers(self):
+        """Заголовки ответа 416: диапазон за концом файла"""
+        return (f"HTTP/1.1 416 Range Not Satisfiable\r\n"
+                f"Content-Range: bytes */{self.size}\r\n"
+                f"Content-Length: 0\r\n"
+                f"Server: {SERVER_NAME}\r\n").encode('latin-1')
+
+    def range_allowed(self, if_range):
+        """Действует ли Range: If-Range должен совпасть с ETag или датой изменения файла"""
+        if if_range is None:
+            return True
+        return if_range.strip() in (self.variants['identity'].etag, self.last_modified)
+
+    def close(self):
+        """Освобождает отображение файла в память, если оно было"""
+        if isinstance(self.body, mmap.mmap):
+            self.body.close()
+
+    @property
+    def memory(self):
+        """Сколько байт файл занимает в кэше; большие файлы хранят только заголовки"""
+        return sum(len(variant.body) for variant in self.variants.values() if variant.body is not None)
+
+    def select(self, accept_encoding):
+        """Вариант под Accept-Encoding клиента; без заголовка - несжатый"""
+        if accept_encoding and len(self.variants) > 1:
+            accepted = parse_accept_encoding(accept_encoding)
+            for encoding in ENCODINGS:
+                if encoding in self.variants and accepted.get(encoding, accepted.get('*', 0)) > 0:
+                    return self.variants[encoding]
+        return self.variants['identity']
+
+    def is_not_modified(self, variant, headers):
+        """Есть ли у клиента эта версия: If-None-Match, а без него If-Modified-Since"""
+        if_none_match = headers.get('if-none-match')
+        if if_none_match is not None:
+            if if_none_match.strip() == '*':
+                return True
+            # Для If-None-Match сравнение слабое: W/ у тега не учитывается
+            return variant.etag in {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+
+        if_modified_since = headers.get('if-modified-since')
+        if if_modified_since:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return self.mtime <= since
+        return False
+
+
+class StaticFileCache:
+    """Кэш статических файлов по пути с вытеснением давно не запрошенных (LRU) по объему.
+
+    На каждый запрос делается только os.stat: если mtime, inode или размер
+    изменились, файл перечитывается.
+    """
+
+    def __init__(self, max_bytes=MAX_CACHE_BYTES, max_file_size=MAX_CACHED_FILE):
+        self.max_bytes = max_bytes
+        self.max_file_size = max_file_size
+        self.files = OrderedDict()  # {путь: CachedFile}, в начале - давно не запрошенные
+        self.size = 0  # Байт тел файлов в кэше
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, path):
+        """Возвращает CachedFile или None, если файла нет"""
+        try:
+            stat = os.stat(path)
+        except (FileNotFoundError, NotADirectoryError):
+            self.invalidate(path)
+            return None
+        version = file_version(stat)
+
+        with self.lock:
+            cached = self.files.get(path)
+            if cached is not None and cached.version == version:
+                self.files.move_to_end(path)
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        cached = self.load(path, version, stat.st_size)
+        self.store(cached)
+        return cached
+
+    def load(self, path, version, size):
+        """Читает файл; большие файлы не читаются, запоминаются только заголовки"""
+        content_type = content_type_for(os.path.splitext(path)[1].lower())
+        body = None
+        if size <= self.max_file_size:
+            with open(path, 'rb') as file:
+                body = file.read()
+            size = len(body)  # Файл мог измениться между stat и чтением
+        return CachedFile(path, version, size, content_type, body)
+
+    def store(self, cached):
+        with self.lock:
+            old = self.files.pop(cached.path, None)
+            if old is not None:
+                self.size -= old.memory
+            self.files[cached.path] = cached
+            self.size += cached.memory
+
+            while self.size > self.max_bytes:
+                _, evicted = self.files.popitem(last=False)
+                self.size -= evicted.memory
+                self.evictions += 1
+
+    def invalidate(self, path):
+        with self.lock:
+            old = self.files.pop(path, None)
+            if old is not None:
+                self.size -= old.memory
+
+    def stats(self):
+        return (f"файлов в кэше: {len(self.files)} ({self.size} байт), попаданий: {self.hits}, "
+                f"промахов: {self.misses}, вытеснено: {self.evictions}")
+
+
+def open_file(path, mmap_threshold=MMAP_THRESHOLD):
+    """Файл без кэша: маленький читается целиком, большой отображается в память; None - файла нет"""
+    try:
+        file = open(path, 'rb')
+    except (FileNotFoundError, NotADirectoryError, IsADirectoryError):
+        return None
+    with file:
+        stat = os.fstat(file.fileno())
+        if stat.st_size > mmap_threshold:
+            # Страницы файла подгружает ОС по мере отправки, в bytes файл не копируется
+            body = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            body = file.read()
+    content_type = content_type_for(os.path.splitext(path)[1].lower())
+    return CachedFile(path, file_version(stat), len(body), content_type, body, compress=False)
+
+
+def response_head(headers, extra_headers=b''):
+    """Заголовки ответа: заранее закодированная часть, дата и заголовки конкретного ответа"""
+    return headers + f"Date: {http_date()}\r\n".encode('latin-1') + extra_headers + b"\r\n"
+
+
+def send_region(client_socket, file, offset, count):
+    """Отправляет count байт файла с offset без чтения в память"""
+    if not count:
+        return
+    if hasattr(os, 'sendfile'):
+        # socket.sendfile вызывает os.sendfile и умеет ждать сокет с таймаутом
+        client_socket.sendfile(file, offset, count)
+        return
+    # Без os.sendfile (Windows) файл отображается в память и уходит срезом без копии в bytes
+    with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        client_socket.sendall(memoryview(mapped)[offset:offset + count])
+
+
+def send_cached(client_socket, cached, extra_headers=b'', byte_range=None, head_only=False):
+    """Отправляет файл или диапазон byte_range: из памяти - одним sendall, с диска - через sendfile"""
+    if byte_range is None:
+        start, end, headers = 0, cached.size - 1, cached.headers
+    else:
+        start, end = byte_range
+        headers = cached.partial_headers(start, end)
+
+    if head_only:
+        client_socket.sendall(response_head(headers, extra_headers))
+        return
+
+    body = cached.body
+    if isinstance(body, bytes):
+        client_socket.sendall(response_head(headers, extra_headers) + body[start:end + 1])
+        return
+    if body is not None:
+        client_socket.sendall(response_head(headers, extra_headers))
+        client_socket.sendall(memoryview(body)[start:end + 1])
+        return
+
+    with open(cached.path, 'rb') as file:
+        stat = os.fstat(file.fileno())
+        if stat.st_size != cached.size:
+            # Файл изменился после stat: заголовок должен совпадать с тем, что уйдет, поэтому весь файл
+            cached = CachedFile(cached.path, file_version(stat), stat.st_size, cached.content_type, None)
+            start, end, headers = 0, stat.st_size - 1, cached.headers
+        client_socket.sendall(response_head(headers, extra_headers))
+        send_region(client_socket, file, start, end - start + 1)
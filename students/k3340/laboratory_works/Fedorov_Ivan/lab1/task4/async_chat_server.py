@@ -0,0 +1,283 @@
+import asyncio
+import socket
+import time
+from collections import deque
+
+from chat_commands import ChatCommands
+from chat_heartbeat import HEARTBEAT_INTERVAL, Heartbeats
+from chat_protocol import HELLO, PING_FRAME, EncodedMessage, ProtocolError, current_timestamp, detect_codec
+from chat_registry import DEFAULT_ROOM, ClientRegistry
+
+
+RECV_SIZE = 1024
+SLOW_POLICIES = ('drop', 'disconnect')
+
+
+class AsyncClient:
+    """Клиент асинхронного сервера с собственной ограниченной очередью отправки"""
+
+    def __init__(self, reader, writer, queue_size):
+        self.reader = reader
+        self.writer = writer
+        self.username = None  # Известно после первого сообщения
+        self.room = None
+        self.history_cursor = 0
+        self.codec = None
+        self.address = writer.get_extra_info('peername')
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.sender_task = None
+        self.dropped = 0
+        self.send_blocked_since = None
+        self.last_seen = None
+
+
+class AsyncChatServer(ChatCommands):
+    """Чат сервер на asyncio: рассылка не ждет медленных клиентов"""
+
+    def __init__(self, host='localhost', port=5050, queue_size=256, slow_policy='drop', history=None,
+                 heartbeat=HEARTBEAT_INTERVAL):
+        if slow_policy not in SLOW_POLICIES:
+            raise ValueError(f"Неизвестная политика для медленных клиентов: {slow_policy}")
+
+        self.host = host
+        self.port = port
+        self.queue_size = queue_size
+        self.slow_policy = slow_policy
+        self.clients = ClientRegistry()  # {writer: AsyncClient}
+        self.history = history
+        self.heartbeats = Heartbeats(self.send_ping, self.reap_client, interval=heartbeat)
+        self.server = None
+        self.running = False
+
+        # Счетчики для наблюдения за медленными клиентами
+        self.dropped_messages = 0
+        self.slow_disconnects = 0
+
+    def enqueue(self, client, data):
+        """Кладет EncodedMessage в очередь клиента; False - клиента нужно отключить"""
+        try:
+            client.queue.put_nowait(data)
+            return True
+        except asyncio.QueueFull:
+            if self.slow_policy == 'disconnect':
+                return False
+
+        # Политика drop: выбрасываем самое старое сообщение, клиент получает свежие
+        client.queue.get_nowait()
+        client.queue.put_nowait(data)
+        client.dropped += 1
+        self.dropped_messages += 1
+        return True
+
+    def broadcast(self, message, sender=None, room=DEFAULT_ROOM):
+        """Раскладывает сообщение по очередям участников комнаты, кроме отправителя"""
+        # Кодируем один раз: все получатели ставят в очередь одно и то же сообщение
+        data = EncodedMessage(f"[{current_timestamp()}] {message}")
+
+        slow_clients = []
+
+        for client in self.clients.members(room):
+            if client is sender:
+                continue
+            if not self.enqueue(client, data):
+                slow_clients.append(client)
+
+        # Отключаем клиентов, которые не успевают читать
+        for client in slow_clients:
+            self.slow_disconnects += 1
+            print(f"Клиент {client.username} не успевает читать сообщения и будет отключен")
+            self.remove_client(client, abort=True)
+
+    def send_private(self, client, text):
+        """Отправляет сообщение одному клиенту"""
+        if not self.enqueue(client, EncodedMessage(text)):
+            self.slow_disconnects += 1
+            self.remove_client(client, abort=True)
+
+    def send_ping(self, client):
+        """Пинг пишется в транспорт напрямую: очередь хранит только текст сообщений"""
+        if not client.writer.is_closing():
+            client.writer.write(PING_FRAME)
+
+    def reap_client(self, client):
+        """Разрывает соединение зависшего клиента; его обработчик завершится сам"""
+        client.writer.transport.abort()
+
+    async def reap_loop(self):
+        """Периодически проверяет пинги и зависших клиентов"""
+        while True:
+            await asyncio.sleep(self.heartbeats.wheel.tick)
+            self.heartbeats.tick()
+
+    def remove_client(self, client, abort=False):
+        """Удаляет клиента, останавливает его отправку и закрывает соединение"""
+        if self.clients.unregister(client.writer) is None:
+            return
+
+        if client.sender_task is not None:
+            client.sender_task.cancel()
+
+        # Медленному клиенту не досылаем накопленный буфер
+        if abort:
+            client.writer.transport.abort()
+        else:
+            client.writer.close()
+
+        # Уведомляем других пользователей
+        leave_message = f"⚡ {client.username} покинул(а) чат"
+        self.broadcast(leave_message, room=client.room)
+        print(f"Клиент отключен: {client.username}")
+
+    async def send_loop(self, client):
+        """Отправляет сообщения из очереди клиента с учетом backpressure"""
+        try:
+            codec = client.codec
+            while True:
+                message = await client.queue.get()
+                if client.queue.empty():
+                    client.writer.write(message.for_codec(codec))
+                else:
+                    # Все, что накопилось за время ожидания, уходит одной записью из готовых кадров
+                    frames = [message.for_codec(codec)]
+                    while not client.queue.empty():
+                        frames.append(client.queue.get_nowait().for_codec(codec))
+                    client.writer.writelines(frames)
+                # drain ждет только этого клиента и не задерживает остальных
+                client.send_blocked_since = time.monotonic()
+                await client.writer.drain()
+                client.send_blocked_since = None
+        except asyncio.CancelledError:
+            pass
+        except ConnectionError:
+            self.remove_client(client)
+
+    async def handle_client(self, reader, writer):
+        """Обрабатывает сообщения от клиента"""
+        client_address = writer.get_extra_info('peername')
+        client = AsyncClient(reader, writer, self.queue_size)
+        self.heartbeats.track(client)
+
+        try:
+            # По первым байтам определяем протокол: кадры или старый формат
+            codec, data = detect_codec(await reader.read(RECV_SIZE))
+            while codec is None:
+                chunk = await reader.read(RECV_SIZE)
+                if not chunk:
+                    return  # Соединение закрыто посреди приветствия
+                codec, data = detect_codec(data + chunk)
+            client.codec = codec
+            if codec.framed:
+                writer.write(HELLO)
+            pending = deque(codec.feed(data))
+
+            # Получаем имя пользователя
+            while not pending:
+                data = await reader.read(RECV_SIZE)
+                if not data:
+                    break
+                pending.extend(codec.feed(data))
+
+            username = pending.popleft().strip() if pending else ''
+
+            if not username:
+                writer.close()
+                return
+
+            # Имя должно быть уникальным
+            client.username = username
+            client.last_seen = time.monotonic()
+            if not self.clients.register(writer, client):
+                writer.write(codec.frame(f"[Сервер] Имя {username} уже занято, выберите другое".encode('utf-8')))
+                writer.close()
+                return
+
+            client.sender_task = asyncio.create_task(self.send_loop(client))
+
+            # Уведомляем о новом пользователе
+            join_message = f"🎉 {username} присоединился(ась) к чату!"
+            self.broadcast(join_message, room=client.room)
+            print(f"Новый пользователь: {username} ({client_address})")
+
+            # Отправляем приветственное сообщение
+            welcome_msg = f"[Сервер] Добро пожаловать в чат, {username}! Участников онлайн: {len(self.clients)}"
+            self.enqueue(client, EncodedMessage(welcome_msg))
+            self.replay_history(client)
+
+            # Основной цикл обработки сообщений
+            while self.running and client.writer in self.clients:
+                if not pending:
+                    data = await reader.read(RECV_SIZE)
+                    if not data:
+                        break
+                    client.last_seen = time.monotonic()
+                    pending.extend(codec.feed(data))
+                    continue
+
+                message = pending.popleft()
+
+                if message.strip().lower() == '/quit':
+                    break
+
+                if self.handle_command(client, message):
+                    continue
+
+                # Транслируем сообщение всем участникам комнаты
+                self.publish(client, message)
+                print(f"Сообщение от {username}: {message}")
+
+        except ConnectionError:
+            pass
+        except ProtocolError as e:
+            print(f"Нарушение протокола от {client_address}: {e}")
+        except Exception as e:
+            print(f"Ошибка обработки клиента {client_address}: {e}")
+        finally:
+            self.heartbeats.forget(client)
+            if client.sender_task is None:
+                # Клиент так и не зарегистрировался: remove_client его не знает, закрываем соединение здесь
+                writer.close()
+            else:
+                self.remove_client(client)
+
+    def get_server_info(self):
+        """Возвращает информацию о сервере"""
+        return (f"Сервер чата запущен на {self.host}:{self.port}\n"
+                f"Участников онлайн: {len(self.clients)}\n"
+                f"Отброшено сообщений: {self.dropped_messages}, "
+                f"отключено медленных клиентов: {self.slow_disconnects}\n"
+                f"Соединения: {self.heartbeats.stats()}")
+
+    async def serve(self):
+        """Открывает порт и обслуживает клиентов до остановки"""
+        self.server = await asyncio.start_server(
+            self.handle_client, self.host, self.port,
+            reuse_address=True, backlog=socket.SOMAXCONN
+        )
+        self.running = True
+        reaper = asyncio.create_task(self.reap_loop())
+
+        print("=" * 50)
+        print("МНОГОПОЛЬЗОВАТЕЛЬСКИЙ ЧАТ СЕРВЕР (asyncio)")
+        print("=" * 50)
+        print(f"Сервер запущен на {self.host}:{self.port}")
+        print(f"Очередь на клиента: {self.queue_size}, политика для медленных: {self.slow_policy}")
+        print("Для остановки сервера нажмите Ctrl+C")
+        print("=" * 50)
+
+        try:
+            async with self.server:
+                await self.server.serve_forever()
+        finally:
+            reaper.cancel()
+
+    def start(self):
+        """Запускает сервер"""
+        try:
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            print("\nОстановка сервера...")
+        except Exception as e:
+            print(f"Ошибка сервера: {e}")
+        finally:
+            self.running = False
+            print("Сервер остановлен")
@@ -0,0 +1,228 @@
+import argparse
+import os
+import re
+import resource
+import selectors
+import socket
+import subprocess
+import sys
+import time
+
+
+# Каждое сообщение нагрузочных клиентов несет время отправки: "load #<ns>;"
+MARKER_RE = re.compile(rb'#(\d+);')
+
+
+def raise_fd_limit():
+    """Поднимает лимит открытых файлов до максимума (наследуется сервером)"""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    return hard
+
+
+def read_rss_mb(pid):
+    """Возвращает RSS процесса и его воркеров в мегабайтах (только Linux)"""
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children', encoding='utf-8') as file:
+            children = [int(child) for child in file.read().split()]
+        with open(f'/proc/{pid}/status', encoding='utf-8') as file:
+            for line in file:
+                if line.startswith('VmRSS:'):
+                    rss = int(line.split()[1]) / 1024
+                    break
+            else:
+                return None
+    except OSError:
+        return None
+    return rss + sum(read_rss_mb(child) or 0 for child in children)
+
+
+def start_server(engine, port, workers=1):
+    """Запускает сервер чата отдельным процессом и ждет открытия порта"""
+    server_dir = os.path.dirname(os.path.abspath(__file__))
+    process = subprocess.Popen(
+        [sys.executable, 'chat_server.py', '--engine', engine, '--port', str(port),
+         '--workers', str(workers)],
+        cwd=server_dir,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        try:
+            socket.create_connection(('localhost', port), timeout=1).close()
+            return process
+        except OSError:
+            time.sleep(0.1)
+
+    process.kill()
+    raise RuntimeError(f"Сервер {engine} не запустился на порту {port}")
+
+
+class LoadClients:
+    """Набор неблокирующих клиентов, обслуживаемых одним селектором"""
+
+    def __init__(self, port):
+        self.port = port
+        self.selector = selectors.DefaultSelector()
+        self.sockets = []
+        self.delivered = 0
+        self.latencies = []
+
+    def connect(self, count, prefix, stalled=False):
+        """Подключает клиентов и представляется серверу"""
+        created = []
+        for i in range(count):
+            client_socket = socket.create_connection(('localhost', self.port))
+            client_socket.sendall(f"{prefix}{i}".encode('utf-8'))
+            client_socket.setblocking(False)
+            if stalled:
+                # Зависший клиент ничего не читает, и его буфер быстро заполняется
+                client_socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+            else:
+                self.selector.register(client_socket, selectors.EVENT_READ)
+            created.append(client_socket)
+
+            # Регулярно вычитываем уведомления о входе, чтобы сервер не блокировался
+            if i % 100 == 0:
+                self.pump(0)
+
+        self.sockets.extend(created)
+        return created
+
+    def pump(self, timeout):
+        """Читает все доступные данные и считает доставленные сообщения"""
+        for key, _ in self.selector.select(timeout):
+            try:
+                data = key.fileobj.recv(65536)
+            except BlockingIOError:
+                continue
+            except OSError:
+                self.selector.unregister(key.fileobj)
+                continue
+
+            now = time.time_ns()
+            for sent_at in MARKER_RE.findall(data):
+                self.delivered += 1
+                self.latencies.append(now - int(sent_at))
+
+    def drain(self, seconds):
+        """Вычитывает входящие данные в течение заданного времени"""
+        deadline = time.time() + seconds
+        while time.time() < deadline:
+            self.pump(0.05)
+
+    def close(self):
+        for client_socket in self.sockets:
+            client_socket.close()
+        self.selector.close()
+
+
+def percentile_ms(values, percent):
+    """Перцентиль задержки в миллисекундах"""
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(len(values) - 1, int(len(values) * percent / 100))
+    return values[index] / 1_000_000
+
+
+def run_scenario(engine, idle_count, chatty_count, stalled_count, rate, duration, port, workers=1):
+    """Прогоняет один сценарий: N молчащих, M активных и K зависших клиентов"""
+    server = start_server(engine, port, workers)
+    clients = LoadClients(port)
+
+    try:
+        started = time.time()
+        clients.connect(idle_count, 'idle')
+        clients.connect(stalled_count, 'stalled', stalled=True)
+        chatty = clients.connect(chatty_count, 'chatty')
+        clients.drain(1.0)
+        connect_time = time.time() - started
+        idle_rss = read_rss_mb(server.pid)
+
+        # Фаза активной переписки
+        clients.delivered = 0
+        clients.latencies = []
+        sent = 0
+        errors = 0
+        interval = 1.0 / rate
+        next_send = time.time()
+        deadline = time.time() + duration
+
+        while time.time() < deadline:
+            if time.time() >= next_send:
+                for client_socket in chatty:
+                    try:
+                        client_socket.send(f"load #{time.time_ns()};".encode('utf-8'))
+                        sent += 1
+                    except BlockingIOError:
+                        pass
+                    except OSError:
+                        errors += 1
+                next_send += interval
+            clients.pump(0.001)
+
+        peak_rss = read_rss_mb(server.pid)
+        clients.drain(1.0)
+
+        return {
+            'engine': engine if workers == 1 else f"{engine}x{workers}",
+            'clients': idle_count + chatty_count + stalled_count,
+            'connect_s': connect_time,
+            'idle_rss_mb': idle_rss,
+            'sent_per_s': sent / duration,
+            'delivered_per_s': clients.delivered / duration,
+            'rss_mb': peak_rss,
+            'p50_ms': percentile_ms(clients.latencies, 50),
+            'p99_ms': percentile_ms(clients.latencies, 99),
+            'errors': errors,
+        }
+    finally:
+        clients.close()
+        server.terminate()
+        server.wait()
+
+
+def format_number(value):
+    return f"{value:.1f}" if value is not None else "n/a"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный тест сервера чата")
+    parser.add_argument('--engines', default='threads,selectors,asyncio', help="движки через запятую")
+    parser.add_argument('--clients', default='1000,5000,10000', help="числа молчащих клиентов")
+    parser.add_argument('--chatty', type=int, default=20, help="число активных клиентов")
+    parser.add_argument('--stalled', type=int, default=0, help="число клиентов, которые не читают сообщения")
+    parser.add_argument('--rate', type=float, default=5, help="сообщений в секунду от активного клиента")
+    parser.add_argument('--duration', type=float, default=10, help="длительность фазы переписки, с")
+    parser.add_argument('--workers', default='1',
+                        help="числа процессов-воркеров через запятую, например 1,2,4,8 (только selectors)")
+    parser.add_argument('--port', type=int, default=5151)
+    args = parser.parse_args()
+
+    fd_limit = raise_fd_limit()
+    print(f"Лимит открытых файлов: {fd_limit}, ядер: {os.cpu_count()}")
+    print(f"{'движок':<12} {'клиенты':>8} {'подкл, с':>9} {'RSS idle':>9} "
+          f"{'отпр/с':>8} {'доставл/с':>10} {'p50, мс':>8} {'p99, мс':>8} {'RSS, МБ':>8} {'ошибки':>7}")
+
+    scenarios = [
+        (engine, workers)
+        for engine in args.engines.split(',')
+        for workers in map(int, args.workers.split(','))
+        if workers == 1 or engine == 'selectors'
+    ]
+    for engine, workers in scenarios:
+        for idle_count in map(int, args.clients.split(',')):
+            result = run_scenario(engine, idle_count, args.chatty, args.stalled,
+                                  args.rate, args.duration, args.port, workers)
+            print(f"{result['engine']:<12} {result['clients']:>8} {result['connect_s']:>9.1f} "
+                  f"{format_number(result['idle_rss_mb']):>9} {result['sent_per_s']:>8.0f} "
+                  f"{result['delivered_per_s']:>10.0f} {format_number(result['p50_ms']):>8} "
+                  f"{format_number(result['p99_ms']):>8} {format_number(result['rss_mb']):>8} {result['errors']:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,47 +1,84 @@
+import argparse
 import socket
 import threading
 import time
 import sys
 
+from chat_protocol import HELLO, PONG_FRAME, FramedCodec, LegacyCodec
+
 
 class ChatClient:
-    def __init__(self, host='localhost', port=5050):
+    def __init__(self, host='localhost', port=5050, legacy=False):
         self.host = host
         self.port = port
         self.socket = None
         self.username = None
         self.running = False
+        self.send_lock = threading.Lock()  # Ответы на пинги и ввод пользователя идут из разных потоков
+        # Новый протокол с кадрами; legacy - для старых серверов без кадров
+        self.codec = LegacyCodec() if legacy else FramedCodec()
 
     def receive_messages(self):
         """Поток для получения сообщений от сервера"""
         while self.running:
             try:
-                message = self.socket.recv(1024).decode('utf-8')
-                if not message:
+                data = self.socket.recv(4096)
+                if not data:
                     print("\nСоединение с сервером разорвано")
                     break
-                print(f"\r{message}\n[Вы]: ", end="")
+                for message in self.codec.feed(data):
+                    print(f"\r{message}\n[Вы]: ", end="")
+                if self.codec.pings:
+                    # Сервер проверяет, живо ли соединение
+                    with self.send_lock:
+                        self.socket.sendall(PONG_FRAME * self.codec.pings)
+                    self.codec.pings = 0
             except:
                 break
 
     def send_message(self, message):
         """Отправляет сообщение на сервер"""
         try:
-            self.socket.send(message.encode('utf-8'))
+            with self.send_lock:
+                self.socket.sendall(self.codec.frame(message.encode('utf-8')))
             return True
         except:
             return False
 
+    def negotiate(self):
+        """Договаривается с сервером о протоколе с кадрами"""
+        self.socket.sendall(HELLO)
+        self.socket.settimeout(5)
+        try:
+            answer = b''
+            while len(answer) < len(HELLO):
+                chunk = self.socket.recv(len(HELLO) - len(answer))
+                if not chunk:
+                    break
+                answer += chunk
+        except socket.timeout:
+            answer = b''
+        finally:
+            self.socket.settimeout(None)
+
+        if answer != HELLO:
+            print("Сервер не поддерживает протокол с кадрами, запустите клиент с флагом --legacy")
+            return False
+        return True
+
     def connect(self):
         """Подключается к серверу"""
         try:
             self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             self.socket.connect((self.host, self.port))
-            return True
         except:
             print(f"Не удалось подключиться к серверу {self.host}:{self.port}")
             return False
 
+        if self.codec.framed:
+            return self.negotiate()
+        return True
+
     def start(self):
         """Запускает клиент"""
         print("=" * 50)
@@ -73,6 +110,11 @@ class ChatClient:
         print("Команды:")
         print("  /quit - выйти из чата")
         print("  /users - показать участников онлайн")
+        print("  /msg <имя> <текст> - личное сообщение")
+        print("  /join <комната> - перейти в комнату, /leave - вернуться в общую")
+        print("  /rooms - список комнат")
+        print("  /history <n> - показать более ранние сообщения комнаты")
+        print("  /stats - счетчики пингов и отключенных сервером соединений")
         print("=" * 50)
         print()
 
@@ -87,12 +129,9 @@ class ChatClient:
                 if message.lower() == '/quit':
                     self.send_message('/quit')
                     break
-                elif message.lower() == '/users':
-                    print("Информация о пользователях недоступна в этой версии")
-                else:
-                    if not self.send_message(message):
-                        print("Ошибка отправки сообщения")
-                        break
+                elif not self.send_message(message):
+                    print("Ошибка отправки сообщения")
+                    break
 
         except KeyboardInterrupt:
             print("\nВыход из чата...")
@@ -103,6 +142,17 @@ class ChatClient:
             print("Чат завершен")
 
 
+def main():
+    parser = argparse.ArgumentParser(description="Клиент многопользовательского чата")
+    parser.add_argument('--host', default='localhost', help="адрес сервера")
+    parser.add_argument('--port', type=int, default=5050, help="порт сервера")
+    parser.add_argument('--legacy', action='store_true',
+                        help="старый протокол без кадров (для старых версий сервера)")
+    args = parser.parse_args()
+
+    client = ChatClient(args.host, args.port, args.legacy)
+    client.start()
+
+
 if __name__ == "__main__":
-    client = ChatClient()
-    client.start()
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,326 @@
+import multiprocessing
+import os
+import selectors
+import signal
+import socket
+import tempfile
+import time
+
+from chat_protocol import FRAME_HEADER, MAX_FRAME_SIZE, FramedCodec, ProtocolError
+from chat_reactor import ClientConnection, SelectorChatServer
+from chat_registry import DEFAULT_ROOM
+
+
+BUS_RECV_SIZE = 256 * 1024
+MAX_BUS_BACKLOG = 64 * 1024 * 1024  # Воркер, отставший на столько байт, отключается от шины
+QUICK_EXIT = 5.0  # Воркер, завершившийся быстрее, считается не запустившимся
+RESPAWN_DELAY = 0.5  # Пауза перед перезапуском после первого быстрого падения, дальше удваивается
+MAX_RESPAWN_DELAY = 30.0
+MAX_QUICK_FAILURES = 5  # После стольких быстрых падений подряд кластер останавливается
+
+
+class BusLink:
+    """Подключение воркера к шине на стороне супервизора"""
+
+    def __init__(self, link_socket):
+        self.socket = link_socket
+        self.inbox = bytearray()
+        self.outbox = bytearray()
+
+
+class BusHub:
+    """Шина между воркерами: кадры одного воркера пересылаются всем остальным.
+
+    Работает в процессе-супервизоре на Unix-сокете. Кадры не разбираются:
+    хаб находит их границы по заголовку и копирует целые кадры в очереди
+    остальных воркеров, поэтому сообщения разных воркеров не перемешиваются.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.selector = selectors.DefaultSelector()
+        self.links = {}  # {socket: BusLink}
+        self.server_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server_socket.bind(path)
+        self.server_socket.listen(socket.SOMAXCONN)
+        self.server_socket.setblocking(False)
+        self.selector.register(self.server_socket, selectors.EVENT_READ, None)
+
+    def poll(self, timeout):
+        """Обрабатывает события шины за одно ожидание"""
+        for key, mask in self.selector.select(timeout):
+            if key.data is None:
+                self.accept_links()
+                continue
+            if mask & selectors.EVENT_READ:
+                self.handle_read(key.data)
+            if mask & selectors.EVENT_WRITE and key.data.socket.fileno() != -1:
+                self.handle_write(key.data)
+
+    def accept_links(self):
+        while True:
+            try:
+                link_socket, _ = self.server_socket.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            link_socket.setblocking(False)
+            link = BusLink(link_socket)
+            self.links[link_socket] = link
+            self.selector.register(link_socket, selectors.EVENT_READ, link)
+
+    def handle_read(self, link):
+        try:
+            data = link.socket.recv(BUS_RECV_SIZE)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b''
+        if not data:
+            self.remove_link(link)
+            return
+
+        inbox = link.inbox
+        inbox += data
+        # Ищем конец последнего полностью принятого кадра
+        end = 0
+        while len(inbox) - end >= FRAME_HEADER.size:
+            _, length = FRAME_HEADER.unpack_from(inbox, end)
+            if length > MAX_FRAME_SIZE:
+                print(f"Шина: слишком большой кадр ({length} байт), воркер отключен")
+                self.remove_link(link)
+                return
+            if end + FRAME_HEADER.size + length > len(inbox):
+                break
+            end += FRAME_HEADER.size + length
+
+        if end:
+            frames = bytes(inbox[:end])
+            del inbox[:end]
+            for other in list(self.links.values()):
+                if other is not link:
+                    self.write(other, frames)
+
+    def write(self, link, data):
+        if not link.outbox:
+            try:
+                sent = link.socket.send(data)
+            except BlockingIOError:
+                sent = 0
+            except OSError:
+                self.remove_link(link)
+                return
+            if sent == len(data):
+                return
+            data = data[sent:]
+            self.selector.modify(link.socket, selectors.EVENT_READ | selectors.EVENT_WRITE, link)
+
+        link.outbox += data
+        if len(link.outbox) > MAX_BUS_BACKLOG:
+            print("Шина: воркер не успевает читать рассылки и будет отключен")
+            self.remove_link(link)
+
+    def handle_write(self, link):
+        try:
+            sent = link.socket.send(link.outbox)
+        except BlockingIOError:
+            return
+        except OSError:
+            self.remove_link(link)
+            return
+        del link.outbox[:sent]
+        if not link.outbox:
+            self.selector.modify(link.socket, selectors.EVENT_READ, link)
+
+    def remove_link(self, link):
+        if self.links.pop(link.socket, None) is None:
+            return
+        self.selector.unregister(link.socket)
+        link.socket.close()
+
+    def close(self):
+        for link in list(self.links.values()):
+            self.remove_link(link)
+        self.selector.close()
+        self.server_socket.close()
+        os.unlink(self.path)
+
+
+class ClusterChatServer(SelectorChatServer):
+    """Воркер кластера: реактор, который делит порт с другими воркерами.
+
+    Ядро раскладывает подключения по воркерам (SO_REUSEPORT), а каждая
+    рассылка в комнату кроме локальных участников уходит в шину и
+    доставляется участникам этой комнаты на остальных воркерах.
+    /users и /msg видят только пользователей своего воркера.
+    """
+
+    def __init__(self, host, port, bus_path, worker_id):
+        super().__init__(host, port)
+        self.bus_path = bus_path
+        self.worker_id = worker_id
+        self.bus = None
+        self.bus_codec = FramedCodec()
+
+    def create_server_socket(self):
+        server_socket = super().create_server_socket()
+        server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        return server_socket
+
+    def listen(self):
+        """Открывает общий порт и подключается к шине"""
+        super().listen()
+        bus_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        bus_socket.connect(self.bus_path)
+        bus_socket.setblocking(False)
+        self.bus = ClientConnection(bus_socket, self.bus_path)
+        self.bus.max_outbox_size = MAX_BUS_BACKLOG
+        self.selector.register(bus_socket, selectors.EVENT_READ, self.bus)
+
+    def print_banner(self):
+        print(f"Воркер {self.worker_id} (pid {os.getpid()}) принимает подключения на {self.host}:{self.port}")
+
+    def broadcast(self, message, sender=None, room=DEFAULT_ROOM):
+        """Рассылает сообщение участникам комнаты на этом и остальных воркерах"""
+        super().broadcast(message, sender, room)
+        if self.bus is None or self.bus.socket.fileno() == -1:
+            return
+        # Название комнаты не содержит пробелов, поэтому перевод строки - надежный разделитель
+        try:
+            self.write(self.bus, self.bus_codec.frame(f"{room}\n{message}".encode('utf-8')))
+        except OSError:
+            self.remove_client(self.bus)
+
+    def handle_read(self, connection):
+        if connection is not self.bus:
+            super().handle_read(connection)
+            return
+
+        try:
+            data = self.bus.socket.recv(BUS_RECV_SIZE)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b''
+        if not data:
+            self.remove_client(self.bus)
+            return
+
+        try:
+            payloads = self.bus_codec.feed(data)
+        except ProtocolError as e:
+            print(f"Ошибка протокола шины: {e}")
+            self.remove_client(self.bus)
+            return
+
+        for payload in payloads:
+            room, message = payload.split('\n', 1)
+            # Сообщение с другого воркера доставляется только своим участникам
+            super().broadcast(message, room=room)
+
+    def remove_client(self, connection):
+        if connection is not self.bus:
+            super().remove_client(connection)
+            return
+        if self.bus.socket.fileno() == -1:
+            return
+        # Без шины воркер разошелся бы с остальными - останавливаем его
+        print(f"Воркер {self.worker_id}: шина недоступна, остановка")
+        self.selector.unregister(self.bus.socket)
+        self.bus.socket.close()
+        self.running = False
+
+
+def run_worker(host, port, bus_path, worker_id):
+    """Точка входа процесса-воркера"""
+    ClusterChatServer(host, port, bus_path, worker_id).start()
+
+
+class ChatCluster:
+    """Супервизор: запускает воркеры на одном порту и держит шину между ними"""
+
+    def __init__(self, host='localhost', port=5050, workers=os.cpu_count() or 1):
+        self.host = host
+        self.port = port
+        self.worker_count = workers
+        self.workers = []  # Процессы воркеров; None - воркер ждет перезапуска
+        self.started = []  # Когда запущен каждый воркер, time.monotonic()
+        self.failures = []  # Быстрых падений подряд у каждого воркера
+        self.restart_at = []  # Когда перезапускать упавший воркер
+        self.running = False
+        # spawn: воркеры не наследуют сокеты шины и состояние супервизора
+        self.context = multiprocessing.get_context('spawn')
+
+    def spawn_worker(self, worker_id, bus_path):
+        process = self.context.Process(target=run_worker, args=(self.host, self.port, bus_path, worker_id),
+                                       name=f"chat-worker-{worker_id}")
+        process.start()
+        return process
+
+    def check_workers(self, bus_path):
+        """Перезапускает завершившиеся воркеры.
+
+        Воркер, упавший сразу после запуска (например, порт занят), перезапускается
+        с растущей паузой, а после MAX_QUICK_FAILURES таких падений подряд
+        кластер останавливается, а не плодит процессы в цикле.
+        """
+        now = time.monotonic()
+        for i, process in enumerate(self.workers):
+            if process is None:
+                if now >= self.restart_at[i]:
+                    self.workers[i] = self.spawn_worker(i, bus_path)
+                    self.started[i] = now
+                continue
+            if process.is_alive():
+                continue
+
+            self.failures[i] = self.failures[i] + 1 if now - self.started[i] < QUICK_EXIT else 0
+            if self.failures[i] >= MAX_QUICK_FAILURES:
+                print(f"Воркер {i} завершился (код {process.exitcode}) {self.failures[i]} раз подряд "
+                      f"сразу после запуска, остановка сервера")
+                self.running = False
+                return
+            delay = min(RESPAWN_DELAY * 2 ** (self.failures[i] - 1), MAX_RESPAWN_DELAY) if self.failures[i] else 0
+            print(f"Воркер {i} завершился (код {process.exitcode}), перезапуск через {delay:.1f} с")
+            self.workers[i] = None
+            self.restart_at[i] = now + delay
+
+    def stop(self, signum=None, frame=None):
+        self.running = False
+
+    def start(self):
+        """Запускает воркеры и обслуживает шину, пока сервер не остановят"""
+        bus_dir = tempfile.mkdtemp(prefix='chat-bus-')
+        hub = BusHub(os.path.join(bus_dir, 'bus.sock'))
+        signal.signal(signal.SIGTERM, self.stop)
+
+        print("=" * 50)
+        print(f"МНОГОПОЛЬЗОВАТЕЛЬСКИЙ ЧАТ СЕРВЕР (воркеров: {self.worker_count}, SO_REUSEPORT)")
+        print("=" * 50)
+        print(f"Сервер запущен на {self.host}:{self.port}")
+        print(f"Шина между воркерами: {hub.path}")
+        print("Для остановки сервера нажмите Ctrl+C")
+        print("=" * 50)
+
+        try:
+            self.workers = [self.spawn_worker(i, hub.path) for i in range(self.worker_count)]
+            self.started = [time.monotonic()] * self.worker_count
+            self.failures = [0] * self.worker_count
+            self.restart_at = [0.0] * self.worker_count
+            self.running = True
+            while self.running:
+                hub.poll(timeout=RESPAWN_DELAY)
+                if self.running:
+                    self.check_workers(hub.path)
+        except KeyboardInterrupt:
+            print("\nОстановка сервера...")
+        finally:
+            self.running = False
+            processes = [process for process in self.workers if process is not None]
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+            for process in processes:
+                process.join()
+            hub.close()
+            os.rmdir(bus_dir)
+            print("Сервер остановлен")
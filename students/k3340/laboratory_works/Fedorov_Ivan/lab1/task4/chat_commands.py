@@ -0,0 +1,108 @@
+from chat_protocol import current_timestamp
+from chat_registry import DEFAULT_ROOM, MAX_ROOM_NAME
+
+
+MAX_HISTORY_PAGE = 100
+
+
+class ChatCommands:
+    """Команды чата, общие для всех движков сервера.
+
+    Движок хранит клиентов в self.clients (ClientRegistry), историю в
+    self.history (ChatHistory или None), пинги и счетчики отключений в
+    self.heartbeats (Heartbeats), умеет отправить текст одному клиенту
+    через send_private(client, text) и разослать его комнате через
+    broadcast(message, sender, room).
+    """
+
+    def publish(self, client, message):
+        """Рассылает сообщение пользователя в его комнату и сохраняет в истории"""
+        chat_message = f"{client.username}: {message}"
+        if self.history is not None:
+            self.history.record(client.room, f"[{current_timestamp()}] {chat_message}")
+        self.broadcast(chat_message, client, client.room)
+
+    def replay_history(self, client):
+        """Отправляет вошедшему последние сообщения комнаты из памяти"""
+        if self.history is None:
+            return
+        messages, client.history_cursor = self.history.replay(client.room)
+        for text in messages:
+            self.send_private(client, text)
+
+    def handle_command(self, client, message):
+        """Выполняет команду; False, если сообщение не является командой"""
+        parts = message.strip().split(maxsplit=2)
+        if not parts:
+            return False
+        command = parts[0].lower()
+
+        if command == '/users':
+            usernames = self.clients.usernames()
+            self.send_private(client, f"[Сервер] Участники онлайн ({len(usernames)}): {', '.join(usernames)}")
+            return True
+
+        if command == '/msg':
+            if len(parts) < 3:
+                self.send_private(client, "[Сервер] Использование: /msg <имя> <сообщение>")
+                return True
+
+            target = self.clients.find(parts[1])
+            if target is None:
+                self.send_private(client, f"[Сервер] Пользователь {parts[1]} не в сети")
+                return True
+
+            timestamp = current_timestamp()
+            self.send_private(target, f"[{timestamp}] [ЛС от {client.username}] {parts[2]}")
+            self.send_private(client, f"[{timestamp}] [ЛС для {target.username}] {parts[2]}")
+            return True
+
+        if command == '/stats':
+            self.send_private(client, f"[Сервер] Онлайн: {len(self.clients)}, {self.heartbeats.stats()}")
+            return True
+
+        if command == '/rooms':
+            rooms = ', '.join(f"{room} ({size})" for room, size in self.clients.room_sizes())
+            self.send_private(client, f"[Сервер] Комнаты: {rooms}. Вы в комнате {client.room}")
+            return True
+
+        if command == '/join':
+            if len(parts) < 2 or len(parts[1]) > MAX_ROOM_NAME:
+                self.send_private(client, f"[Сервер] Использование: /join <комната> (до {MAX_ROOM_NAME} символов)")
+                return True
+            self.switch_room(client, parts[1])
+            return True
+
+        if command == '/leave':
+            self.switch_room(client, DEFAULT_ROOM)
+            return True
+
+        if command == '/history':
+            if self.history is None:
+                self.send_private(client, "[Сервер] История на сервере отключена")
+                return True
+            try:
+                count = min(int(parts[1]) if len(parts) > 1 else 20, MAX_HISTORY_PAGE)
+            except ValueError:
+                self.send_private(client, "[Сервер] Использование: /history <количество>")
+                return True
+
+            messages, client.history_cursor = self.history.page(client.room, client.history_cursor, count)
+            if not messages:
+                self.send_private(client, "[Сервер] Более ранних сообщений нет")
+            for text in messages:
+                self.send_private(client, text)
+            return True
+
+        return False
+
+    def switch_room(self, client, room):
+        """Переводит клиента в комнату и уведомляет обе комнаты"""
+        if room == client.room:
+            self.send_private(client, f"[Сервер] Вы уже в комнате {room}")
+            return
+
+        old_room = self.clients.move(client, room)
+        self.broadcast(f"⬅ {client.username} вышел(ла) из комнаты", room=old_room)
+        self.broadcast(f"➡ {client.username} вошел(ла) в комнату {room}", room=room)
+        self.replay_history(client)
@@ -0,0 +1,108 @@
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.timer_wheel import TimerWheel
+
+
+HEARTBEAT_INTERVAL = 30.0  # Молчание клиента, после которого ему отправляется пинг
+PONG_TIMEOUT = 10.0  # Сколько ждать ответа на пинг
+LOGIN_TIMEOUT = 10.0  # Сколько ждать имени после подключения
+STALL_TIMEOUT = 30.0  # Сколько клиент может не забирать данные из сокета
+
+
+class Heartbeats:
+    """Пинги и отключение зависших клиентов, общие для всех движков чата.
+
+    Движок регистрирует подключение через track(), при каждом приеме данных
+    обновляет client.last_seen, а пока отправка клиенту стоит - хранит время
+    ее начала в client.send_blocked_since. На каждого клиента в колесе один
+    таймер; активные клиенты его не переставляют, поэтому тик стоит
+    O(сработавших таймеров), а не O(всех клиентов).
+    """
+
+    def __init__(self, ping, reap, interval=HEARTBEAT_INTERVAL, pong_timeout=PONG_TIMEOUT,
+                 login_timeout=LOGIN_TIMEOUT, stall_timeout=STALL_TIMEOUT, tick=1.0):
+        self.ping = ping  # ping(client) - отправить клиенту PING_FRAME
+        self.reap = reap  # reap(client) - разорвать соединение
+        self.interval = interval
+        self.pong_timeout = pong_timeout
+        self.login_timeout = login_timeout
+        self.stall_timeout = stall_timeout
+        self.wheel = TimerWheel(tick, slots=int(max(interval, login_timeout, stall_timeout) / tick) + 2)
+        self.lock = threading.Lock()
+
+        self.pings_sent = 0
+        self.reaped = {'idle': 0, 'stalled': 0, 'login': 0}
+
+    def track(self, client):
+        """Начинает следить за новым подключением"""
+        now = time.monotonic()
+        client.connected_at = now
+        client.last_seen = now
+        client.ping_sent_at = None
+        client.send_blocked_since = None
+        with self.lock:
+            client.heartbeat_tracked = True
+            self.wheel.schedule(client, self.login_timeout)
+
+    def forget(self, client):
+        """Снимает таймер закрытого подключения"""
+        with self.lock:
+            client.heartbeat_tracked = False
+            self.wheel.cancel(client)
+
+    def tick(self):
+        """Проверяет клиентов, чьи таймеры сработали"""
+        now = time.monotonic()
+        for client in self.wheel.advance(now):
+            delay = self.check(client, now)
+            if delay is None:
+                self.reap(client)
+                continue
+            with self.lock:
+                # Клиента могли закрыть, пока шла проверка
+                if client.heartbeat_tracked:
+                    self.wheel.schedule(client, delay)
+
+    def check(self, client, now):
+        """Возвращает, через сколько проверить клиента снова; None - клиента пора отключить"""
+        blocked = client.send_blocked_since
+        if blocked is not None and now - blocked >= self.stall_timeout:
+            self.reaped['stalled'] += 1
+            return None
+
+        if client.username is None:
+            waited = now - client.connected_at
+            if waited >= self.login_timeout:
+                self.reaped['login'] += 1
+                return None
+            return self.login_timeout - waited
+
+        idle = now - client.last_seen
+        if idle < self.interval:
+            delay = self.interval - idle
+        elif not client.codec.framed:
+            # Старый протокол не знает пингов: такие клиенты проверяются только на зависшую отправку
+            delay = self.interval
+        elif client.ping_sent_at is None or client.ping_sent_at < client.last_seen:
+            client.ping_sent_at = now
+            self.pings_sent += 1
+            self.ping(client)
+            delay = self.pong_timeout
+        elif now - client.ping_sent_at >= self.pong_timeout:
+            self.reaped['idle'] += 1
+            return None
+        else:
+            delay = self.pong_timeout - (now - client.ping_sent_at)
+
+        if blocked is not None:
+            delay = min(delay, self.stall_timeout - (now - blocked))
+        return delay
+
+    def stats(self):
+        return (f"отправлено пингов: {self.pings_sent}, отключено без ответа на пинг: {self.reaped['idle']}, "
+                f"зависших: {self.reaped['stalled']}, без входа: {self.reaped['login']}")
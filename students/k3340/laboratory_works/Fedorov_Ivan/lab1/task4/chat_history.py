@@ -0,0 +1,244 @@
+import mmap
+import os
+import struct
+import threading
+from array import array
+from collections import deque
+
+
+RECORD_HEADER = struct.Struct('!HI')  # длина названия комнаты, длина текста
+SEGMENT_SIZE = 4 * 1024 * 1024
+OFFSET_BITS = 40  # Позиция записи: номер сегмента << 40 | смещение в сегменте
+OFFSET_MASK = (1 << OFFSET_BITS) - 1
+
+
+class MessageLog:
+    """Журнал сообщений на диске: только дописывание, сегменты по segment_size байт.
+
+    Для каждой комнаты в памяти хранится индекс позиций ее записей, поэтому
+    чтение старых сообщений - это переход по позиции, а не поиск по файлам.
+    Закрытые сегменты читаются через mmap.
+    """
+
+    def __init__(self, directory, segment_size=SEGMENT_SIZE):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.segment_size = segment_size
+        self.index = {}  # {room: array('Q') позиций}
+        self.maps = {}  # {segment_id: mmap}
+
+        segments = sorted(
+            int(name[len('segment-'):-len('.log')])
+            for name in os.listdir(directory)
+            if name.startswith('segment-') and name.endswith('.log')
+        )
+        for segment_id in segments:
+            self.scan(segment_id)
+
+        self.active_id = segments[-1] if segments else 1
+        self.active = open(self.segment_path(self.active_id), 'ab')
+        self.active_size = self.active.tell()
+
+    def segment_path(self, segment_id):
+        return os.path.join(self.directory, f'segment-{segment_id:06d}.log')
+
+    def scan(self, segment_id):
+        """Один раз при запуске строит индекс по сегменту"""
+        path = self.segment_path(segment_id)
+        size = os.path.getsize(path)
+        if size == 0:
+            return
+
+        offset = 0
+        with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            while offset + RECORD_HEADER.size <= size:
+                room_length, text_length = RECORD_HEADER.unpack_from(data, offset)
+                room_start = offset + RECORD_HEADER.size
+                end = room_start + room_length + text_length
+                if end > size:
+                    break
+
+                room = data[room_start:room_start + room_length].decode('utf-8')
+                self.index.setdefault(room, array('Q')).append(segment_id << OFFSET_BITS | offset)
+                offset = end
+
+        # Хвост, оборванный при аварийной остановке, отрезаем
+        if offset < size:
+            os.truncate(path, offset)
+
+    def write(self, records):
+        """Дописывает пачку записей [(room, text)] одним write и flush.
+
+        Пачка обрывается на конце сегмента. Возвращает позиции записанных
+        записей и их общий размер; в индекс и active_size они попадают
+        через commit, под блокировкой истории.
+        """
+        data = bytearray()
+        positions = []
+        for room, text in records:
+            room_bytes = room.encode('utf-8')
+            text_bytes = text.encode('utf-8')
+            positions.append(self.active_id << OFFSET_BITS | self.active_size + len(data))
+            data += RECORD_HEADER.pack(len(room_bytes), len(text_bytes))
+            data += room_bytes
+            data += text_bytes
+            if self.active_size + len(data) >= self.segment_size:
+                break
+        try:
+            self.active.write(data)
+            self.active.flush()
+        except OSError:
+            self.reopen()
+            raise
+        return positions, len(data)
+
+    def reopen(self):
+        """После неудачной записи отрезает недописанную пачку и открывает сегмент заново"""
+        try:
+            self.active.close()
+        except OSError:
+            pass  # Буфер с той же пачкой не сбросился, файл все равно закрыт
+        os.truncate(self.segment_path(self.active_id), self.active_size)
+        self.active = open(self.segment_path(self.active_id), 'ab')
+
+    def commit(self, records, positions, size):
+        """Заносит записанную пачку в индекс"""
+        self.active_size += size
+        for (room, _), position in zip(records, positions):
+            self.index.setdefault(room, array('Q')).append(position)
+
+    def rotate(self):
+        """Закрывает заполненный сегмент и начинает новый"""
+        self.active.close()
+        # Отображение могло быть снято, пока сегмент еще рос
+        stale = self.maps.pop(self.active_id, None)
+        if stale is not None:
+            stale.close()
+        self.active_id += 1
+        self.active = open(self.segment_path(self.active_id), 'ab')
+        self.active_size = 0
+
+    def mapping(self, segment_id):
+        """Возвращает mmap сегмента; активный сегмент переотображается, когда вырос"""
+        data = self.maps.get(segment_id)
+        if data is None or (segment_id == self.active_id and len(data) < self.active_size):
+            if data is not None:
+                data.close()
+            with open(self.segment_path(segment_id), 'rb') as file:
+                data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.maps[segment_id] = data
+        return data
+
+    def read(self, position):
+        """Читает текст записи по ее позиции"""
+        data = self.mapping(position >> OFFSET_BITS)
+        offset = position & OFFSET_MASK
+        room_length, text_length = RECORD_HEADER.unpack_from(data, offset)
+        start = offset + RECORD_HEADER.size + room_length
+        return data[start:start + text_length].decode('utf-8')
+
+    def count(self, room):
+        return len(self.index.get(room, ()))
+
+    def close(self):
+        self.active.close()
+        for data in self.maps.values():
+            data.close()
+        self.maps.clear()
+
+
+class ChatHistory:
+    """История чата: журнал на диске и последние сообщения каждой комнаты в памяти.
+
+    record не ждет диска: сообщение попадает в память, а в журнал его пачками
+    дописывает отдельный поток-писатель. Так медленный диск не останавливает
+    цикл событий, из которого вызывается record.
+    """
+
+    def __init__(self, directory, replay_size=20, segment_size=SEGMENT_SIZE):
+        self.lock = threading.Lock()
+        self.log = MessageLog(directory, segment_size)
+        self.replay_size = replay_size
+        self.unwritten = deque()  # [(room, text)] еще не записанные в журнал
+        self.unwritten_ready = threading.Condition(self.lock)
+        self.closed = False
+
+        # Кольцевые буферы заполняются из журнала один раз при запуске
+        self.recent = {}  # {room: deque(maxlen=replay_size)}
+        for room, positions in self.log.index.items():
+            tail = positions[max(0, len(positions) - replay_size):] if replay_size else []
+            self.recent[room] = deque((self.log.read(position) for position in tail), maxlen=replay_size)
+
+        self.writer = threading.Thread(target=self.write_loop, daemon=True)
+        self.writer.start()
+
+    def record(self, room, text):
+        """Сохраняет сообщение комнаты"""
+        with self.lock:
+            self.unwritten.append((room, text))
+            if len(self.unwritten) == 1:
+                self.unwritten_ready.notify()
+            if room not in self.recent:
+                self.recent[room] = deque(maxlen=self.replay_size)
+            self.recent[room].append(text)
+
+    def write_loop(self):
+        """Поток-писатель: дописывает в журнал все, что накопилось, пока писалась прошлая пачка"""
+        while True:
+            with self.lock:
+                while not self.unwritten and not self.closed:
+                    self.unwritten_ready.wait()
+                if not self.unwritten:
+                    return
+                if self.log.active_size >= self.log.segment_size:
+                    self.log.rotate()
+                batch = list(self.unwritten)
+
+            # Запись идет без блокировки: record и чтение истории ее не ждут
+            try:
+                positions, size = self.log.write(batch)
+            except OSError as e:
+                print(f"Сообщения не записаны в журнал истории: {e}")
+                with self.lock:
+                    for _ in batch:
+                        self.unwritten.popleft()
+                continue
+
+            with self.lock:
+                self.log.commit(batch, positions, size)
+                for _ in positions:
+                    self.unwritten.popleft()
+
+    def count(self, room):
+        """Сколько сообщений комнаты сохранено, включая еще не записанные"""
+        return self.log.count(room) + sum(1 for unwritten_room, _ in self.unwritten if unwritten_room == room)
+
+    def replay(self, room):
+        """Последние сообщения комнаты из памяти.
+
+        Возвращает сообщения и позицию, с которой /history листает дальше назад.
+        """
+        with self.lock:
+            messages = list(self.recent.get(room, ()))
+            return messages, self.count(room) - len(messages)
+
+    def page(self, room, before, count):
+        """Возвращает count сообщений комнаты перед позицией before и новую позицию"""
+        with self.lock:
+            positions = self.log.index.get(room, ())
+            start = max(0, before - count)
+            messages = [self.log.read(position) for position in positions[start:before]]
+            if before > len(positions):
+                # Конец страницы еще не записан и берется из очереди писателя
+                unwritten = [text for unwritten_room, text in self.unwritten if unwritten_room == room]
+                messages += unwritten[max(0, start - len(positions)):before - len(positions)]
+            return messages, start
+
+    def close(self):
+        """Дописывает очередь в журнал и закрывает его"""
+        with self.lock:
+            self.closed = True
+            self.unwritten_ready.notify()
+        self.writer.join()
+        with self.lock:
+            self.log.close()
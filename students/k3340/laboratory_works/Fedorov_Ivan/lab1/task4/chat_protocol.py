@@ -0,0 +1,171 @@
+import struct
+import time
+from datetime import datetime
+
+
+# Приветствие, которым новый клиент начинает соединение.
+# Старые клиенты сразу присылают имя, поэтому для них остается прежний протокол.
+HELLO = b'\x00CHAT/2\n'
+
+FRAME_MESSAGE = 1  # Одно сообщение: payload - текст в UTF-8
+FRAME_BATCH = 2  # Несколько сообщений: payload - записи [длина][текст]
+FRAME_PING = 3  # Проверка связи, пустой payload; получатель отвечает FRAME_PONG
+FRAME_PONG = 4
+
+FRAME_HEADER = struct.Struct('!BI')  # тип кадра и длина payload
+ITEM_HEADER = struct.Struct('!I')  # длина одного сообщения внутри пакета
+MAX_FRAME_SIZE = 1024 * 1024
+
+PING_FRAME = FRAME_HEADER.pack(FRAME_PING, 0)
+PONG_FRAME = FRAME_HEADER.pack(FRAME_PONG, 0)
+
+
+class ProtocolError(ValueError):
+    """Нарушение формата кадров"""
+
+
+class LegacyCodec:
+    """Старый протокол: каждый recv считается одним сообщением"""
+
+    framed = False
+    pings = 0  # Старый протокол не знает пингов
+
+    def feed(self, data):
+        """Возвращает сообщения из очередной порции байт"""
+        if not data:
+            return []
+        return [data.decode('utf-8', errors='replace')]
+
+    def frame(self, payload):
+        return payload
+
+    def frame_batch(self, payloads):
+        return b''.join(payloads)
+
+
+class FramedCodec:
+    """Протокол с кадрами: заголовок с длиной и UTF-8 текст"""
+
+    framed = True
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.pings = 0  # Принятые пинги, на которые владелец кодека еще не ответил
+
+    def feed(self, data):
+        """Добавляет байты в буфер и возвращает все полностью принятые сообщения"""
+        self.buffer += data
+        messages = []
+        offset = 0
+
+        while len(self.buffer) - offset >= FRAME_HEADER.size:
+            frame_type, length = FRAME_HEADER.unpack_from(self.buffer, offset)
+            if length > MAX_FRAME_SIZE:
+                raise ProtocolError(f"слишком большой кадр: {length} байт")
+
+            start = offset + FRAME_HEADER.size
+            end = start + length
+            if end > len(self.buffer):
+                break  # Кадр пришел не полностью, ждем остаток
+
+            payload = memoryview(self.buffer)[start:end]
+            try:
+                if frame_type == FRAME_MESSAGE:
+                    messages.append(str(payload, 'utf-8', errors='replace'))
+                elif frame_type == FRAME_BATCH:
+                    messages.extend(self.split_batch(payload))
+                elif frame_type == FRAME_PING:
+                    self.pings += 1
+                elif frame_type == FRAME_PONG:
+                    pass  # Ответ на пинг важен только как признак живого соединения
+                else:
+                    raise ProtocolError(f"неизвестный тип кадра: {frame_type}")
+            finally:
+                payload.release()
+            offset = end
+
+        del self.buffer[:offset]
+        return messages
+
+    @staticmethod
+    def split_batch(payload):
+        """Разбирает пакетный кадр на отдельные сообщения"""
+        messages = []
+        offset = 0
+
+        while offset < len(payload):
+            if offset + ITEM_HEADER.size > len(payload):
+                raise ProtocolError("обрезанная запись в пакетном кадре")
+            (length,) = ITEM_HEADER.unpack_from(payload, offset)
+            offset += ITEM_HEADER.size
+            if offset + length > len(payload):
+                raise ProtocolError("обрезанная запись в пакетном кадре")
+            messages.append(str(payload[offset:offset + length], 'utf-8', errors='replace'))
+            offset += length
+
+        return messages
+
+    def frame(self, payload):
+        """Оборачивает одно сообщение в кадр"""
+        return FRAME_HEADER.pack(FRAME_MESSAGE, len(payload)) + payload
+
+    def frame_batch(self, payloads):
+        """Объединяет несколько сообщений в один пакетный кадр"""
+        if len(payloads) == 1:
+            return self.frame(payloads[0])
+
+        parts = []
+        for payload in payloads:
+            parts.append(ITEM_HEADER.pack(len(payload)))
+            parts.append(payload)
+        body = b''.join(parts)
+        return FRAME_HEADER.pack(FRAME_BATCH, len(body)) + body
+
+
+class EncodedMessage:
+    """Сообщение, закодированное один раз для всех получателей.
+
+    Кадр для каждого протокола строится при первом обращении и дальше
+    раздается всем получателям как общий memoryview без копирования.
+    """
+
+    __slots__ = ('payload', 'frames')
+
+    def __init__(self, text):
+        self.payload = text.encode('utf-8')
+        self.frames = {}
+
+    def for_codec(self, codec):
+        view = self.frames.get(codec.framed)
+        if view is None:
+            view = memoryview(codec.frame(self.payload))
+            self.frames[codec.framed] = view
+        return view
+
+
+_timestamp_cache = (None, '')
+
+
+def current_timestamp():
+    """Время для сообщений в формате ЧЧ:ММ:СС, форматируется раз в секунду"""
+    global _timestamp_cache
+    second = int(time.time())
+    cached_second, text = _timestamp_cache
+    if cached_second != second:
+        text = datetime.fromtimestamp(second).strftime("%H:%M:%S")
+        _timestamp_cache = (second, text)
+    return text
+
+
+def detect_codec(data):
+    """Выбирает протокол по первым байтам соединения.
+
+    Возвращает кодек и оставшиеся после приветствия данные. Если пришло
+    только начало HELLO (TCP может разрезать приветствие), возвращает
+    (None, data): протокол еще не ясен, нужно дочитать и вызвать снова.
+    """
+    if data.startswith(HELLO):
+        return FramedCodec(), data[len(HELLO):]
+    if data and HELLO.startswith(data):
+        return None, data
+    return LegacyCodec(), data
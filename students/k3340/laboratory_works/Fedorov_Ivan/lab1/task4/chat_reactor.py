@@ -0,0 +1,305 @@
+import os
+import selectors
+import socket
+import time
+from collections import deque
+from itertools import islice
+
+from chat_commands import ChatCommands
+from chat_heartbeat import HEARTBEAT_INTERVAL, Heartbeats
+from chat_protocol import HELLO, PING_FRAME, EncodedMessage, ProtocolError, current_timestamp, detect_codec
+from chat_registry import DEFAULT_ROOM, ClientRegistry
+
+
+RECV_SIZE = 1024
+MAX_OUTBOX_SIZE = 1024 * 1024  # Клиент, не читающий мегабайт сообщений, отключается
+try:
+    IOV_MAX = os.sysconf('SC_IOV_MAX')  # Сколько буферов можно передать в один sendmsg
+except (AttributeError, ValueError, OSError):
+    IOV_MAX = 16
+
+
+class ClientConnection:
+    """Состояние одного подключения: сокет, имя, протокол и буферы исходящих данных"""
+
+    max_outbox_size = MAX_OUTBOX_SIZE
+
+    def __init__(self, client_socket, client_address):
+        self.socket = client_socket
+        self.address = client_address
+        self.username = None
+        self.room = None
+        self.history_cursor = 0
+        self.codec = None  # Определяется по первым байтам соединения
+        self.preamble = b''  # Начало приветствия, если оно пришло не целиком
+        self.outbox = deque()  # memoryview кадров, которые сокет еще не принял
+        self.outbox_size = 0
+        self.send_blocked_since = None  # Когда отправка клиенту перестала продвигаться
+        self.last_seen = None
+
+
+class SelectorChatServer(ChatCommands):
+    """Однопоточный чат сервер на selectors (epoll/kqueue) вместо потока на клиента"""
+
+    def __init__(self, host='localhost', port=5050, history=None, heartbeat=HEARTBEAT_INTERVAL):
+        self.host = host
+        self.port = port
+        self.clients = ClientRegistry()  # {socket: ClientConnection} - только представившиеся клиенты
+        self.history = history
+        self.heartbeats = Heartbeats(self.send_ping, self.remove_client, interval=heartbeat)
+        self.server_socket = None
+        self.selector = None
+        self.running = False
+
+    def write(self, connection, data):
+        """Пытается сразу отправить байты, остаток ставит в очередь клиента без копирования"""
+        data = memoryview(data)
+        if not connection.outbox:
+            try:
+                sent = connection.socket.send(data)
+            except BlockingIOError:
+                sent = 0
+            if sent == len(data):
+                return
+            data = data[sent:]
+            # Ждем, пока сокет снова станет доступен для записи
+            self.selector.modify(connection.socket, selectors.EVENT_READ | selectors.EVENT_WRITE, connection)
+            connection.send_blocked_since = time.monotonic()
+
+        connection.outbox.append(data)
+        connection.outbox_size += len(data)
+        if connection.outbox_size > connection.max_outbox_size:
+            raise ConnectionError("переполнен буфер отправки")
+
+    def send_to(self, connection, message):
+        """Отправляет клиенту общий для всех кадр сообщения в его протоколе"""
+        self.write(connection, message.for_codec(connection.codec))
+
+    def send_ping(self, connection):
+        """Проверяет, жив ли клиент, который давно молчит"""
+        try:
+            self.write(connection, PING_FRAME)
+        except OSError:
+            self.remove_client(connection)
+
+    def send_private(self, connection, text):
+        """Отправляет сообщение одному клиенту"""
+        try:
+            self.send_to(connection, EncodedMessage(text))
+        except OSError:
+            self.remove_client(connection)
+
+    def broadcast(self, message, sender=None, room=DEFAULT_ROOM):
+        """Отправляет сообщение всем участникам комнаты, кроме отправителя"""
+        # Кодируем один раз: все получатели ставят в очередь один и тот же буфер
+        data = EncodedMessage(f"[{current_timestamp()}] {message}")
+
+        disconnected_clients = []
+
+        for connection in self.clients.members(room):
+            if connection is sender:
+                continue
+            try:
+                self.send_to(connection, data)
+            except OSError:
+                disconnected_clients.append(connection)
+
+        # Удаляем отключенных клиентов
+        for connection in disconnected_clients:
+            self.remove_client(connection)
+
+    def remove_client(self, connection):
+        """Снимает клиента с селектора и закрывает сокет"""
+        client_socket = connection.socket
+        if client_socket.fileno() == -1:
+            return
+
+        self.heartbeats.forget(connection)
+        self.selector.unregister(client_socket)
+        client_socket.close()
+
+        if self.clients.unregister(client_socket) is not None:
+            # Уведомляем других пользователей
+            leave_message = f"⚡ {connection.username} покинул(а) чат"
+            self.broadcast(leave_message, room=connection.room)
+            print(f"Клиент отключен: {connection.username}")
+
+    def accept_clients(self):
+        """Принимает все ожидающие подключения за одно пробуждение"""
+        while True:
+            try:
+                client_socket, client_address = self.server_socket.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+
+            client_socket.setblocking(False)
+            connection = ClientConnection(client_socket, client_address)
+            self.selector.register(client_socket, selectors.EVENT_READ, connection)
+            self.heartbeats.track(connection)
+            print(f"Новое подключение от {client_address}")
+
+    def handle_read(self, connection):
+        """Обрабатывает данные, пришедшие от клиента"""
+        try:
+            data = connection.socket.recv(RECV_SIZE)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b''
+
+        if not data:
+            self.remove_client(connection)
+            return
+        connection.last_seen = time.monotonic()
+
+        try:
+            if connection.codec is None:
+                # По первым байтам определяем протокол: кадры или старый формат
+                connection.codec, data = detect_codec(connection.preamble + data)
+                if connection.codec is None:
+                    connection.preamble = data
+                    return
+                connection.preamble = b''
+                if connection.codec.framed:
+                    self.write(connection, HELLO)
+            messages = connection.codec.feed(data)
+        except (ProtocolError, OSError) as e:
+            print(f"Ошибка протокола от {connection.address}: {e}")
+            self.remove_client(connection)
+            return
+
+        for message in messages:
+            if connection.socket.fileno() == -1:
+                return
+
+            if connection.username is None:
+                self.register_client(connection, message.strip())
+                continue
+
+            if message.strip().lower() == '/quit':
+                self.remove_client(connection)
+                return
+
+            if self.handle_command(connection, message):
+                continue
+
+            # Транслируем сообщение всем участникам комнаты
+            self.publish(connection, message)
+            print(f"Сообщение от {connection.username}: {message}")
+
+    def register_client(self, connection, username):
+        """Регистрирует клиента по первому сообщению с именем"""
+        if not username:
+            self.remove_client(connection)
+            return
+
+        connection.username = username
+        if not self.clients.register(connection.socket, connection):
+            self.send_private(connection, f"[Сервер] Имя {username} уже занято, выберите другое")
+            self.remove_client(connection)
+            return
+
+        # Уведомляем о новом пользователе
+        join_message = f"🎉 {username} присоединился(ась) к чату!"
+        self.broadcast(join_message, room=connection.room)
+        print(f"Новый пользователь: {username} ({connection.address})")
+
+        # Отправляем приветственное сообщение
+        welcome_msg = f"[Сервер] Добро пожаловать в чат, {username}! Участников онлайн: {len(self.clients)}"
+        try:
+            self.send_to(connection, EncodedMessage(welcome_msg))
+        except OSError:
+            self.remove_client(connection)
+            return
+        self.replay_history(connection)
+
+    def handle_write(self, connection):
+        """Досылает очередь клиента: все накопленные кадры уходят одним sendmsg"""
+        outbox = connection.outbox
+        try:
+            if len(outbox) == 1 or not hasattr(connection.socket, 'sendmsg'):
+                sent = connection.socket.send(outbox[0])
+            else:
+                sent = connection.socket.sendmsg(list(islice(outbox, IOV_MAX)))
+        except BlockingIOError:
+            return
+        except OSError:
+            self.remove_client(connection)
+            return
+
+        connection.outbox_size -= sent
+        if sent:
+            connection.send_blocked_since = time.monotonic()
+        while sent:
+            head = outbox[0]
+            if sent < len(head):
+                outbox[0] = head[sent:]
+                break
+            sent -= len(head)
+            outbox.popleft()
+
+        if not outbox:
+            connection.send_blocked_since = None
+            self.selector.modify(connection.socket, selectors.EVENT_READ, connection)
+
+    def get_server_info(self):
+        """Возвращает информацию о сервере"""
+        return (f"Сервер чата запущен на {self.host}:{self.port}\n"
+                f"Участников онлайн: {len(self.clients)}\n"
+                f"Соединения: {self.heartbeats.stats()}")
+
+    def create_server_socket(self):
+        """Создает слушающий сокет сервера"""
+        server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        return server_socket
+
+    def listen(self):
+        """Открывает порт и ставит слушающий сокет на селектор"""
+        self.server_socket.bind((self.host, self.port))
+        self.server_socket.listen(socket.SOMAXCONN)
+        self.server_socket.setblocking(False)
+        self.selector.register(self.server_socket, selectors.EVENT_READ, None)
+
+    def print_banner(self):
+        print("=" * 50)
+        print("МНОГОПОЛЬЗОВАТЕЛЬСКИЙ ЧАТ СЕРВЕР (selectors)")
+        print("=" * 50)
+        print(f"Сервер запущен на {self.host}:{self.port}")
+        print(f"Механизм ожидания событий: {type(self.selector).__name__}")
+        print("Для остановки сервера нажмите Ctrl+C")
+        print("=" * 50)
+
+    def start(self):
+        """Запускает цикл событий сервера"""
+        self.server_socket = self.create_server_socket()
+        self.selector = selectors.DefaultSelector()
+
+        try:
+            self.listen()
+            self.running = True
+            self.print_banner()
+
+            while self.running:
+                for key, mask in self.selector.select(timeout=1.0):
+                    if key.data is None:
+                        self.accept_clients()
+                        continue
+
+                    connection = key.data
+                    if mask & selectors.EVENT_READ:
+                        self.handle_read(connection)
+                    if mask & selectors.EVENT_WRITE and connection.socket.fileno() != -1:
+                        self.handle_write(connection)
+                self.heartbeats.tick()
+
+        except KeyboardInterrupt:
+            print("\nОстановка сервера...")
+        except Exception as e:
+            print(f"Ошибка сервера: {e}")
+        finally:
+            self.running = False
+            for key in list(self.selector.get_map().values()):
+                key.fileobj.close()
+            self.selector.close()
+            print("Сервер остановлен")
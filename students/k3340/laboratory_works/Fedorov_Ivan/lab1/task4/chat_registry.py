@@ -0,0 +1,93 @@
+import threading
+
+
+DEFAULT_ROOM = 'general'
+MAX_ROOM_NAME = 32
+
+
+class ClientRegistry:
+    """Потокобезопасный реестр подключенных клиентов.
+
+    Вход, выход и переход между комнатами меняют индексы под одной
+    блокировкой, поэтому имя, соединение и комната клиента всегда
+    согласованы. Поиск по соединению и по имени - O(1) и без блокировки.
+    Участники комнаты хранятся неизменяемым кортежем: вход и выход
+    подменяют его новым за O(размер комнаты), а рассылка берет текущий
+    кортеж без блокировки и копирования и стоит O(размер комнаты), а не
+    O(все клиенты).
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clients = {}  # {ключ соединения: client}
+        self.names = {}  # {username: client}
+        self.rooms = {DEFAULT_ROOM: ()}  # {room: (client, ...)}; кортежи только подменяются
+
+    def register(self, key, client):
+        """Добавляет клиента; False, если имя уже занято"""
+        with self.lock:
+            if client.username in self.names:
+                return False
+            self.names[client.username] = client
+            self.clients[key] = client
+            client.room = DEFAULT_ROOM
+            self.add_member(DEFAULT_ROOM, client)
+        return True
+
+    def unregister(self, key):
+        """Удаляет клиента и возвращает его; None, если его уже удалили"""
+        with self.lock:
+            client = self.clients.pop(key, None)
+            if client is None:
+                return None
+            if self.names.get(client.username) is client:
+                del self.names[client.username]
+            self.remove_member(client.room, client)
+        return client
+
+    def add_member(self, room, client):
+        self.rooms[room] = self.rooms.get(room, ()) + (client,)
+
+    def remove_member(self, room, client):
+        members = self.rooms.get(room, ())
+        try:
+            index = members.index(client)
+        except ValueError:
+            return
+        members = members[:index] + members[index + 1:]
+        if members or room == DEFAULT_ROOM:
+            self.rooms[room] = members
+        else:
+            del self.rooms[room]  # Пустые комнаты удаляем
+
+    def move(self, client, room):
+        """Переводит клиента в другую комнату и возвращает прежнюю"""
+        with self.lock:
+            old_room = client.room
+            self.remove_member(old_room, client)
+            self.add_member(room, client)
+            client.room = room
+        return old_room
+
+    def members(self, room):
+        """Участники комнаты для рассылки: кортеж не меняется, даже если кто-то войдет или выйдет"""
+        return self.rooms.get(room, ())
+
+    def room_sizes(self):
+        """Список комнат с числом участников"""
+        with self.lock:
+            return sorted((room, len(members)) for room, members in self.rooms.items())
+
+    def find(self, username):
+        """Ищет клиента по имени"""
+        return self.names.get(username)
+
+    def usernames(self):
+        with self.lock:
+            return sorted(self.names)
+
+    def __contains__(self, key):
+        return key in self.clients
+
+    def __len__(self):
+        return len(self.names)
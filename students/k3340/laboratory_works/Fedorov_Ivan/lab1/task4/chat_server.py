@@ -1,93 +1,213 @@
+import argparse
 import socket
 import threading
 import time
-from datetime import datetime
+from collections import deque
 
+from async_chat_server import AsyncChatServer, SLOW_POLICIES
+from chat_cluster import ChatCluster
+from chat_commands import ChatCommands
+from chat_heartbeat import HEARTBEAT_INTERVAL, Heartbeats
+from chat_history import ChatHistory
+from chat_protocol import HELLO, PING_FRAME, EncodedMessage, ProtocolError, current_timestamp, detect_codec
+from chat_reactor import SelectorChatServer
+from chat_registry import DEFAULT_ROOM, ClientRegistry
 
-class ChatServer:
-    def __init__(self, host='localhost', port=5050):
+
+RECV_SIZE = 1024
+
+
+class ThreadClient:
+    """Клиент потокового сервера; lock не дает потокам перемешать кадры в сокете"""
+
+    def __init__(self, client_socket, address):
+        self.socket = client_socket
+        self.username = None  # Известно после первого сообщения
+        self.room = None
+        self.history_cursor = 0
+        self.address = address
+        self.codec = None
+        self.lock = threading.Lock()
+        self.send_blocked_since = None
+        self.last_seen = None
+
+    def send(self, message):
+        """Отправляет клиенту EncodedMessage в его протоколе"""
+        with self.lock:
+            self.send_blocked_since = time.monotonic()
+            try:
+                self.socket.sendall(message.for_codec(self.codec))
+            finally:
+                self.send_blocked_since = None
+
+    def ping(self):
+        """Отправляет пинг, не дожидаясь занятого сокета: поток проверки не должен зависать"""
+        if not self.lock.acquire(blocking=False):
+            return  # Сейчас идет отправка; зависнет - клиента отключат по send_blocked_since
+        try:
+            sent = self.socket.send(PING_FRAME, socket.MSG_DONTWAIT)
+            if sent < len(PING_FRAME):
+                self.socket.sendall(PING_FRAME[sent:])
+        except OSError:
+            pass  # Отключение обработает поток этого клиента
+        finally:
+            self.lock.release()
+
+
+class ChatServer(ChatCommands):
+    def __init__(self, host='localhost', port=5050, history=None, heartbeat=HEARTBEAT_INTERVAL):
         self.host = host
         self.port = port
-        self.clients = {}  # {socket: {'username': 'name', 'address': addr}}
+        self.clients = ClientRegistry()  # {socket: ThreadClient}
+        self.history = history
+        self.heartbeats = Heartbeats(ThreadClient.ping, self.reap_client, interval=heartbeat)
         self.server_socket = None
         self.running = False
 
-    def broadcast(self, message, sender_socket=None):
-        """Отправляет сообщение всем клиентам, кроме отправителя"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        formatted_message = f"[{timestamp}] {message}"
+    def deliver(self, message, sender=None, room=DEFAULT_ROOM):
+        """Отправляет сообщение участникам комнаты, кроме отправителя; возвращает сокеты отключившихся"""
+        # Кодируем сообщение один раз для всех получателей
+        formatted_message = EncodedMessage(f"[{current_timestamp()}] {message}")
 
         disconnected_clients = []
 
-        for client_socket, client_info in self.clients.items():
+        # Снимок комнаты не меняется, пока другие потоки добавляют и удаляют клиентов
+        for client in self.clients.members(room):
             try:
-                if client_socket != sender_socket:
-                    client_socket.send(formatted_message.encode('utf-8'))
-            except:
-                disconnected_clients.append(client_socket)
+                if client is not sender:
+                    client.send(formatted_message)
+            except OSError:
+                disconnected_clients.append(client.socket)
 
-        # Удаляем отключенных клиентов
-        for client in disconnected_clients:
-            self.remove_client(client)
+        return disconnected_clients
+
+    def broadcast(self, message, sender=None, room=DEFAULT_ROOM):
+        """Отправляет сообщение всем участникам комнаты, кроме отправителя"""
+        for client_socket in self.deliver(message, sender, room):
+            self.remove_client(client_socket)
+
+    def send_private(self, client, text):
+        """Отправляет сообщение одному клиенту"""
+        try:
+            client.send(EncodedMessage(text))
+        except OSError:
+            pass  # Отключение обработает поток этого клиента
 
     def remove_client(self, client_socket):
-        """Удаляет клиента из списка"""
-        if client_socket in self.clients:
-            username = self.clients[client_socket]['username']
-            self.clients.pop(client_socket)
+        """Удаляет клиента из реестра.
+
+        Клиенты, отвалившиеся во время рассылки уведомления, обрабатываются
+        в этом же цикле, без рекурсивного вызова broadcast.
+        """
+        pending = [client_socket]
+        while pending:
+            client_socket = pending.pop()
+            client = self.clients.unregister(client_socket)
             try:
                 client_socket.close()
             except:
                 pass
 
+            if client is None:
+                continue
+
             # Уведомляем других пользователей
-            leave_message = f"⚡ {username} покинул(а) чат"
-            self.broadcast(leave_message)
-            print(f"Клиент отключен: {username}")
+            leave_message = f"⚡ {client.username} покинул(а) чат"
+            pending.extend(self.deliver(leave_message, room=client.room))
+            print(f"Клиент отключен: {client.username}")
+
+    def reap_client(self, client):
+        """Разрывает соединение зависшего клиента.
+
+        Поток клиента, ждущий в recv или sendall, сразу получит ошибку
+        и сам удалит клиента.
+        """
+        try:
+            client.socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def reap_loop(self):
+        """Поток проверки пингов и зависших клиентов"""
+        while self.running:
+            time.sleep(self.heartbeats.wheel.tick)
+            self.heartbeats.tick()
 
     def handle_client(self, client_socket, client_address):
         """Обрабатывает сообщения от клиента"""
+        client = ThreadClient(client_socket, client_address)
+        self.heartbeats.track(client)
         try:
+            # По первым байтам определяем протокол: кадры или старый формат
+            codec, data = detect_codec(client_socket.recv(RECV_SIZE))
+            while codec is None:
+                chunk = client_socket.recv(RECV_SIZE)
+                if not chunk:
+                    return  # Соединение закрыто посреди приветствия
+                codec, data = detect_codec(data + chunk)
+            client.codec = codec
+            if codec.framed:
+                client_socket.sendall(HELLO)
+            pending = deque(codec.feed(data))
+
             # Получаем имя пользователя
-            username = client_socket.recv(1024).decode('utf-8').strip()
+            while not pending:
+                data = client_socket.recv(RECV_SIZE)
+                if not data:
+                    break
+                pending.extend(codec.feed(data))
+
+            username = pending.popleft().strip() if pending else ''
 
             if not username:
                 client_socket.close()
                 return
 
-            # Сохраняем информацию о клиенте
-            self.clients[client_socket] = {
-                'username': username,
-                'address': client_address
-            }
+            # Сохраняем информацию о клиенте, имя должно быть уникальным
+            client.username = username
+            client.last_seen = time.monotonic()
+            if not self.clients.register(client_socket, client):
+                client.send(EncodedMessage(f"[Сервер] Имя {username} уже занято, выберите другое"))
+                return
 
             # Уведомляем о новом пользователе
             join_message = f"🎉 {username} присоединился(ась) к чату!"
-            self.broadcast(join_message)
+            self.broadcast(join_message, room=client.room)
             print(f"Новый пользователь: {username} ({client_address})")
 
             # Отправляем приветственное сообщение
             welcome_msg = f"[Сервер] Добро пожаловать в чат, {username}! Участников онлайн: {len(self.clients)}"
-            client_socket.send(welcome_msg.encode('utf-8'))
+            client.send(EncodedMessage(welcome_msg))
+            self.replay_history(client)
 
             # Основной цикл обработки сообщений
             while self.running:
                 try:
-                    message = client_socket.recv(1024).decode('utf-8')
+                    if not pending:
+                        data = client_socket.recv(RECV_SIZE)
+                        if not data:
+                            break
+                        client.last_seen = time.monotonic()
+                        pending.extend(codec.feed(data))
+                        continue
 
-                    if not message:
-                        break
+                    message = pending.popleft()
 
                     if message.strip().lower() == '/quit':
                         break
 
-                    # Транслируем сообщение всем
-                    chat_message = f"{username}: {message}"
-                    self.broadcast(chat_message, client_socket)
+                    if self.handle_command(client, message):
+                        continue
+
+                    # Транслируем сообщение всем участникам комнаты
+                    self.publish(client, message)
                     print(f"Сообщение от {username}: {message}")
 
                 except ConnectionResetError:
                     break
+                except ProtocolError as e:
+                    print(f"Нарушение протокола от {username}: {e}")
+                    break
                 except Exception as e:
                     print(f"Ошибка при получении сообщения от {username}: {e}")
                     break
@@ -95,11 +215,14 @@ class ChatServer:
         except Exception as e:
             print(f"Ошибка обработки клиента {client_address}: {e}")
         finally:
+            self.heartbeats.forget(client)
             self.remove_client(client_socket)
 
     def get_server_info(self):
         """Возвращает информацию о сервере"""
-        return f"Сервер чата запущен на {self.host}:{self.port}\nУчастников онлайн: {len(self.clients)}"
+        return (f"Сервер чата запущен на {self.host}:{self.port}\n"
+                f"Участников онлайн: {len(self.clients)}\n"
+                f"Соединения: {self.heartbeats.stats()}")
 
     def start(self):
         """Запускает сервер"""
@@ -110,6 +233,7 @@ class ChatServer:
             self.server_socket.bind((self.host, self.port))
             self.server_socket.listen(5)
             self.running = True
+            threading.Thread(target=self.reap_loop, daemon=True).start()
 
             print("=" * 50)
             print("МНОГОПОЛЬЗОВАТЕЛЬСКИЙ ЧАТ СЕРВЕР")
@@ -149,6 +273,54 @@ class ChatServer:
             print("Сервер остановлен")
 
 
+ENGINES = {
+    'threads': ChatServer,
+    'selectors': SelectorChatServer,
+    'asyncio': AsyncChatServer,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Многопользовательский чат сервер")
+    parser.add_argument('--host', default='localhost', help="адрес сервера")
+    parser.add_argument('--port', type=int, default=5050, help="порт сервера")
+    parser.add_argument('--engine', choices=ENGINES, default='threads',
+                        help="threads - поток на клиента, selectors - однопоточный цикл событий, "
+                             "asyncio - асинхронный сервер с очередями на клиента")
+    parser.add_argument('--queue-size', type=int, default=256,
+                        help="размер очереди отправки на клиента (asyncio)")
+    parser.add_argument('--slow-policy', choices=SLOW_POLICIES, default='drop',
+                        help="что делать с клиентом, который не успевает читать (asyncio)")
+    parser.add_argument('--heartbeat', type=float, default=HEARTBEAT_INTERVAL,
+                        help="через сколько секунд молчания клиенту отправляется пинг")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="число процессов-воркеров на одном порту (SO_REUSEPORT, движок selectors)")
+    parser.add_argument('--history-dir',
+                        help="каталог журнала сообщений; без него история не сохраняется")
+    parser.add_argument('--history-size', type=int, default=20,
+                        help="сколько последних сообщений показывать вошедшему")
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        # Журнал истории рассчитан на один процесс-писатель, воркеры работают без него
+        if args.engine != 'selectors' or args.history_dir is not None:
+            parser.error("--workers > 1 работает только с --engine selectors и без --history-dir")
+        ChatCluster(args.host, args.port, args.workers).start()
+        return
+
+    history = None if args.history_dir is None else ChatHistory(args.history_dir, args.history_size)
+
+    if args.engine == 'asyncio':
+        server = AsyncChatServer(args.host, args.port, args.queue_size, args.slow_policy, history, args.heartbeat)
+    else:
+        server = ENGINES[args.engine](args.host, args.port, history, args.heartbeat)
+
+    try:
+        server.start()
+    finally:
+        if history is not None:
+            history.close()
+
+
 if __name__ == "__main__":
-    server = ChatServer()
-    server.start()
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,113 @@
+import argparse
+import time
+from datetime import datetime
+
+from chat_protocol import FramedCodec
+from chat_reactor import ClientConnection, SelectorChatServer
+
+
+class StubSocket:
+    """Сокет-заглушка: считает системные вызовы, данные никуда не пишет.
+
+    Пока busy=True, сокет ведет себя как заполненный буфер ядра.
+    """
+
+    def __init__(self):
+        self.busy = False
+        self.syscalls = 0
+
+    def fileno(self):
+        return 0
+
+    def send(self, data):
+        self.syscalls += 1
+        if self.busy:
+            raise BlockingIOError
+        return len(data)
+
+    def sendmsg(self, buffers):
+        self.syscalls += 1
+        return sum(len(buffer) for buffer in buffers)
+
+
+class StubSelector:
+    def modify(self, fileobj, events, data=None):
+        pass
+
+
+def per_recipient_broadcast(clients, message):
+    """Прежний путь: время и кодирование заново для каждого получателя"""
+    for client_socket, client_info in clients.items():
+        timestamp = datetime.now().strftime("%H:%M:%S")
+        formatted_message = f"[{timestamp}] {message}"
+        client_socket.send(client_info['codec'].frame(formatted_message.encode('utf-8')))
+
+
+def bench_per_recipient(recipients, messages, burst):
+    clients = {StubSocket(): {'codec': FramedCodec()} for _ in range(recipients)}
+
+    started = time.process_time()
+    for i in range(messages):
+        per_recipient_broadcast(clients, f"user: message {i}")
+    elapsed = time.process_time() - started
+
+    syscalls = sum(client_socket.syscalls for client_socket in clients)
+    return elapsed, syscalls
+
+
+def bench_fanout(recipients, messages, burst):
+    """Новый путь: кодирование один раз, очередь memoryview и sendmsg пачками"""
+    server = SelectorChatServer()
+    server.selector = StubSelector()
+    connections = []
+    for i in range(recipients):
+        connection = ClientConnection(StubSocket(), None)
+        connection.codec = FramedCodec()
+        connection.username = f"user{i}"
+        server.clients.register(connection.socket, connection)
+        connections.append(connection)
+
+    started = time.process_time()
+    for i in range(messages):
+        # Каждые burst сообщений сокеты освобождаются и очередь досылается
+        if i % burst == 0:
+            for connection in connections:
+                if connection.outbox:
+                    server.handle_write(connection)
+                connection.socket.busy = True
+        server.broadcast(f"user: message {i}")
+        if i % burst == burst - 1:
+            for connection in connections:
+                connection.socket.busy = False
+    for connection in connections:
+        connection.socket.busy = False
+        if connection.outbox:
+            server.handle_write(connection)
+    elapsed = time.process_time() - started
+
+    syscalls = sum(connection.socket.syscalls for connection in connections)
+    return elapsed, syscalls
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Стоимость рассылки одного сообщения")
+    parser.add_argument('--recipients', default='100,1000,10000', help="числа получателей")
+    parser.add_argument('--deliveries', type=int, default=1_000_000,
+                        help="сколько доставок делать в каждом прогоне")
+    parser.add_argument('--burst', type=int, default=8,
+                        help="сколько сообщений копится, пока сокет занят")
+    args = parser.parse_args()
+
+    print(f"{'получатели':>10} {'путь':<26} {'мкс/сообщ':>10} {'нс/доставка':>12} {'вызовов/сообщ':>14}")
+
+    for recipients in map(int, args.recipients.split(',')):
+        messages = max(args.burst, args.deliveries // recipients)
+        for name, bench in (("encode на получателя", bench_per_recipient),
+                            ("encode once + sendmsg", bench_fanout)):
+            elapsed, syscalls = bench(recipients, messages, args.burst)
+            print(f"{recipients:>10} {name:<26} {elapsed / messages * 1e6:>10.1f} "
+                  f"{elapsed / (messages * recipients) * 1e9:>12.0f} {syscalls / messages:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
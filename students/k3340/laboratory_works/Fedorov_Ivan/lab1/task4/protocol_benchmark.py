@@ -0,0 +1,61 @@
+import argparse
+import socket
+import threading
+import time
+
+from chat_protocol import FramedCodec
+
+
+def receive_all(sock, expected, result):
+    """Читает и разбирает кадры, пока не получит все сообщения"""
+    codec = FramedCodec()
+    received = 0
+    while received < expected:
+        data = sock.recv(65536)
+        if not data:
+            break
+        received += len(codec.feed(data))
+    result.append(received)
+
+
+def run(message_count, message_size, batch_size):
+    """Передает сообщения через пару сокетов, объединяя по batch_size в кадр"""
+    sender, receiver = socket.socketpair()
+    codec = FramedCodec()
+    payload = ('x' * message_size).encode('utf-8')
+    result = []
+    batch_count = message_count // batch_size
+
+    reader = threading.Thread(target=receive_all, args=(receiver, batch_count * batch_size, result))
+    reader.start()
+
+    started = time.perf_counter()
+    for _ in range(batch_count):
+        sender.sendall(codec.frame_batch([payload] * batch_size))
+    reader.join()
+    elapsed = time.perf_counter() - started
+
+    sender.close()
+    receiver.close()
+    return result[0] / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Выигрыш от объединения сообщений в пакетные кадры")
+    parser.add_argument('--messages', type=int, default=200_000, help="число сообщений")
+    parser.add_argument('--size', type=int, default=64, help="размер сообщения, байт")
+    parser.add_argument('--batches', default='1,4,16,64', help="размеры пакетов через запятую")
+    args = parser.parse_args()
+
+    print(f"Сообщений: {args.messages}, размер: {args.size} байт")
+    print(f"{'в кадре':>8} {'сообщ/с':>12} {'ускорение':>10}")
+
+    baseline = None
+    for batch_size in map(int, args.batches.split(',')):
+        rate = run(args.messages, args.size, batch_size)
+        baseline = baseline or rate
+        print(f"{batch_size:>8} {rate:>12.0f} {rate / baseline:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import argparse
+import random
+import time
+
+from chat_protocol import FramedCodec
+from chat_reactor import ClientConnection, SelectorChatServer
+from chat_registry import DEFAULT_ROOM
+from fanout_benchmark import StubSelector, StubSocket
+
+
+def create_server(users):
+    """Сервер реактора с users клиентами на сокетах-заглушках"""
+    server = SelectorChatServer()
+    server.selector = StubSelector()
+    connections = []
+    for i in range(users):
+        connection = ClientConnection(StubSocket(), None)
+        connection.codec = FramedCodec()
+        connection.username = f"user{i}"
+        server.clients.register(connection.socket, connection)
+        connections.append(connection)
+    return server, connections
+
+
+def measure(server, senders, messages):
+    """Время доставки одного сообщения всем получателям комнаты, мкс"""
+    latencies = []
+    for i in range(messages):
+        sender = random.choice(senders)
+        started = time.perf_counter()
+        server.broadcast(f"{sender.username}: message {i}", sender, sender.room)
+        latencies.append((time.perf_counter() - started) * 1e6)
+    latencies.sort()
+    return latencies
+
+
+def report(name, latencies):
+    mean = sum(latencies) / len(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{name:<28} {mean:>10.1f} {p99:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Рассылка в комнаты против общей рассылки")
+    parser.add_argument('--users', type=int, default=10_000, help="число пользователей")
+    parser.add_argument('--rooms', type=int, default=500, help="число комнат")
+    parser.add_argument('--messages', type=int, default=2_000, help="число сообщений в прогоне")
+    args = parser.parse_args()
+
+    server, connections = create_server(args.users)
+    print(f"Пользователей: {args.users}, комнат: {args.rooms}")
+    print(f"{'рассылка':<28} {'среднее, мкс':>10} {'p99, мкс':>10}")
+
+    # Все в одной комнате - так работала рассылка до появления комнат
+    report(f"общая ({DEFAULT_ROOM})", measure(server, connections, max(1, args.messages // 20)))
+
+    for i, connection in enumerate(connections):
+        server.clients.move(connection, f"room{i % args.rooms}")
+    report(f"комнаты (~{args.users // args.rooms} человек)", measure(server, connections, args.messages))
+
+
+if __name__ == "__main__":
+    main()
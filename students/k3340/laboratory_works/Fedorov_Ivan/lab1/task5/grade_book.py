@@ -0,0 +1,155 @@
+import threading
+from array import array
+from bisect import insort
+
+
+MIN_GRADE = 1
+MAX_GRADE = 5
+MAX_DISCIPLINE_BYTES = 1024  # Длина названия в UTF-8; журнал на диске хранит ее в двух байтах
+
+
+class DisciplineGrades:
+    """Оценки одной дисциплины: счетчики обновляются за O(1) при каждой новой оценке.
+
+    Сами оценки хранятся в array('b') - байт на оценку вместо объекта int в списке.
+    Меняется только под блокировкой журнала; читатели получают snapshot().
+    """
+
+    __slots__ = ('count', 'total', 'histogram', 'grades')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.histogram = [0] * (MAX_GRADE + 1)  # histogram[оценка] - сколько раз ее поставили
+        self.grades = array('b')
+
+    def add(self, grade):
+        self.count += 1
+        self.total += grade
+        self.histogram[grade] += 1
+        self.grades.append(grade)
+
+    def extend(self, grades):
+        """Добавляет пачку оценок из bytes: счетчики считаются циклами на C, а не по одной оценке"""
+        self.grades.frombytes(grades)
+        self.count += len(grades)
+        for grade in range(MIN_GRADE, MAX_GRADE + 1):
+            number = grades.count(grade)
+            self.histogram[grade] += number
+            self.total += grade * number
+
+    def snapshot(self):
+        return GradesSnapshot(self.count, self.total, self.histogram.copy(), self.grades)
+
+
+class GradesSnapshot:
+    """Счетчики дисциплины на момент снимка.
+
+    Массив оценок не копируется: он только растет, поэтому первые count
+    элементов уже не изменятся, сколько бы оценок ни добавили после снимка.
+    """
+
+    __slots__ = ('count', 'total', 'histogram', 'source')
+
+    def __init__(self, count, total, histogram, source):
+        self.count = count
+        self.total = total
+        self.histogram = histogram
+        self.source = source
+
+    @property
+    def average(self):
+        return self.total / self.count if self.count else 0.0
+
+    @property
+    def grades(self):
+        """Все оценки снимка, array('b')"""
+        return self.source[:self.count]
+
+    def recent(self, number):
+        """Последние number оценок снимка"""
+        return self.source[max(self.count - number, 0):self.count]
+
+    def distribution(self):
+        """{оценка: количество} без нулевых, от пятерок к единицам"""
+        return {grade: self.histogram[grade] for grade in range(MAX_GRADE, MIN_GRADE - 1, -1)
+                if self.histogram[grade]}
+
+    def summary(self, with_grades=True):
+        """Данные дисциплины для JSON API"""
+        data = {
+            'count': self.count,
+            'sum': self.total,
+            'average': round(self.average, 2),
+            'histogram': {str(grade): self.histogram[grade] for grade in range(MIN_GRADE, MAX_GRADE + 1)},
+        }
+        if with_grades:
+            data['grades'] = self.grades.tolist()
+        return data
+
+
+class GradeBook:
+    """Журнал оценок по дисциплинам.
+
+    Число оценок, суммы и гистограммы ведутся при добавлении, поэтому
+    страница строится за O(число дисциплин), а не O(всех оценок).
+
+    Писатели и снимки берут одну блокировку: под GIL отдельные блокировки
+    на группы дисциплин не ускоряли запись, а снимки замедляли в разы.
+    Читатели берут snapshot() - копию счетчиков под блокировкой, так что
+    страница и API не видят полузаписанных счетчиков и сумма по
+    дисциплинам сходится с версией.
+    """
+
+    def __init__(self):
+        self.disciplines = {}  # {дисциплина: DisciplineGrades}
+        self.names = []  # Названия дисциплин по алфавиту, для вывода без сортировки
+        self.lock = threading.Lock()
+        # Растет с каждым изменением: по ней кэш страницы понимает, что журнал изменился.
+        # Меняется только под self.lock, читается без блокировки
+        self.version = 0
+
+    def discipline(self, name):
+        """DisciplineGrades дисциплины, новая заводится при первой оценке; вызывается под self.lock"""
+        stats = self.disciplines.get(name)
+        if stats is None:
+            stats = self.disciplines[name] = DisciplineGrades()
+            insort(self.names, name)
+        return stats
+
+    def add(self, discipline, grade):
+        """Добавляет проверенную оценку от MIN_GRADE до MAX_GRADE"""
+        with self.lock:
+            self.discipline(discipline).add(grade)
+            self.version += 1
+
+    def add_many(self, discipline, grades):
+        """Добавляет пачку уже проверенных оценок (bytes) - при восстановлении с диска"""
+        if not grades:
+            return
+        with self.lock:
+            self.discipline(discipline).extend(grades)
+            self.version += 1
+
+    @property
+    def total_count(self):
+        return sum(stats.count for _, stats in self.items())
+
+    def __len__(self):
+        return len(self.disciplines)
+
+    def snapshot(self):
+        """(версия, [(дисциплина, GradesSnapshot)] по алфавиту) на один момент времени.
+
+        Под блокировкой копируются лишь счетчики: O(число дисциплин).
+        """
+        with self.lock:
+            return self.version, [(name, self.disciplines[name].snapshot()) for name in self.names]
+
+    def items(self):
+        """Пары (дисциплина, GradesSnapshot) по алфавиту"""
+        return self.snapshot()[1]
+
+    def summary(self, with_grades=True):
+        """Все дисциплины для JSON API"""
+        return {name: stats.summary(with_grades) for name, stats in self.items()}
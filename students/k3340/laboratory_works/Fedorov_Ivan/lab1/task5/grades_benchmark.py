@@ -0,0 +1,91 @@
+import argparse
+import json
+import random
+import time
+import tracemalloc
+
+from grades_server import SimpleHTTPServer
+
+
+DISCIPLINES = ('Математика', 'Физика', 'Программирование', 'История', 'Английский язык')
+
+
+def legacy_page(grades):
+    """Прежняя таблица страницы: суммы и списки оценок пересчитываются на каждый показ"""
+    html_content = f"{len(grades)} {sum(len(values) for values in grades.values())}"
+    for discipline, values in sorted(grades.items()):
+        avg_grade = sum(values) / len(values)
+        grades_str = ", ".join(map(str, values))
+        html_content += f"<tr><td>{discipline}</td><td>{grades_str}</td><td>{avg_grade:.2f}</td><td>{len(values)}</td></tr>"
+    return html_content
+
+
+def best_time(function, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def fill(count):
+    """Одинаковые оценки в прежнее хранилище (списки int) и в GradeBook; память каждого по tracemalloc"""
+    random.seed(1)
+    entries = [(random.choice(DISCIPLINES), random.randint(1, 5)) for _ in range(count)]
+
+    tracemalloc.start()
+    legacy = {}
+    for discipline, grade in entries:
+        legacy.setdefault(discipline, []).append(grade)
+    legacy_memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    server = SimpleHTTPServer()
+    for discipline, grade in entries:
+        server.grades.add(discipline, grade)
+    book_memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return legacy, server, legacy_memory, book_memory
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Стоимость страницы и API оценок: пересчет против счетчиков")
+    parser.add_argument('--grades', default='1000,100000,1000000', help="число оценок через запятую")
+    parser.add_argument('--repeat', type=int, default=3, help="прогонов, берется лучший")
+    args = parser.parse_args()
+
+    print("Время в миллисекундах, память в КБ")
+    print(f"{'оценок':>9} {'хранилище':<10} {'страница':>10} {'после add':>10} {'API':>10} {'API summary':>12} "
+          f"{'память':>9}")
+    for count in map(int, args.grades.split(',')):
+        legacy, server, legacy_memory, book_memory = fill(count)
+
+        def legacy_add_and_render():
+            legacy[DISCIPLINES[0]].append(5)
+            legacy_page(legacy)
+
+        def add_and_render():
+            server.add_grade(DISCIPLINES[0], 5)
+            server.generate_html()
+
+        # Страница без изменений отдается из кэша; после add таблица собирается заново
+        rows = (
+            ("списки", best_time(lambda: legacy_page(legacy), args.repeat),
+             best_time(legacy_add_and_render, args.repeat),
+             best_time(lambda: json.dumps(legacy, ensure_ascii=False), args.repeat), None, legacy_memory),
+            ("счетчики", best_time(server.generate_html, args.repeat), best_time(add_and_render, args.repeat),
+             best_time(lambda: json.dumps(server.grades.summary(), ensure_ascii=False), args.repeat),
+             best_time(lambda: json.dumps(server.grades.summary(False), ensure_ascii=False), args.repeat),
+             book_memory),
+        )
+        for name, page, changed_page, api, summary, memory in rows:
+            summary_text = f"{summary * 1000:>12.3f}" if summary is not None else f"{'-':>12}"
+            print(f"{count:>9} {name:<10} {page * 1000:>10.3f} {changed_page * 1000:>10.3f} {api * 1000:>10.3f} "
+                  f"{summary_text} {memory / 1024:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+import json
+from datetime import datetime
+from threading import Lock
+
+
+LISTED_GRADES = 20  # Сколько последних оценок дисциплины показывать на странице
+
+# Статические части страницы оценок; кодируются в байты один раз при запуске сервера
+PAGE_HEAD = """
+        <!DOCTYPE html>
+        <html lang="ru">
+        <head>
+            <meta charset="UTF-8">
+            <meta name="viewport" content="width=device-width, initial-scale=1.0">
+            <title>Система учета оценок</title>
+            <style>
+                body {
+                    font-family: Arial, sans-serif;
+                    max-width: 800px;
+                    margin: 0 auto;
+                    padding: 20px;
+                    background-color: #f5f5f5;
+                }
+                .container {
+                    background: white;
+                    padding: 30px;
+                    border-radius: 10px;
+                    box-shadow: 0 2px 10px rgba(0,0,0,0.1);
+                }
+                h1 {
+                    color: #333;
+                    text-align: center;
+                    border-bottom: 2px solid #4CAF50;
+                    padding-bottom: 10px;
+                }
+                .form-group {
+                    margin-bottom: 20px;
+                }
+                label {
+                    display: block;
+                    margin-bottom: 5px;
+                    font-weight: bold;
+                    color: #555;
+                }
+                input[type="text"], input[type="number"] {
+                    width: 100%;
+                    padding: 10px;
+                    border: 1px solid #ddd;
+                    border-radius: 5px;
+                    font-size: 16px;
+                    box-sizing: border-box;
+                }
+                button {
+                    background: #4CAF50;
+                    color: white;
+                    padding: 12px 24px;
+                    border: none;
+                    border-radius: 5px;
+                    cursor: pointer;
+                    font-size: 16px;
+                    width: 100%;
+                }
+                button:hover {
+                    background: #45a049;
+                }
+                .message {
+                    padding: 10px;
+                    margin: 10px 0;
+                    border-radius: 5px;
+                    text-align: center;
+                }
+                .success {
+                    background: #d4edda;
+                    color: #155724;
+                    border: 1px solid #c3e6cb;
+                }
+                .error {
+                    background: #f8d7da;
+                    color: #721c24;
+                    border: 1px solid #f5c6cb;
+                }
+                .grades-table {
+                    width: 100%;
+                    border-collapse: collapse;
+                    margin-top: 20px;
+                }
+                .grades-table th, .grades-table td {
+                    border: 1px solid #ddd;
+                    padding: 12px;
+                    text-align: left;
+                }
+                .grades-table th {
+                    background: #f8f9fa;
+                    font-weight: bold;
+                }
+                .grades-table tr:nth-child(even) {
+                    background: #f2f2f2;
+                }
+                .no-data {
+                    text-align: center;
+                    color: #666;
+                    font-style: italic;
+                    padding: 20px;
+                }
+                .stats {
+                    background: #e7f3ff;
+                    padding: 15px;
+                    border-radius: 5px;
+                    margin: 15px 0;
+                }
+            </style>
+        </head>
+        <body>
+            <div class="container">
+                <h1>📊 Система учета оценок</h1>
+
+"""
+
+STATS_TEMPLATE = """                <div class="stats">
+                    <strong>Всего дисциплин:</strong> {disciplines} | 
+                    <strong>Всего оценок:</strong> {grades}
+                </div>
+
+"""
+
+FORM = """                <h2>📝 Добавить новую оценку</h2>
+                <form method="POST" action="/add">
+                    <div class="form-group">
+                        <label for="discipline">Дисциплина:</label>
+                        <input type="text" id="discipline" name="discipline" required 
+                               placeholder="Введите название дисциплины">
+                    </div>
+
+                    <div class="form-group">
+                        <label for="grade">Оценка (1-5):</label>
+                        <input type="number" id="grade" name="grade" min="1" max="5" required 
+                               placeholder="Введите оценку от 1 до 5">
+                    </div>
+
+                    <button type="submit">✅ Добавить оценку</button>
+                </form>
+        """
+
+MESSAGE_TEMPLATE = '<div class="message {css_class}">{message}</div>'
+
+TABLE_TITLE = """
+                <h2>📈 Все оценки</h2>
+        """
+
+TABLE_START = """
+                <table class="grades-table">
+                    <thead>
+                        <tr>
+                            <th>Дисциплина</th>
+                            <th>Оценки</th>
+                            <th>Средний балл</th>
+                            <th>Количество</th>
+                        </tr>
+                    </thead>
+                    <tbody>
+            """
+
+ROW_TEMPLATE = """
+                        <tr>
+                            <td><strong>{discipline}</strong></td>
+                            <td>{grades}</td>
+                            <td>{average:.2f}</td>
+                            <td>{count}</td>
+                        </tr>
+                """
+
+TABLE_END = """
+                    </tbody>
+                </table>
+            """
+
+NO_DATA = """
+                <div class="no-data">
+                    📝 Оценки пока не добавлены. Добавьте первую оценку используя форму выше.
+                </div>
+            """
+
+FOOTER_TEMPLATE = """
+                <div style="margin-top: 30px; text-align: center; color: #666; font-size: 12px;">
+                    Сервер запущен: {started}
+                </div>
+            </div>
+        </body>
+        </html>
+        """
+
+
+def render_table(items):
+    """Таблица оценок из счетчиков дисциплин; строки собираются в список и склеиваются один раз"""
+    if not items:
+        return NO_DATA
+
+    parts = [TABLE_START]
+    for discipline, grades in items:
+        # Страница не перебирает все оценки: последние LISTED_GRADES и распределение по баллам
+        grades_str = ", ".join(map(str, grades.recent(LISTED_GRADES)))
+        if grades.count > LISTED_GRADES:
+            distribution = ", ".join(f"{grade}: {count}" for grade, count in grades.distribution().items())
+            grades_str = f"... {grades_str}<br><small>{distribution}</small>"
+        parts.append(ROW_TEMPLATE.format(discipline=discipline, grades=grades_str,
+                                         average=grades.average, count=grades.count))
+    parts.append(TABLE_END)
+    return ''.join(parts)
+
+
+class GradesPage:
+    """Страница оценок в байтах.
+
+    Оболочка с CSS, форма и футер кодируются один раз. Статистика и таблица
+    перестраиваются только после изменения журнала: каждое добавление
+    увеличивает grades.version, а кэш помнит версию, из которой собран.
+    Страница без сообщения кэшируется целиком и отдается без сборки.
+    """
+
+    def __init__(self, grades, started=None):
+        self.grades = grades
+        self.head = PAGE_HEAD.encode('utf-8')
+        self.form = FORM.encode('utf-8')
+        self.table_title = TABLE_TITLE.encode('utf-8')
+        started = started or datetime.now()
+        self.footer = FOOTER_TEMPLATE.format(started=started.strftime('%Y-%m-%d %H:%M:%S')).encode('utf-8')
+
+        self.lock = Lock()
+        self.version = -1  # Версия журнала, из которой собраны stats, table и page
+        self.stats = b''
+        self.table = b''
+        self.page = b''
+        self.renders = 0  # Сколько раз таблица строилась заново
+
+    def dynamic_parts(self):
+        """Статистика и таблица для текущей версии журнала"""
+        with self.lock:
+            if self.version == self.grades.version:
+                return self.stats, self.table, self.page
+
+        # Версия и счетчики взяты в один момент: страница в кэше ровно той версии, что записана рядом
+        version, items = self.grades.snapshot()
+        stats = STATS_TEMPLATE.format(disciplines=len(items),
+                                      grades=sum(grades.count for _, grades in items)).encode('utf-8')
+        table = render_table(items).encode('utf-8')
+        page = b''.join((self.head, stats, self.form, self.table_title, table, self.footer))
+
+        with self.lock:
+            if version > self.version:
+                self.version, self.stats, self.table, self.page = version, stats, table, page
+                self.renders += 1
+        return stats, table, page
+
+    def render(self, message=""):
+        """Страница в UTF-8; message - результат добавления оценки"""
+        stats, table, page = self.dynamic_parts()
+        if not message:
+            return page
+
+        css_class = "success" if "успешно" in message else "error"
+        message_html = MESSAGE_TEMPLATE.format(css_class=css_class, message=message).encode('utf-8')
+        return b''.join((self.head, stats, self.form, message_html, self.table_title, table, self.footer))
+
+
+class GradesAPI:
+    """Ответ JSON API оценок в байтах.
+
+    По умолчанию - счетчики дисциплин, full - вместе со всеми оценками.
+    Как и страница, оба варианта кэшируются по grades.version: пока журнал
+    не менялся, повторный запрос не сериализует его заново.
+    """
+
+    def __init__(self, grades):
+        self.grades = grades
+        self.lock = Lock()
+        self.cache = {}  # {full: (версия журнала, тело)}
+
+    def render(self, full=False):
+        with self.lock:
+            cached = self.cache.get(full)
+            if cached is not None and cached[0] == self.grades.version:
+                return cached[1]
+
+        version, items = self.grades.snapshot()
+        body = json.dumps({name: grades.summary(full) for name, grades in items}, ensure_ascii=False).encode('utf-8')
+
+        with self.lock:
+            if version > self.cache.get(full, (-1, b''))[0]:
+                self.cache[full] = (version, body)
+        return body
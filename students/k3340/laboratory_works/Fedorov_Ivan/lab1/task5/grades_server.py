@@ -1,30 +1,67 @@
+import argparse
+import os
+import selectors
 import socket
+import sys
 import threading
+import time
 from urllib.parse import parse_qs
 import html
+from collections import deque
 from datetime import datetime
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.http_connection import KEEPALIVE_TIMEOUT, MAX_KEEPALIVE_REQUESTS, BadRequest, KeepAliveConnection
+from common.timer_wheel import TimerWheel
+from common.worker_pool import QUEUE_SIZE, WORKERS, BoundedExecutor
+from grade_book import MAX_DISCIPLINE_BYTES, MAX_GRADE, MIN_GRADE, GradeBook
+from grades_page import GradesAPI, GradesPage
+from grades_storage import GROUP_COMMIT_MS, SNAPSHOT_EVERY, MemoryStorage, StorageError, WALStorage
+
+
+REQUEST_TIMEOUT = 10.0  # Сколько секунд поток обработки может ждать один запрос и отвечать на него
+SHED_LINGER = 1.0  # Сколько секунд отклоненное соединение ждет, пока клиент дочитает 503 и закроет его
+MAX_LINGERING = 256  # Сверх стольких ждущих закрытия соединений отклоненные закрываются сразу
+
 
 class SimpleHTTPServer:
-    def __init__(self, host='localhost', port=8080):
+    def __init__(self, host='localhost', port=8080, request_timeout=REQUEST_TIMEOUT,
+                 keepalive_timeout=KEEPALIVE_TIMEOUT, max_requests=MAX_KEEPALIVE_REQUESTS, storage=None,
+                 workers=WORKERS, queue_size=QUEUE_SIZE):
         self.host = host
         self.port = port
-        self.grades = {}  # {discipline: [grade1, grade2, ...]}
+        self.keepalive_timeout = keepalive_timeout
+        self.max_requests = max_requests
+        self.grades = GradeBook()
+        # По умолчанию оценки только в памяти; WALStorage восстанавливает их с диска при запуске
+        self.storage = storage or MemoryStorage()
+        self.storage.open(self.grades)
+        self.page = GradesPage(self.grades)  # Страница пересобирается, только когда журнал изменился
+        self.api = GradesAPI(self.grades)
         self.server_socket = None
-
-    def parse_request(self, request_data):
-        """Парсит HTTP запрос"""
-        lines = request_data.split('\r\n')
-        if not lines:
-            return None, None, {}
-
-        # Первая строка - метод и путь
-        first_line = lines[0].split()
-        if len(first_line) < 2:
-            return None, None, {}
-
-        method = first_line[0]
-        path = first_line[1]
+        self.running = False
+
+        # Медленный или пропавший клиент не держит поток дольше request_timeout
+        self.request_timeout = request_timeout
+        self.deadlines = TimerWheel(tick=0.5, slots=int(request_timeout / 0.5) + 2)
+        self.stats_lock = threading.Lock()
+        self.active_connections = 0
+        self.reaped_connections = 0
+
+        # Соединения обслуживает ограниченный пул: всплеск подключений не плодит тысячи потоков
+        self.dispatcher = BoundedExecutor(workers, queue_size, name='grades')
+        # Keep-alive соединения, чьи потоки ждут следующего запроса: {сокет: None}, самые давние первыми
+        self.idle_connections = {}
+        self.released_connections = 0
+        # Отклоненные соединения: закрываются после EOF клиента или SHED_LINGER, а не сразу
+        self.lingering = selectors.DefaultSelector()
+        self.linger_deadlines = deque()  # (срок, сокет) в порядке отклонения
+
+    def parse_request(self, request):
+        """Достает из запроса метод, путь и параметры"""
+        method = request.method
+        path = request.target
 
         # Парсим параметры
         params = {}
@@ -34,267 +71,111 @@ class SimpleHTTPServer:
             # Убираем списки из значений
             params = {k: v[0] for k, v in params.items()}
         elif method == 'POST':
-            # Ищем тело запроса
-            body_start = request_data.find('\r\n\r\n') + 4
-            if body_start > 3:
-                body = request_data[body_start:]
-                params = parse_qs(body)
-                params = {k: v[0] for k, v in params.items()}
+            # Тело запроса уже прочитано целиком по Content-Length
+            params = parse_qs(request.body.decode('utf-8', errors='replace'))
+            params = {k: v[0] for k, v in params.items()}
 
         return method, path, params
 
     def add_grade(self, discipline, grade):
         """Добавляет оценку по дисциплине"""
         discipline = html.escape(discipline.strip())
+        if len(discipline.encode('utf-8')) > MAX_DISCIPLINE_BYTES:
+            return False, "Слишком длинное название дисциплины"
         try:
             grade = int(grade)
-            if grade < 1 or grade > 5:
+            if grade < MIN_GRADE or grade > MAX_GRADE:
                 return False, "Оценка должна быть от 1 до 5"
         except ValueError:
             return False, "Оценка должна быть числом"
 
-        if discipline not in self.grades:
-            self.grades[discipline] = []
-
-        self.grades[discipline].append(grade)
+        self.storage.add(discipline, grade)
         return True, "Оценка успешно добавлена"
 
     def generate_html(self, message=""):
-        """Генерирует HTML страницу с оценками"""
-        html_content = f"""
-        <!DOCTYPE html>
-        <html lang="ru">
-        <head>
-            <meta charset="UTF-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <title>Система учета оценок</title>
-            <style>
-                body {{
-                    font-family: Arial, sans-serif;
-                    max-width: 800px;
-                    margin: 0 auto;
-                    padding: 20px;
-                    background-color: #f5f5f5;
-                }}
-                .container {{
-                    background: white;
-                    padding: 30px;
-                    border-radius: 10px;
-                    box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-                }}
-                h1 {{
-                    color: #333;
-                    text-align: center;
-                    border-bottom: 2px solid #4CAF50;
-                    padding-bottom: 10px;
-                }}
-                .form-group {{
-                    margin-bottom: 20px;
-                }}
-                label {{
-                    display: block;
-                    margin-bottom: 5px;
-                    font-weight: bold;
-                    color: #555;
-                }}
-                input[type="text"], input[type="number"] {{
-                    width: 100%;
-                    padding: 10px;
-                    border: 1px solid #ddd;
-                    border-radius: 5px;
-                    font-size: 16px;
-                    box-sizing: border-box;
-                }}
-                button {{
-                    background: #4CAF50;
-                    color: white;
-                    padding: 12px 24px;
-                    border: none;
-                    border-radius: 5px;
-                    cursor: pointer;
-                    font-size: 16px;
-                    width: 100%;
-                }}
-                button:hover {{
-                    background: #45a049;
-                }}
-                .message {{
-                    padding: 10px;
-                    margin: 10px 0;
-                    border-radius: 5px;
-                    text-align: center;
-                }}
-                .success {{
-                    background: #d4edda;
-                    color: #155724;
-                    border: 1px solid #c3e6cb;
-                }}
-                .error {{
-                    background: #f8d7da;
-                    color: #721c24;
-                    border: 1px solid #f5c6cb;
-                }}
-                .grades-table {{
-                    width: 100%;
-                    border-collapse: collapse;
-                    margin-top: 20px;
-                }}
-                .grades-table th, .grades-table td {{
-                    border: 1px solid #ddd;
-                    padding: 12px;
-                    text-align: left;
-                }}
-                .grades-table th {{
-                    background: #f8f9fa;
-                    font-weight: bold;
-                }}
-                .grades-table tr:nth-child(even) {{
-                    background: #f2f2f2;
-                }}
-                .no-data {{
-                    text-align: center;
-                    color: #666;
-                    font-style: italic;
-                    padding: 20px;
-                }}
-                .stats {{
-                    background: #e7f3ff;
-                    padding: 15px;
-                    border-radius: 5px;
-                    margin: 15px 0;
-                }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <h1>📊 Система учета оценок</h1>
-
-                <div class="stats">
-                    <strong>Всего дисциплин:</strong> {len(self.grades)} | 
-                    <strong>Всего оценок:</strong> {sum(len(grades) for grades in self.grades.values())}
-                </div>
-
-                <h2>📝 Добавить новую оценку</h2>
-                <form method="POST" action="/add">
-                    <div class="form-group">
-                        <label for="discipline">Дисциплина:</label>
-                        <input type="text" id="discipline" name="discipline" required 
-                               placeholder="Введите название дисциплины">
-                    </div>
-
-                    <div class="form-group">
-                        <label for="grade">Оценка (1-5):</label>
-                        <input type="number" id="grade" name="grade" min="1" max="5" required 
-                               placeholder="Введите оценку от 1 до 5">
-                    </div>
-
-                    <button type="submit">✅ Добавить оценку</button>
-                </form>
-        """
-
-        # Добавляем сообщение, если есть
-        if message:
-            msg_class = "success" if "успешно" in message else "error"
-            html_content += f'<div class="message {msg_class}">{message}</div>'
+        """Генерирует HTML страницу с оценками в байтах"""
+        return self.page.render(message)
 
-        # Добавляем таблицу с оценками
-        html_content += """
-                <h2>📈 Все оценки</h2>
-        """
-
-        if self.grades:
-            html_content += """
-                <table class="grades-table">
-                    <thead>
-                        <tr>
-                            <th>Дисциплина</th>
-                            <th>Оценки</th>
-                            <th>Средний балл</th>
-                            <th>Количество</th>
-                        </tr>
-                    </thead>
-                    <tbody>
-            """
-
-            for discipline, grades in sorted(self.grades.items()):
-                avg_grade = sum(grades) / len(grades)
-                grades_str = ", ".join(map(str, grades))
-
-                html_content += f"""
-                        <tr>
-                            <td><strong>{discipline}</strong></td>
-                            <td>{grades_str}</td>
-                            <td>{avg_grade:.2f}</td>
-                            <td>{len(grades)}</td>
-                        </tr>
-                """
-
-            html_content += """
-                    </tbody>
-                </table>
-            """
-        else:
-            html_content += """
-                <div class="no-data">
-                    📝 Оценки пока не добавлены. Добавьте первую оценку используя форму выше.
-                </div>
-            """
-
-        # Футер
-        html_content += f"""
-                <div style="margin-top: 30px; text-align: center; color: #666; font-size: 12px;">
-                    Сервер запущен: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-                </div>
-            </div>
-        </body>
-        </html>
-        """
-
-        return html_content
-
-    def create_response(self, status_code, content, content_type="text/html; charset=utf-8"):
+    def create_response(self, status_code, content, content_type="text/html; charset=utf-8",
+                        connection_headers="Connection: close\r\n"):
         """Создает HTTP ответ"""
         status_messages = {
             200: "OK",
             201: "Created",
             400: "Bad Request",
             404: "Not Found",
-            405: "Method Not Allowed"
+            405: "Method Not Allowed",
+            413: "Content Too Large",
+            431: "Request Header Fields Too Large",
+            500: "Internal Server Error",
+            501: "Not Implemented",
+            503: "Service Unavailable"
         }
 
+        # Кодируем один раз: длина нужна в байтах; готовая страница уже в байтах
+        body = content if isinstance(content, bytes) else content.encode('utf-8')
         response = [
             f"HTTP/1.1 {status_code} {status_messages.get(status_code, 'Unknown')}",
             f"Content-Type: {content_type}",
-            f"Content-Length: {len(content.encode('utf-8'))}",
-            "Connection: close",
+            f"Content-Length: {len(body)}",
+            *connection_headers.splitlines(),
             f"Date: {datetime.now().strftime('%a, %d %b %Y %H:%M:%S GMT')}",
             "Server: SimpleGradesServer/1.0",
             "",  # Пустая строка разделяет заголовки и тело
-            content
+            ""
         ]
 
-        return "\r\n".join(response)
+        return "\r\n".join(response).encode('utf-8') + body
 
-    def handle_request(self, client_socket, client_address):
-        """Обрабатывает HTTP запрос"""
+    def handle_connection(self, client_socket, client_address):
+        """Обслуживает соединение: запросы идут по очереди, пока клиент или сервер его не закроют"""
+        connection = KeepAliveConnection(client_socket, self.keepalive_timeout, self.max_requests)
         try:
-            # Получаем данные запроса
-            request_data = client_socket.recv(4096).decode('utf-8')
-            if not request_data:
-                return
+            for request in connection:
+                with self.stats_lock:
+                    self.idle_connections.pop(client_socket, None)
+                if connection.keep_alive and self.dispatcher.waiting:
+                    # Другие соединения ждут свободного потока: это отдает свой после ответа
+                    connection.keep_alive = False
+                self.handle_request(connection, request, client_address)
+                # Следующий запрос тоже должен уложиться в request_timeout
+                self.deadlines.schedule(client_socket, self.request_timeout)
+                if connection.keep_alive and not connection.reader.has_request():
+                    # Поток уходит ждать следующего запроса; release_idle заберет его, если появится очередь
+                    with self.stats_lock:
+                        self.idle_connections[client_socket] = None
+        except BadRequest as e:
+            print(f"Неверный запрос от {client_address}: {e}")
+            connection.keep_alive = False
+            try:
+                connection.send(self.create_response(e.status, str(e), "text/plain; charset=utf-8"))
+            except OSError:
+                pass
+        except OSError:
+            pass  # Клиент отключился, молчал посреди запроса или соединение разорвано по таймауту
+        finally:
+            self.deadlines.cancel(client_socket)
+            with self.stats_lock:
+                self.active_connections -= 1
+                self.idle_connections.pop(client_socket, None)
+            client_socket.close()
 
+    def handle_request(self, connection, request, client_address):
+        """Обрабатывает HTTP запрос"""
+        connection_headers = connection.connection_headers()
+        try:
             print(f"Запрос от {client_address}:")
-            print(request_data.split('\r\n')[0])  # Первая строка запроса
+            print(f"{request.method} {request.target} {request.version}")  # Первая строка запроса
             print()
 
             # Парсим запрос
-            method, path, params = self.parse_request(request_data)
+            method, path, params = self.parse_request(request)
 
             # Обрабатываем маршруты
             if path == '/' or path == '/grades':
                 # Главная страница с оценками
                 html_content = self.generate_html()
-                response = self.create_response(200, html_content)
+                response = self.create_response(200, html_content, connection_headers=connection_headers)
 
             elif path == '/add' and method == 'POST':
                 # Добавление новой оценки
@@ -302,23 +183,37 @@ class SimpleHTTPServer:
                 grade = params.get('grade', '')
 
                 if discipline and grade:
-                    success, message = self.add_grade(discipline, grade)
-                    html_content = self.generate_html(message)
-                    response = self.create_response(201, html_content)
+                    try:
+                        success, message = self.add_grade(discipline, grade)
+                        html_content = self.generate_html(message)
+                        response = self.create_response(201 if success else 400, html_content,
+                                                        connection_headers=connection_headers)
+                    except StorageError as e:
+                        # Оценка не записана на диск и в журнал не попала
+                        print(f"Ошибка хранилища оценок: {e}")
+                        html_content = self.generate_html("Ошибка: оценка не сохранена, попробуйте позже")
+                        response = self.create_response(503, html_content, connection_headers=connection_headers)
                 else:
                     html_content = self.generate_html("Ошибка: заполните все поля")
-                    response = self.create_response(400, html_content)
+                    response = self.create_response(400, html_content, connection_headers=connection_headers)
 
             elif path == '/add' and method == 'GET':
                 # Показываем форму добавления
                 html_content = self.generate_html()
-                response = self.create_response(200, html_content)
+                response = self.create_response(200, html_content, connection_headers=connection_headers)
 
-            elif path == '/api/grades':
-                # JSON API для получения оценок
+            elif path == '/api/stats':
+                # Счетчики соединений: видно, не копятся ли зависшие клиенты
                 import json
-                json_data = json.dumps(self.grades, ensure_ascii=False)
-                response = self.create_response(200, json_data, "application/json; charset=utf-8")
+                json_data = json.dumps(self.get_stats())
+                response = self.create_response(200, json_data, "application/json; charset=utf-8",
+                                                connection_headers=connection_headers)
+
+            elif path == '/api/grades':
+                # JSON API: счетчики по дисциплинам; ?full=1 - вместе со всеми оценками
+                full = params.get('full') in ('1', 'true')
+                response = self.create_response(200, self.api.render(full), "application/json; charset=utf-8",
+                                                connection_headers=connection_headers)
 
             else:
                 # Страница не найдена
@@ -333,18 +228,110 @@ class SimpleHTTPServer:
                 </body>
                 </html>
                 """
-                response = self.create_response(404, error_html)
+                response = self.create_response(404, error_html, connection_headers=connection_headers)
 
             # Отправляем ответ
-            client_socket.send(response.encode('utf-8'))
-            print(f"Ответ отправлен: {response.split('\r\n')[0]}")
+            connection.send(response)
+            status_line = response[:response.index(b'\r\n')].decode('latin-1')
+            print(f"Ответ отправлен: {status_line}")
 
+        except OSError:
+            raise  # Соединение разорвано, отвечать некуда
         except Exception as e:
             print(f"Ошибка обработки запроса от {client_address}: {e}")
-            error_response = self.create_response(500, "Internal Server Error")
-            client_socket.send(error_response.encode('utf-8'))
-        finally:
+            connection.send(self.create_response(500, "Internal Server Error",
+                                                 connection_headers=connection_headers))
+
+    def shed(self, client_socket):
+        """Отвечает 503, не читая запрос: очередь потоков полна, клиенту лучше повторить позже"""
+        response = self.create_response(503, "Сервер перегружен, повторите запрос позже",
+                                        "text/plain; charset=utf-8",
+                                        connection_headers="Connection: close\r\nRetry-After: 1\r\n")
+        try:
+            # Поток приема не должен ждать клиента: ответ целиком помещается в пустой буфер сокета
+            client_socket.setblocking(False)
+            client_socket.send(response)
+            client_socket.shutdown(socket.SHUT_WR)
+        except OSError:
+            client_socket.close()
+            return
+        if len(self.linger_deadlines) >= MAX_LINGERING:
             client_socket.close()
+            return
+        # close с непрочитанным запросом шлет RST, и клиент может потерять ответ: запрос дочитывает linger_loop
+        self.lingering.register(client_socket, selectors.EVENT_READ)
+        self.linger_deadlines.append((time.monotonic() + SHED_LINGER, client_socket))
+
+    def linger_loop(self):
+        """Дочитывает запросы отклоненных соединений и закрывает их после EOF клиента или SHED_LINGER"""
+        while self.running:
+            for key, _ in self.lingering.select(timeout=SHED_LINGER / 4):
+                try:
+                    data = key.fileobj.recv(65536)
+                except BlockingIOError:
+                    continue
+                except OSError:
+                    data = b''
+                if not data:
+                    self.close_lingering(key.fileobj)
+            now = time.monotonic()
+            while self.linger_deadlines and self.linger_deadlines[0][0] <= now:
+                self.close_lingering(self.linger_deadlines.popleft()[1])
+
+    def close_lingering(self, client_socket):
+        if client_socket.fileno() == -1:
+            return  # Уже закрыт по EOF, в очереди сроков остался только его след
+        try:
+            self.lingering.unregister(client_socket)
+        except (KeyError, ValueError):
+            pass
+        client_socket.close()
+
+    def release_idle(self):
+        """Отбирает поток у самого давнего простаивающего keep-alive соединения.
+
+        shutdown(SHUT_RD) будит поток, ждущий в recv: он видит конец
+        соединения, закрывает его и берет следующее из очереди пула.
+        """
+        with self.stats_lock:
+            if not self.idle_connections:
+                return
+            client_socket = next(iter(self.idle_connections))
+            del self.idle_connections[client_socket]
+            self.released_connections += 1
+        try:
+            client_socket.shutdown(socket.SHUT_RD)
+        except OSError:
+            pass  # Соединение уже закрыто
+
+    def get_stats(self):
+        """Счетчики соединений сервера и пула потоков"""
+        with self.stats_lock:
+            stats = {
+                'active_connections': self.active_connections,
+                'reaped_connections': self.reaped_connections,
+                'idle_keepalive_connections': len(self.idle_connections),
+                'released_idle_connections': self.released_connections,
+                'lingering_connections': len(self.linger_deadlines),
+            }
+        stats.update(self.dispatcher.stats())
+        return stats
+
+    def reap_loop(self):
+        """Разрывает соединения, не уложившиеся в request_timeout.
+
+        Поток обработки, ждущий в recv или send, сразу получает ошибку
+        и закрывает сокет сам.
+        """
+        while self.running:
+            time.sleep(self.deadlines.tick)
+            for client_socket in self.deadlines.advance():
+                try:
+                    client_socket.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    continue  # Сокет уже закрыт
+                with self.stats_lock:
+                    self.reaped_connections += 1
 
     def start(self):
         """Запускает сервер"""
@@ -353,7 +340,10 @@ class SimpleHTTPServer:
 
         try:
             self.server_socket.bind((self.host, self.port))
-            self.server_socket.listen(5)
+            self.server_socket.listen(socket.SOMAXCONN)
+            self.running = True
+            threading.Thread(target=self.reap_loop, daemon=True).start()
+            threading.Thread(target=self.linger_loop, daemon=True).start()
 
             print("=" * 60)
             print("🎓 СЕРВЕР УЧЕТА ОЦЕНОК ЗАПУЩЕН")
@@ -362,21 +352,30 @@ class SimpleHTTPServer:
             print("Доступные endpoints:")
             print("  GET  /          - Главная страница с оценками")
             print("  POST /add       - Добавить новую оценку")
-            print("  GET  /api/grades - JSON API со всеми оценками")
+            print("  GET  /api/grades - JSON API со счетчиками (?full=1 - со всеми оценками)")
+            print("  GET  /api/stats  - счетчики соединений и очереди потоков")
+            print(f"Потоков обработки: {self.dispatcher.workers}, очередь: {self.dispatcher.queue_size}")
             print("\nДля остановки сервера нажмите Ctrl+C")
             print("=" * 60)
 
             while True:
                 try:
                     client_socket, client_address = self.server_socket.accept()
-
-                    # Запускаем поток для обработки клиента
-                    client_thread = threading.Thread(
-                        target=self.handle_request,
-                        args=(client_socket, client_address),
-                        daemon=True
-                    )
-                    client_thread.start()
+                    with self.stats_lock:
+                        self.active_connections += 1
+                    # Срок идет и в очереди: соединение, прождавшее request_timeout, разрывается
+                    self.deadlines.schedule(client_socket, self.request_timeout)
+
+                    # Соединение ждет свободного потока пула; если очередь полна - сразу 503
+                    if not self.dispatcher.submit(self.handle_connection, client_socket, client_address):
+                        self.deadlines.cancel(client_socket)
+                        with self.stats_lock:
+                            self.active_connections -= 1
+                        self.shed(client_socket)
+                        continue
+                    if self.dispatcher.waiting:
+                        # Все потоки заняты: простаивающее keep-alive соединение уступает свой
+                        self.release_idle()
 
                     print(f"Новое подключение: {client_address}")
 
@@ -390,11 +389,40 @@ class SimpleHTTPServer:
         except Exception as e:
             print(f"Ошибка сервера: {e}")
         finally:
+            self.running = False
             if self.server_socket:
                 self.server_socket.close()
+            self.dispatcher.shutdown()
+            self.storage.close()
             print("Сервер остановлен")
 
 
+def main():
+    parser = argparse.ArgumentParser(description="Сервер учета оценок")
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--keepalive-timeout', type=float, default=KEEPALIVE_TIMEOUT,
+                        help="сколько секунд ждать следующий запрос в постоянном соединении")
+    parser.add_argument('--max-requests', type=int, default=MAX_KEEPALIVE_REQUESTS,
+                        help="сколько запросов обслужить в одном соединении")
+    parser.add_argument('--workers', type=int, default=WORKERS, help="потоков обработки соединений")
+    parser.add_argument('--queue-size', type=int, default=QUEUE_SIZE,
+                        help="сколько соединений может ждать свободного потока; остальным - 503")
+    parser.add_argument('--data-dir', help="каталог журнала и снимков оценок; без него оценки не сохраняются")
+    parser.add_argument('--group-commit-ms', type=float, default=GROUP_COMMIT_MS,
+                        help="сколько миллисекунд копить оценки перед общим fsync; 0 - fsync на каждую")
+    parser.add_argument('--snapshot-every', type=int, default=SNAPSHOT_EVERY,
+                        help="через сколько записей журнала делать снимок")
+    args = parser.parse_args()
+
+    storage = None
+    if args.data_dir:
+        storage = WALStorage(args.data_dir, args.group_commit_ms, args.snapshot_every)
+    server = SimpleHTTPServer(args.host, args.port, keepalive_timeout=args.keepalive_timeout,
+                              max_requests=args.max_requests, storage=storage, workers=args.workers,
+                              queue_size=args.queue_size)
+    server.start()
+
+
 if __name__ == "__main__":
-    server = SimpleHTTPServer()
-    server.start()
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,341 @@
+import os
+import struct
+import threading
+import time
+import zlib
+
+
+RECORD_HEADER = struct.Struct('!IBH')  # crc32 остатка записи, оценка, длина названия дисциплины
+SNAPSHOT_MAGIC = b'GRADES-SNAPSHOT/1\n'
+SNAPSHOT_ENTRY = struct.Struct('!HI')  # длина названия, число оценок
+GROUP_COMMIT_MS = 1.0  # Сколько копить записи перед общим fsync; 0 - fsync на каждую оценку
+SNAPSHOT_EVERY = 100_000  # После стольких записей журнал сворачивается в снимок
+COMMIT_CHECK_INTERVAL = 1.0  # Как часто ждущий фиксации писатель проверяет, жив ли поток фиксации
+
+
+class StorageError(Exception):
+    """Файлы хранилища повреждены так, что восстановить оценки нельзя"""
+
+
+def encode_record(discipline, grade):
+    name = discipline.encode('utf-8')
+    body = struct.pack('!BH', grade, len(name)) + name
+    return struct.pack('!I', zlib.crc32(body)) + body
+
+
+class MemoryStorage:
+    """Без сохранения: оценки живут только в памяти процесса"""
+
+    def open(self, grades):
+        self.grades = grades
+
+    def add(self, discipline, grade):
+        self.grades.add(discipline, grade)
+
+    def close(self):
+        pass
+
+
+class WALStorage:
+    """Оценки на диске: журнал упреждающей записи (WAL) и периодические снимки.
+
+    Каждая оценка дописывается в журнал; add возвращает управление, только
+    когда запись на диске, и лишь тогда оценка попадает в журнал в памяти.
+    При групповой фиксации записи всех потоков за group_commit_ms уходят
+    одним write и одним fsync. Если write или fsync не удались, хранилище
+    больше не принимает оценок: add бросает StorageError. Каждые snapshot_every
+    записей фоновый поток сворачивает журнал в снимок - массивы оценок по
+    дисциплинам, - а старые сегменты удаляются; писатель снимка не ждет, и
+    ошибка снимка до него не доходит. Запуск: снимок плюс хвост журнала.
+    """
+
+    def __init__(self, directory, group_commit_ms=GROUP_COMMIT_MS, snapshot_every=SNAPSHOT_EVERY):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.commit_interval = group_commit_ms / 1000
+        self.snapshot_every = snapshot_every
+
+        self.lock = threading.Lock()
+        # fsync идет без self.lock; эта блокировка не дает закрыть сегмент посреди fsync
+        self.sync_lock = threading.Lock()
+        self.records_added = threading.Condition(self.lock)  # Для потока фиксации: есть что писать
+        self.committed = threading.Condition(self.lock)  # Для писателей: их запись на диске
+        self.snapshot_requested = threading.Condition(self.lock)  # Для потока снимков: журнал пора свернуть
+        self.buffer = []  # Записи, еще не отданные в write
+        self.entries = []  # (дисциплина, оценка) тех же записей: в память - после fsync
+        self.sequence = 0  # Номер последней принятой записи
+        self.durable = 0  # Номер последней записи, прошедшей fsync
+        self.since_snapshot = 0
+        self.snapshot_running = False
+        self.closed = False
+        self.failure = None  # OSError записи или fsync; после него add только бросает StorageError
+        self.grades = None
+        self.segment_id = 1
+        self.file = None
+        self.committer = None
+        self.snapshotter = None
+
+    def segment_path(self, segment_id):
+        return os.path.join(self.directory, f'wal-{segment_id:06d}.log')
+
+    def snapshot_path(self, segment_id):
+        """Снимок содержит все оценки из сегментов журнала с номерами меньше segment_id"""
+        return os.path.join(self.directory, f'snapshot-{segment_id:06d}.bin')
+
+    def list_files(self, prefix, suffix):
+        return sorted(int(name[len(prefix):-len(suffix)]) for name in os.listdir(self.directory)
+                      if name.startswith(prefix) and name.endswith(suffix))
+
+    def open(self, grades):
+        """Восстанавливает оценки в grades: последний снимок, затем сегменты журнала после него"""
+        self.grades = grades
+        snapshots = self.list_files('snapshot-', '.bin')
+        first_segment = 1
+        if snapshots:
+            first_segment = snapshots[-1]
+            self.load_snapshot(self.snapshot_path(first_segment))
+
+        segments = [segment_id for segment_id in self.list_files('wal-', '.log') if segment_id >= first_segment]
+        for segment_id in segments:
+            self.since_snapshot += self.replay(self.segment_path(segment_id))
+
+        self.segment_id = segments[-1] if segments else first_segment
+        self.file = open(self.segment_path(self.segment_id), 'ab')
+        if self.commit_interval > 0:
+            self.committer = threading.Thread(target=self.commit_loop, daemon=True)
+            self.committer.start()
+        self.snapshotter = threading.Thread(target=self.snapshot_loop, daemon=True)
+        self.snapshotter.start()
+
+    def load_snapshot(self, path):
+        with open(path, 'rb') as file:
+            data = file.read()
+        if not data.startswith(SNAPSHOT_MAGIC) or len(data) < len(SNAPSHOT_MAGIC) + 4:
+            raise StorageError(f"{path}: не снимок оценок")
+        (checksum,) = struct.unpack_from('!I', data, len(data) - 4)
+        if zlib.crc32(memoryview(data)[:-4]) != checksum:
+            raise StorageError(f"{path}: контрольная сумма не совпала")
+
+        offset = len(SNAPSHOT_MAGIC)
+        end = len(data) - 4
+        while offset < end:
+            name_length, count = SNAPSHOT_ENTRY.unpack_from(data, offset)
+            offset += SNAPSHOT_ENTRY.size
+            discipline = data[offset:offset + name_length].decode('utf-8')
+            offset += name_length
+            self.grades.add_many(discipline, data[offset:offset + count])
+            offset += count
+
+    def replay(self, path):
+        """Применяет записи сегмента; оборванный или испорченный хвост отрезается. Возвращает число записей"""
+        with open(path, 'rb') as file:
+            data = file.read()
+
+        batches = {}  # {дисциплина: bytearray оценок}: в журнал добавляются пачками, а не по одной
+        offset = 0
+        records = 0
+        while offset + RECORD_HEADER.size <= len(data):
+            checksum, grade, name_length = RECORD_HEADER.unpack_from(data, offset)
+            end = offset + RECORD_HEADER.size + name_length
+            if end > len(data) or zlib.crc32(data[offset + 4:end]) != checksum:
+                break
+            discipline = data[offset + RECORD_HEADER.size:end].decode('utf-8')
+            batch = batches.get(discipline)
+            if batch is None:
+                batch = batches[discipline] = bytearray()
+            batch.append(grade)
+            offset = end
+            records += 1
+
+        for discipline, batch in batches.items():
+            self.grades.add_many(discipline, batch)
+        if offset < len(data):
+            # Запись, оборванная при аварийной остановке, не была подтверждена клиенту
+            os.truncate(path, offset)
+        return records
+
+    def add(self, discipline, grade):
+        """Записывает оценку и ждет, пока она окажется на диске; StorageError - не записана"""
+        record = encode_record(discipline, grade)
+        with self.lock:
+            self.check_usable()
+            self.buffer.append(record)
+            self.entries.append((discipline, grade))
+            self.sequence += 1
+            sequence = self.sequence
+            self.since_snapshot += 1
+            if self.since_snapshot >= self.snapshot_every and not self.snapshot_running:
+                self.snapshot_running = True
+                self.snapshot_requested.notify()
+
+            if self.committer is not None:
+                self.records_added.notify()
+                self.wait_durable(sequence)
+            else:
+                self.commit_locked()
+                self.check_usable()
+
+    def check_usable(self):
+        if self.failure is not None:
+            raise StorageError(f"журнал не записан: {self.failure}") from self.failure
+        if self.closed:
+            raise StorageError("хранилище закрыто")
+
+    def wait_durable(self, sequence):
+        """Ждет fsync записи с номером sequence; вызывается под self.lock"""
+        while self.durable < sequence:
+            self.check_usable()
+            if not self.committer.is_alive():
+                raise StorageError("поток фиксации журнала остановлен")
+            # Ожидание с таймаутом: даже если уведомление потеряется, писатель не повиснет навсегда
+            self.committed.wait(COMMIT_CHECK_INTERVAL)
+
+    def apply_committed(self, count, sequence):
+        """Переносит в память первые count записей, прошедших fsync; вызывается под self.lock"""
+        for discipline, grade in self.entries[:count]:
+            self.grades.add(discipline, grade)
+        del self.entries[:count]
+        self.durable = sequence
+        self.committed.notify_all()
+
+    def fail(self, error):
+        """Запоминает ошибку записи и будит всех ждущих; вызывается под self.lock"""
+        self.failure = error
+        self.buffer.clear()
+        self.entries.clear()
+        self.committed.notify_all()
+        self.records_added.notify_all()
+
+    def commit_locked(self):
+        """Пишет накопленные записи и делает fsync; вызывается под self.lock"""
+        if not self.buffer or self.failure is not None:
+            return
+        try:
+            self.file.write(b''.join(self.buffer))
+            self.file.flush()
+            os.fsync(self.file.fileno())
+        except OSError as e:
+            self.fail(e)
+            return
+        self.buffer.clear()
+        self.apply_committed(len(self.entries), self.sequence)
+
+    def commit_loop(self):
+        """Поток групповой фиксации: ждет первую запись, копит commit_interval и фиксирует всех разом"""
+        while True:
+            with self.lock:
+                self.records_added.wait_for(lambda: self.buffer or self.closed or self.failure is not None)
+                if self.closed or self.failure is not None:
+                    return
+            time.sleep(self.commit_interval)
+            self.commit()
+
+    def commit(self):
+        """write под блокировкой, чтобы порядок записей совпадал с порядком номеров; fsync - без нее"""
+        with self.sync_lock:
+            with self.lock:
+                if not self.buffer or self.failure is not None:
+                    return
+                count = len(self.buffer)
+                sequence = self.sequence
+                try:
+                    self.file.write(b''.join(self.buffer))
+                    self.file.flush()
+                except OSError as e:
+                    self.fail(e)
+                    return
+                self.buffer.clear()
+            # Пока идет fsync, другие потоки продолжают копить следующую пачку
+            try:
+                os.fsync(self.file.fileno())
+            except OSError as e:
+                with self.lock:
+                    self.fail(e)
+                return
+            with self.lock:
+                # Оценки видны странице только после fsync: клиент не увидит оценку, о которой не получил ответ
+                self.apply_committed(count, sequence)
+
+    def snapshot_loop(self):
+        """Поток снимков: ждет, пока add отметит, что журнал пора свернуть"""
+        while True:
+            with self.lock:
+                self.snapshot_requested.wait_for(lambda: self.snapshot_running or self.closed)
+                if self.closed:
+                    return
+            try:
+                self.snapshot()
+            except OSError as e:
+                # Оценки уже в журнале; следующая попытка - через snapshot_every записей
+                print(f"Снимок журнала оценок не записан: {e}")
+                with self.lock:
+                    self.since_snapshot = 0
+
+    def snapshot(self):
+        """Сворачивает журнал в снимок: сегменты до нового активного больше не нужны"""
+        try:
+            with self.sync_lock, self.lock:
+                # Журнал и память совпадают, пока держится блокировка: фиксируем хвост и открываем новый сегмент
+                self.commit_locked()
+                if self.failure is not None or self.closed:
+                    return
+                # Новый сегмент открывается до закрытия старого: если open не удался, журнал пишется дальше в старый
+                new_file = open(self.segment_path(self.segment_id + 1), 'ab')
+                self.file.close()
+                self.file = new_file
+                self.segment_id += 1
+                segment_id = self.segment_id
+                state = [(name, stats.grades.tobytes()) for name, stats in self.grades.items()]
+                self.since_snapshot = 0
+
+            self.write_snapshot(segment_id, state)
+            for old in self.list_files('wal-', '.log'):
+                if old < segment_id:
+                    os.remove(self.segment_path(old))
+            for old in self.list_files('snapshot-', '.bin'):
+                if old < segment_id:
+                    os.remove(self.snapshot_path(old))
+        finally:
+            with self.lock:
+                self.snapshot_running = False
+
+    def write_snapshot(self, segment_id, state):
+        """Снимок пишется во временный файл и подменяет старый атомарно"""
+        parts = [SNAPSHOT_MAGIC]
+        for name, grades in state:
+            name_bytes = name.encode('utf-8')
+            parts.append(SNAPSHOT_ENTRY.pack(len(name_bytes), len(grades)))
+            parts.append(name_bytes)
+            parts.append(grades)
+        data = b''.join(parts)
+
+        path = self.snapshot_path(segment_id)
+        temporary = path + '.tmp'
+        with open(temporary, 'wb') as file:
+            file.write(data)
+            file.write(struct.pack('!I', zlib.crc32(data)))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, path)
+        if hasattr(os, 'O_DIRECTORY'):
+            # Переименование тоже должно пережить сбой питания
+            directory = os.open(self.directory, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(directory)
+            finally:
+                os.close(directory)
+
+    def close(self):
+        """Фиксирует хвост журнала и останавливает поток фиксации"""
+        with self.sync_lock, self.lock:
+            if self.closed:
+                return
+            self.commit_locked()
+            self.closed = True
+            self.records_added.notify_all()
+            self.snapshot_requested.notify_all()
+            self.file.close()
+        if self.committer is not None:
+            self.committer.join()
+        if self.snapshotter is not None:
+            self.snapshotter.join()
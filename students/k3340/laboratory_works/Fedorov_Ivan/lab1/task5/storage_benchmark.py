@@ -0,0 +1,96 @@
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+
+from grade_book import GradeBook
+from grades_storage import WALStorage, encode_record
+
+
+DISCIPLINES = ('Математика', 'Физика', 'Программирование', 'История', 'Английский язык')
+
+
+def write_rate(directory, group_commit_ms, writers, per_writer):
+    """Оценок в секунду, когда writers потоков пишут одновременно и каждый ждет своей фиксации"""
+    storage = WALStorage(directory, group_commit_ms, snapshot_every=10 ** 9)
+    storage.open(GradeBook())
+
+    def writer(index):
+        for number in range(per_writer):
+            storage.add(DISCIPLINES[index % len(DISCIPLINES)], number % 5 + 1)
+
+    threads = [threading.Thread(target=writer, args=(index,)) for index in range(writers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    storage.close()
+    return writers * per_writer / elapsed
+
+
+def prepare_wal(directory, count):
+    """Журнал из count записей без снимка - как у сервера, ни разу не сворачивавшего журнал"""
+    random.seed(1)
+    with open(os.path.join(directory, 'wal-000001.log'), 'wb') as file:
+        file.write(b''.join(encode_record(random.choice(DISCIPLINES), random.randint(1, 5))
+                            for _ in range(count)))
+
+
+def cold_start(directory):
+    """Время восстановления журнала оценок из каталога, в секундах"""
+    grades = GradeBook()
+    started = time.perf_counter()
+    storage = WALStorage(directory, group_commit_ms=0)
+    storage.open(grades)
+    elapsed = time.perf_counter() - started
+    storage.close()
+    return elapsed, grades.total_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Журнал оценок на диске: групповая фиксация и запуск со снимка")
+    parser.add_argument('--writers', type=int, default=64, help="одновременных писателей")
+    parser.add_argument('--per-writer', type=int, default=100, help="оценок на писателя")
+    parser.add_argument('--commit-ms', default='0,0.2,1,5', help="интервалы групповой фиксации через запятую")
+    parser.add_argument('--grades', type=int, default=1_000_000, help="оценок в журнале для замера запуска")
+    parser.add_argument('--dir', help="каталог для файлов (по умолчанию временный)")
+    args = parser.parse_args()
+
+    base = tempfile.mkdtemp(dir=args.dir)
+    try:
+        print(f"Запись: {args.writers} потоков по {args.per_writer} оценок, каждая ждет fsync")
+        print(f"{'фиксация':<18} {'оценок/с':>10}")
+        for commit_ms in map(float, args.commit_ms.split(',')):
+            directory = tempfile.mkdtemp(dir=base)
+            rate = write_rate(directory, commit_ms, args.writers, args.per_writer)
+            name = "fsync на каждую" if commit_ms == 0 else f"группа {commit_ms:g} мс"
+            print(f"{name:<18} {rate:>10.0f}")
+
+        print(f"\nЗапуск с {args.grades} оценками на диске")
+        print(f"{'восстановление':<18} {'секунд':>10} {'оценок':>10}")
+        directory = tempfile.mkdtemp(dir=base)
+        prepare_wal(directory, args.grades)
+        elapsed, count = cold_start(directory)
+        print(f"{'весь журнал':<18} {elapsed:>10.3f} {count:>10}")
+
+        # Сворачиваем журнал в снимок и дописываем хвост в 1% записей
+        storage = WALStorage(directory, group_commit_ms=0)
+        storage.open(GradeBook())
+        storage.snapshot()
+        storage.close()
+        with open(storage.segment_path(storage.segment_id), 'ab') as file:
+            file.write(b''.join(encode_record(DISCIPLINES[number % len(DISCIPLINES)], number % 5 + 1)
+                                for number in range(args.grades // 100)))
+        elapsed, count = cold_start(directory)
+        print(f"{'снимок + хвост':<18} {elapsed:>10.3f} {count:>10}")
+    finally:
+        shutil.rmtree(base)
+
+
+if __name__ == "__main__":
+    main()
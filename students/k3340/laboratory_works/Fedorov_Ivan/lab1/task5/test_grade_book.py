@@ -0,0 +1,96 @@
+import threading
+import time
+
+from grade_book import MAX_GRADE, MIN_GRADE, GradeBook
+
+
+PAUSE = 0.2  # Сколько писатель стоит посреди добавления, давая другому потоку вклиниться
+
+
+class PausingHistogram(list):
+    """Гистограмма, на которой писатель останавливается между count += 1 и обновлением гистограммы.
+
+    Без блокировки журнала другой поток за это время увидит или перезапишет
+    полузаписанные счетчики; с блокировкой он ждет, пока писатель закончит.
+    """
+
+    def __init__(self, histogram):
+        super().__init__(histogram)
+        self.paused = threading.Event()
+        self.armed = True
+
+    def __setitem__(self, index, value):
+        if self.armed:
+            self.armed = False
+            self.paused.set()
+            time.sleep(PAUSE)
+        super().__setitem__(index, value)
+
+
+def check_stats(name, stats):
+    """Ошибки согласованности счетчиков дисциплины"""
+    errors = []
+    histogram = stats.histogram[MIN_GRADE:MAX_GRADE + 1]
+    if sum(histogram) != stats.count:
+        errors.append(f"{name}: гистограмма {sum(histogram)} при count {stats.count}")
+    if sum(grade * number for grade, number in enumerate(stats.histogram)) != stats.total:
+        errors.append(f"{name}: сумма {stats.total} не сходится с гистограммой")
+    if len(stats.grades) != stats.count:
+        errors.append(f"{name}: оценок {len(stats.grades)} при count {stats.count}")
+    return errors
+
+
+def paused_writer(grades, name, grade):
+    """Запускает писателя, который останавливается посреди добавления; возвращает его поток"""
+    grades.add(name, MIN_GRADE)
+    histogram = grades.disciplines[name].histogram = PausingHistogram(grades.disciplines[name].histogram)
+    writer = threading.Thread(target=grades.add, args=(name, grade))
+    writer.start()
+    histogram.paused.wait()
+    return writer
+
+
+def test_snapshot_not_torn():
+    """Снимок, взятый посреди добавления, не видит count без гистограммы"""
+    grades = GradeBook()
+    writer = paused_writer(grades, "Математика", 5)
+    errors = []
+    for name, stats in grades.items():
+        errors.extend(check_stats(name, stats))
+    writer.join()
+    for name, stats in grades.items():
+        errors.extend(check_stats(name, stats))
+
+    print(f"Снимок посреди добавления: {'ошибки' if errors else 'ok'}")
+    assert not errors, errors
+
+
+def test_no_lost_updates():
+    """Оценка, добавленная посреди чужого добавления, не теряется"""
+    grades = GradeBook()
+    writer = paused_writer(grades, "Физика", 4)
+    grades.add("Физика", 4)
+    writer.join()
+    (name, stats), = grades.items()
+    errors = check_stats(name, stats)
+    if stats.count != 3 or stats.histogram[4] != 2:
+        errors.append(f"{name}: count {stats.count}, четверок {stats.histogram[4]} - ожидалось 3 и 2")
+
+    print(f"Две оценки одновременно: {'ошибки' if errors else 'ok'}")
+    assert not errors, errors
+
+
+def test_version_tracks_changes():
+    """Версия снимка растет с каждой оценкой, и сумма счетчиков с ней сходится"""
+    grades = GradeBook()
+    for number in range(10):
+        grades.add(f"Дисциплина {number % 3}", number % MAX_GRADE + MIN_GRADE)
+    version, items = grades.snapshot()
+    assert version == 10 == sum(stats.count for _, stats in items), (version, items)
+    print("Версия журнала: ok")
+
+
+if __name__ == "__main__":
+    test_snapshot_not_torn()
+    test_no_lost_updates()
+    test_version_tracks_changes()
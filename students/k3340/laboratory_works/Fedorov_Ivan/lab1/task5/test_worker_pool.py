@@ -0,0 +1,89 @@
+import http.client
+import os
+import socket
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.http_connection import KEEPALIVE_TIMEOUT
+
+
+HOST = 'localhost'
+PORT = 9491
+
+
+def start_server(*args):
+    """Сервер оценок отдельным процессом; вывод отбрасывается"""
+    process = subprocess.Popen([sys.executable, 'grades_server.py', '--port', str(PORT), *args],
+                               cwd=os.path.dirname(os.path.abspath(__file__)),
+                               stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    time.sleep(0.7)
+    return process
+
+
+def stop_server(process):
+    process.terminate()
+    process.wait()
+
+
+def test_idle_keepalive_yields_worker():
+    """Простаивающие keep-alive соединения не держат очередь до KEEPALIVE_TIMEOUT"""
+    server = start_server('--workers', '2')
+    try:
+        idle = []
+        for _ in range(2):
+            connection = http.client.HTTPConnection(HOST, PORT, timeout=10)
+            connection.request('GET', '/api/stats')
+            connection.getresponse().read()
+            idle.append(connection)  # Оба потока пула теперь ждут следующего запроса
+
+        started = time.perf_counter()
+        client = http.client.HTTPConnection(HOST, PORT, timeout=10)
+        client.request('GET', '/api/stats')
+        response = client.getresponse()
+        response.read()
+        elapsed = time.perf_counter() - started
+        client.close()
+        for connection in idle:
+            connection.close()
+
+        print(f"Третий клиент при двух простаивающих: {response.status}, {elapsed * 1000:.0f} мс")
+        assert response.status == 200
+        assert elapsed < KEEPALIVE_TIMEOUT / 5, f"ждал {elapsed:.2f} с, таймаут keep-alive {KEEPALIVE_TIMEOUT} с"
+    finally:
+        stop_server(server)
+
+
+def test_shed_response_reaches_client():
+    """Отклоненный клиент, дописывающий запрос после отказа, получает 503, а не обрыв"""
+    server = start_server('--workers', '1', '--queue-size', '0')
+    try:
+        busy = http.client.HTTPConnection(HOST, PORT, timeout=10)
+        busy.request('GET', '/api/stats')
+        busy.getresponse().read()  # Единственный поток занят этим соединением
+
+        statuses = []
+        for _ in range(20):
+            with socket.create_connection((HOST, PORT), timeout=5) as client:
+                time.sleep(0.02)  # Запрос приходит уже после отказа, и тело больше буферов сокетов
+                body = b'discipline=' + b'x' * 8 * 1024 * 1024 + b'&grade=5'
+                try:
+                    client.sendall(f"POST /add HTTP/1.1\r\nHost: {HOST}:{PORT}\r\n"
+                                   f"Content-Length: {len(body)}\r\n\r\n".encode('latin-1') + body)
+                    status_line = client.makefile('rb').readline()
+                except (ConnectionResetError, BrokenPipeError):
+                    status_line = b''
+            statuses.append(status_line.split()[1].decode('ascii') if status_line else 'reset')
+        busy.close()
+
+        print(f"Ответы отклоненным клиентам: {statuses.count('503')} из {len(statuses)} - 503")
+        assert statuses == ['503'] * len(statuses), statuses
+    finally:
+        stop_server(server)
+
+
+if __name__ == "__main__":
+    test_idle_keepalive_yields_worker()
+    test_shed_response_reaches_client()